@@ -8,16 +8,35 @@
 ✅ Security: API key authentication and rate limiting
 """
 
-from flask import Flask, request, jsonify
+# First, so the startup report sees the cost of every import below
+from serving.startup import startup_report
+startup_report.track_imports()
+
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-import pandas as pd
 import numpy as np
-from xgboost import XGBClassifier
 import json
-import joblib
-from datetime import datetime
 import os
+import time
+import gc
+import threading
 from dotenv import load_dotenv
+from serving.model_registry import ModelRegistry
+from serving.attribution import ContributionExplainer
+from serving.tree_paths import TreePathExplainer
+from serving.micro_batcher import MicroBatcher
+from serving.scoring import risk_level_for, risk_levels_for, group_by_mode, score_records
+from serving.stream_scoring import (
+    STREAM_CONFIG,
+    PARSERS as STREAM_PARSERS,
+    FORMATTERS as STREAM_FORMATTERS,
+    StreamStats,
+    iter_lines,
+    score_stream,
+    csv_header as stream_csv_header
+)
+from serving.warmup import Warmup, WARMUP_CONFIG, SYNTHETIC_TRANSACTIONS, synthetic_batch
+from routes.auth_security import require_admin
 
 load_dotenv()
 
@@ -38,358 +57,219 @@ CORS(app, resources={
     }
 })
 
+# Upper bound on transactions accepted by /api/check-fraud/batch
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 10000))
+
+# Upper bound on labels accepted by /api/feedback/bulk (chargeback imports)
+FEEDBACK_BULK_MAX_ROWS = int(os.getenv('FEEDBACK_BULK_MAX_ROWS', 100000))
+
+# Persist predictions through the write-behind queue instead of inline INSERTs
+PREDICTION_WRITE_BEHIND = os.getenv('PREDICTION_WRITE_BEHIND', 'true').lower() == 'true'
+
+# XGBoost (and the scikit-learn/SciPy stack it imports) only serves batches
+# above TREE_INFERENCE_MAX_ROWS; load it on a background thread after startup
+# instead of before the first request ("false" = on first use)
+BACKGROUND_MODEL_LOAD = os.getenv('BACKGROUND_MODEL_LOAD', 'true').lower() == 'true'
+
+# Coalesce concurrent /api/check-fraud requests into one predict_proba call per
+# model (MICRO_BATCH_MAX_ROWS / MICRO_BATCH_MAX_WAIT_MS); needs threaded workers
+MICRO_BATCH_ENABLED = os.getenv('MICRO_BATCH_ENABLED', 'false').lower() == 'true'
+
+# Per-request explanations: "path" = Saabas contributions from the precomputed
+# tree path index (approximate; features carry "method": "saabas"), "shap" =
+# TreeSHAP (DualShapExplainer, ~5-11 ms per request), "importance" = value x
+# feature importance (also used for models without a tree index)
+EXPLAINER_METHOD = os.getenv('EXPLAINER_METHOD', 'path').lower()
+
+# "sync": LLM explanation inline in /api/check-fraud; "async": background job + token
+GENAI_EXPLANATION_MODE = os.getenv('GENAI_EXPLANATION_MODE', 'sync').lower()
+# Longest a client may block on ?wait= / an SSE stream for a pending explanation
+EXPLANATION_MAX_WAIT = float(os.getenv('EXPLANATION_MAX_WAIT', 30))
+
 print("="*80)
 print(" INTEGRATED FRAUD DETECTION SYSTEM")
 print("="*80)
 
 # ============================================
-# LOAD BANKING MODEL
+# SIMPLE EXPLAINER
 # ============================================
-model_banking = None
-features_banking = None
-threshold_banking = 0.55
-scaler_banking = None
+class SimpleExplainer(ContributionExplainer):
+    """
+    Importance-weighted contributions (feature value x model feature importance),
+    for EXPLAINER_METHOD=importance and models without a tree index.
+    
+    Directions come from the probability the caller already computed; the
+    model only runs again when none is passed.
+    """
+    method = "importance"
+    with_method = False   # same records as before the other explainers existed
+    
+    def __init__(self, model, feature_names):
+        self.model = model
+        self.feature_names = list(feature_names)
+        try:
+            importances = model.feature_importances_
+        except:
+            importances = np.ones(len(feature_names)) / len(feature_names)
+        self.importances = np.asarray(importances, dtype=np.float32)
+    
+    def contributions(self, values):
+        return values * self.importances
+    
+    def explain_many(self, X, probas=None, top_n=5):
+        if probas is None:
+            probas = self.model.predict_proba(X)[:, 1]
+        return super().explain_many(X, probas, top_n)
+    
+    def impacts(self, batch, probas):
+        # Direction relative to the predicted side of 0.5
+        p = np.asarray(probas, dtype=np.float64).reshape(-1, 1)
+        c = batch.contributions
+        increases = ((c > 0) & (p > 0.5)) | ((c < 0) & (p < 0.5))
+        return np.where(increases, "increases", "decreases")
 
-try:
-    temp_model = XGBClassifier()
-    temp_model.load_model("models/fraud_model_banking.json")
+class ShapExplainer:
+    """
+    TreeSHAP contributions through DualShapExplainer.
     
-    with open("models/features_banking.json") as f:
-        features_banking = json.load(f)
+    shap and the XGBoost model are loaded on the first explanation (warmup),
+    not at import; batches go through explain_batch in one TreeSHAP call.
+    """
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self._explainer = None
+        self._lock = threading.Lock()
     
-    with open("models/model_config_banking.json") as f:
-        threshold_banking = json.load(f).get("default_threshold", 0.55)
+    def _get(self):
+        if self._explainer is None:
+            with self._lock:
+                if self._explainer is None:
+                    from shap_explainer import DualShapExplainer
+                    self._explainer = DualShapExplainer(
+                        self.bundle.model, self.bundle.features, self.bundle.model_type
+                    )
+        return self._explainer
     
-    # Try loading scaler, but don't fail hard if missing (just warn)
-    try:
-        scaler_banking = joblib.load("models/scaler_banking.pkl")
-    except:
-        print("⚠️  BANKING Model: Scaler not found (using unscaled values)")
-        scaler_banking = None
-        
-    model_banking = temp_model
-    print(f"✅ BANKING Model: XGBoost ({len(features_banking)} features)")
-    print(f"   Threshold: {threshold_banking}")
+    def explain_many(self, X, probas=None, top_n=5):
+        return self._get().explain_many(X, probas, top_n)
     
-except Exception as e:
-    model_banking = None
-    features_banking = None
-    print(f"⚠️  BANKING Model: Not available ({e})")
+    def explain(self, X, top_n=5, proba=None):
+        try:
+            return self.explain_many(X[:1], None, top_n)[0]
+        except Exception as e:
+            print(f"⚠️  SHAP explanation failed: {e}")
+            return []
+
+def make_explainer(bundle):
+    """Explainer for a newly loaded bundle (EXPLAINER_METHOD, importance for non-tree models)"""
+    if EXPLAINER_METHOD == 'shap' and bundle.tree_index is not None:
+        return ShapExplainer(bundle)
+    if EXPLAINER_METHOD == 'path' and bundle.tree_index is not None:
+        return TreePathExplainer(bundle.tree_index)
+    return SimpleExplainer(bundle.model, bundle.features)
 
 # ============================================
-# LOAD CREDIT CARD MODEL
+# LOAD MODELS (hot-swappable registry)
 # ============================================
-model_cc = None
-features_cc = None
-threshold_cc = 0.4
-
-try:
-    temp_model = XGBClassifier()
-    temp_model.load_model("models/fraud_model_final.json")
-    
-    loaded_features = None
-    if os.path.exists("models/features.json"):
-        with open("models/features.json") as f:
-            loaded_features = json.load(f)
-    elif os.path.exists("models/features.json"):
-        with open("models/features.json") as f:
-            loaded_features = json.load(f)
-            
-    if loaded_features:
-        features_cc = loaded_features
-        model_cc = temp_model
-        
-        if os.path.exists("models/model_config.json"):
-            with open("models/model_config.json") as f:
-                config = json.load(f)
-                threshold_cc = config.get("default_threshold", 0.4)
-        
-        print(f"✅ CREDIT_CARD Model: XGBoost ({len(features_cc)} features)")
-        print(f"   Threshold: {threshold_cc}")
-    else:
-        print("⚠️  CREDIT_CARD Model: Features file missing")
-        model_cc = None
-    
-except Exception as e:
-    model_cc = None
-    features_cc = None
-    print(f"⚠️  CREDIT_CARD Model: Not available ({e})")
-    print(f"⚠️  CREDIT_CARD Model: Not available ({e})")
+# Banking + credit card bundles (model, features, threshold, scaler, explainer).
+# A watcher thread swaps in new versions when retraining activates one.
+registry = ModelRegistry(explainer_factory=make_explainer)
+with startup_report.phase("models"):
+    registry.load_initial()
+micro_batcher = MicroBatcher() if MICRO_BATCH_ENABLED else None
 
 # ============================================
 # LOAD DATABASE
 # ============================================
 DB_ENABLED = False
-try:
-    from database.db_dual import (
-        init_database,
-        close_database,
-        save_prediction_to_db,
-        get_prediction_by_id,
-        get_recent_predictions,
-        update_prediction_feedback,
-        get_feedback_count
-    )
+with startup_report.phase("database"):
+    try:
+        from database.db_dual import (
+            init_database,
+            save_prediction_to_db,
+            get_prediction_by_id,
+            get_recent_predictions,
+            update_prediction_feedback,
+            bulk_update_prediction_feedback,
+            allocated_prediction_ids,
+            get_feedback_count,
+            invalidate_active_model_version,
+            update_prediction_explanation,
+            get_active_model_version_id,
+            db
+        )
     
-    DB_ENABLED = init_database()
+        from database.write_behind import prediction_writer
+    
+        DB_ENABLED = init_database()
+        if DB_ENABLED:
+            print("✅ Database: CONNECTED")
+            print(f"   Prediction writes: {'write-behind' if PREDICTION_WRITE_BEHIND else 'synchronous'}")
+        else:
+            print("⚠️  Database: DISABLED (continuing without DB)")
+    except Exception as e:
+        print(f"⚠️  Database: DISABLED ({e})")
+
+# Watch model_versions (when DB is up) and the local manifest for new versions
+try:
     if DB_ENABLED:
-        print("✅ Database: CONNECTED")
-    else:
-        print("⚠️  Database: DISABLED (continuing without DB)")
+        # New active version -> stale cached model_version_id for new predictions
+        registry.add_swap_listener(invalidate_active_model_version)
+    registry.start_watcher(db=db if DB_ENABLED else None)
 except Exception as e:
-    print(f"⚠️  Database: DISABLED ({e})")
+    print(f"⚠️  Model registry watcher: DISABLED ({e})")
 
 # ============================================
 # LOAD ANALYTICS & RETRAINING
 # ============================================
-try:
-    from routes.analytics_routes import register_analytics_routes
-    from routes.retraining_routes import register_retraining_routes, auto_trigger_retraining
+with startup_report.phase("routes"):
+    try:
+        from routes.analytics_routes import register_analytics_routes
+        from routes.retraining_routes import register_retraining_routes, auto_trigger_retraining
     
-    register_analytics_routes(app)
-    register_retraining_routes(app)
-    print("✅ Analytics & Retraining: ENABLED")
-except Exception as e:
-    print(f"⚠️  Analytics & Retraining: DISABLED ({e})")
-    auto_trigger_retraining = None
+        register_analytics_routes(app)
+        register_retraining_routes(app)
+        print("✅ Analytics & Retraining: ENABLED")
+    except Exception as e:
+        print(f"⚠️  Analytics & Retraining: DISABLED ({e})")
+        auto_trigger_retraining = None
 
 # ============================================
 # LOAD GENAI
 # ============================================
 GENAI_ENABLED = False
-try:
-    from routes.genai import explain_transaction
-    GENAI_ENABLED = True
-    print(" GenAI: ENABLED")
-except Exception as e:
-    print(f" GenAI: DISABLED ({e})")
+AI_PROVIDER = 'fallback'
+explanation_jobs = None
 
-print("="*80 + "\n")
+def persist_explanation(job):
+    """Write a finished background explanation onto its prediction row"""
+    if not (DB_ENABLED and job.prediction_id):
+        return
+    if PREDICTION_WRITE_BEHIND:
+        prediction_writer.ensure_persisted(job.prediction_id)
+    update_prediction_explanation(job.prediction_id, job.explanation, job.provider)
 
-# ============================================
-# FEATURE ENGINEERING - BANKING
-# ============================================
-def prepare_banking_features(data):
-    """Prepare banking features matching train_banking.py"""
-    # Raw inputs
-    amount_val = float(data.get('Transaction_Amount', 0))
-    balance_val = float(data.get('Account_Balance', 0))
-    timestamp = data.get('Timestamp', '')
-    txn_type = data.get('Transaction_Type', 'POS')
-    daily_count_val = int(data.get('Daily_Transaction_Count', 1))
-    avg_7d_val = float(data.get('Avg_Transaction_Amount_7d', amount_val))
-    failed_7d_val = int(data.get('Failed_Transaction_Count_7d', 0))
-    card_age_val = int(data.get('Card_Age', 100))
-    distance_val = float(data.get('Transaction_Distance', 500))
-    ip_flag_val = int(data.get('IP_Address_Flag', 0))
-
-    # Time features
+with startup_report.phase("genai"):
     try:
-        dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-        hour = dt.hour
-        day_of_week = dt.weekday()
-    except:
-        hour = 12
-        day_of_week = 2
-    
-    is_weekend = 1 if day_of_week >= 5 else 0
-
-    # Amount features
-    amount = amount_val
-    balance = balance_val
-    spend_ratio = amount / (balance + amount + 1)
-
-    # Historical
-    avg_7d = avg_7d_val
-    amount_vs_avg = amount / (avg_7d + 1)
-    within_2x_avg = 1 if amount <= (avg_7d * 2) else 0
-    within_3x_avg = 1 if amount <= (avg_7d * 3) else 0
-
-    # Log transforms
-    amount_log = np.log1p(amount)
-    balance_log = np.log1p(balance)
-
-    # Time patterns
-    late_night = 1 if (hour >= 23 or hour <= 5) else 0
-    very_late_night = 1 if (hour >= 1 and hour <= 4) else 0
-    business_hours = 1 if (hour >= 9 and hour <= 17) else 0
-
-    # Txn type
-    is_atm = 1 if 'ATM' in txn_type.upper() else 0
-    is_online = 1 if 'ONLINE' in txn_type.upper() else 0
-    is_pos = 1 if 'POS' in txn_type.upper() else 0
-    is_transfer = 1 if 'TRANSFER' in txn_type.upper() else 0
-
-    # Activity
-    daily_count = daily_count_val
-    very_high_daily_count = 1 if daily_count > 15 else 0
-    reasonable_daily_count = 1 if daily_count <= 10 else 0
-
-    # Failed
-    failed_7d = failed_7d_val
-    few_failed = 1 if failed_7d <= 2 else 0
-    many_failed = 1 if failed_7d > 5 else 0
-
-    # Card Age
-    card_age = card_age_val
-    very_new_card = 1 if card_age < 7 else 0
-    new_card = 1 if card_age < 30 else 0
-    established_card = 1 if card_age > 90 else 0
-    mature_card = 1 if card_age > 180 else 0
-
-    # Distance
-    distance = distance_val
-    local_txn = 1 if distance < 50 else 0
-    nearby_txn = 1 if distance < 200 else 0
-    far_txn = 1 if distance > 1000 else 0
-    very_far_txn = 1 if distance > 3000 else 0
-
-    # Categories
-    small_amount = 1 if amount < 100 else 0
-    normal_amount = 1 if (amount >= 100 and amount <= 500) else 0
-    large_amount = 1 if amount > 500 else 0
-    very_large_amount = 1 if amount > 2000 else 0
-
-    healthy_balance = 1 if balance > 5000 else 0
-    low_balance = 1 if balance < 1000 else 0
-
-    suspicious_ip = ip_flag_val
-
-    # Trust Score
-    trust_score = (
-        established_card +
-        few_failed +
-        (1 if balance >= amount else 0) +
-        within_2x_avg +
-        reasonable_daily_count
-    )
-    high_trust = 1 if trust_score >= 4 else 0
-
-    # Construct dict
-    features = {
-        'amount': amount, 'balance': balance, 'spend_ratio': spend_ratio, 
-        'amount_vs_avg': amount_vs_avg, 'within_2x_avg': within_2x_avg, 
-        'within_3x_avg': within_3x_avg, 'amount_log': amount_log, 
-        'balance_log': balance_log, 'hour': hour, 'day_of_week': day_of_week, 
-        'is_weekend': is_weekend, 'late_night': late_night, 
-        'very_late_night': very_late_night, 'business_hours': business_hours,
-        'is_atm': is_atm, 'is_online': is_online, 'is_pos': is_pos, 
-        'is_transfer': is_transfer, 'daily_count': daily_count, 
-        'very_high_daily_count': very_high_daily_count, 
-        'reasonable_daily_count': reasonable_daily_count, 'avg_7d': avg_7d, 
-        'failed_7d': failed_7d, 'few_failed': few_failed, 'many_failed': many_failed,
-        'card_age': card_age, 'very_new_card': very_new_card, 
-        'new_card': new_card, 'established_card': established_card, 
-        'mature_card': mature_card, 'distance': distance, 'local_txn': local_txn, 
-        'nearby_txn': nearby_txn, 'far_txn': far_txn, 'very_far_txn': very_far_txn,
-        'small_amount': small_amount, 'normal_amount': normal_amount, 
-        'large_amount': large_amount, 'very_large_amount': very_large_amount,
-        'healthy_balance': healthy_balance, 'low_balance': low_balance,
-        'suspicious_ip': suspicious_ip, 'trust_score': trust_score, 
-        'high_trust': high_trust
-    }
-
-    df = pd.DataFrame([features])
-    
-    # Scale
-    continuous = [
-        'amount', 'balance', 'spend_ratio', 'amount_vs_avg',
-        'amount_log', 'balance_log', 'hour', 'day_of_week',
-        'daily_count', 'avg_7d', 'failed_7d', 'card_age', 'distance', 'trust_score'
-    ]
-    
-    if scaler_banking:
-         try:
-             df[continuous] = scaler_banking.transform(df[continuous])
-         except Exception as e:
-             print(f"Scaling error: {e}")
-    
-    # Return features in correct order
-    final_df = pd.DataFrame()
-    for col in features_banking:
-        if col in df.columns:
-            final_df[col] = df[col]
-        else:
-            final_df[col] = 0
-            
-    return final_df
-
-# ============================================
-# FEATURE ENGINEERING - CREDIT CARD
-# ============================================
-def prepare_credit_card_features(data):
-    """Prepare credit card features (V1-V28 + Amount + Time)"""
-    
-    features = {}
-    
-    # V1-V28 (PCA features)
-    for i in range(1, 29):
-        v_key = f'V{i}'
-        if v_key not in data:
-            raise ValueError(f"Missing {v_key}. Credit card mode requires V1-V28.")
-        features[v_key] = float(data[v_key])
-    
-    # Amount and Time
-    features['Amount'] = float(data.get('Amount', 0))
-    features['Time'] = float(data.get('Time', 0))
-    
-    # Engineered features
-    hour = (features['Time'] / 3600) % 24
-    features['Hour'] = hour
-    features['time_gap'] = 0
-    features['txn_last_1hr'] = 1
-    features['Amount_log'] = np.log1p(features['Amount'])
-    features['amount_roll_mean_3'] = features['Amount']
-    features['amount_roll_std_3'] = 0
-    
-    df = pd.DataFrame([features])
-    
-    # Return only features model expects
-    available = [f for f in features_cc if f in df.columns]
-    return df[available]
+        from routes.genai import (
+            explain_transaction,
+            AI_PROVIDER,
+            CACHE as explanation_cache,
+            INFLIGHT as explanation_inflight
+        )
+        from serving.explanation_jobs import ExplanationJobs
+        explanation_jobs = ExplanationJobs(on_complete=persist_explanation)
+        GENAI_ENABLED = True
+        print(f" GenAI: ENABLED (provider={AI_PROVIDER}, default mode={GENAI_EXPLANATION_MODE})")
+    except Exception as e:
+        print(f" GenAI: DISABLED ({e})")
 
-# ============================================
-# SIMPLE EXPLAINER
-# ============================================
-class SimpleExplainer:
-    def __init__(self, model, feature_names):
-        self.model = model
-        self.feature_names = feature_names
-        try:
-            self.importances = model.feature_importances_
-        except:
-            self.importances = np.ones(len(feature_names)) / len(feature_names)
-    
-    def explain(self, X, top_n=5):
-        try:
-            if isinstance(X, pd.DataFrame):
-                feature_values = X.iloc[0].values
-            else:
-                feature_values = X[0] if len(X.shape) > 1 else X
-            
-            contributions = feature_values * self.importances
-            proba = self.model.predict_proba(X)[0][1]
-            
-            abs_contributions = np.abs(contributions)
-            top_indices = np.argsort(abs_contributions)[-top_n:][::-1]
-            
-            top_features = []
-            for idx in top_indices:
-                contribution = float(contributions[idx])
-                top_features.append({
-                    "feature": self.feature_names[idx],
-                    "value": round(float(feature_values[idx]), 4),
-                    "shap_value": round(contribution, 4),
-                    "impact": "increases" if (contribution > 0 and proba > 0.5) or (contribution < 0 and proba < 0.5) else "decreases"
-                })
-            
-            return top_features
-        except:
-            return []
+if BACKGROUND_MODEL_LOAD:
+    startup_report.background("xgboost models", registry.load_models)
 
-# Create explainers
-explainer_banking = SimpleExplainer(model_banking, features_banking) if model_banking else None
-explainer_cc = SimpleExplainer(model_cc, features_cc) if model_cc else None
+startup_report.finish()
+startup_report.print_report()
+print("="*80 + "\n")
 
 # ============================================
 # FALLBACK EXPLANATION
@@ -409,6 +289,51 @@ def generate_fallback(pred, proba, top_features, amount):
     
     return exp
 
+# ============================================
+# WARMUP & READINESS
+# ============================================
+# Each worker pushes synthetic transactions through the pipeline on a
+# background thread; /ready answers 503 until that has finished.
+warmup = Warmup()
+
+def warmup_model(model_type):
+    """Synthetic single-row and batch predictions through the request pipeline"""
+    bundle = registry.get(model_type)
+    if bundle is None:
+        return False
+    payload = SYNTHETIC_TRANSACTIONS[model_type]
+    amount = float(payload['Transaction_Amount' if model_type == 'banking' else 'Amount'])
+
+    for _ in range(WARMUP_CONFIG['rounds']):
+        X = bundle.prepare_one(payload)
+        if micro_batcher is not None:
+            proba = micro_batcher.predict(bundle, X)[0]
+        else:
+            proba = bundle.predict_proba(X)[0]
+        top = bundle.explainer.explain(X, 5, proba=proba) if bundle.explainer else []
+        risk_level_for(proba)
+        generate_fallback(int(proba >= bundle.threshold), proba, top, amount)
+
+    # Batch path: loads XGBoost if it was deferred and starts its thread pool
+    X = bundle.prepare_many(synthetic_batch(model_type, WARMUP_CONFIG['batch_rows']))
+    probas = bundle.predict_proba(X)
+    risk_levels_for(probas)
+    if bundle.explainer:
+        bundle.explainer.explain_many(X, probas, 5)
+
+def warmup_database():
+    """Open this worker's pool and cache the active model version ids"""
+    if not DB_ENABLED:
+        return False
+    with db.get_cursor() as cursor:
+        for model_type in ('banking', 'credit_card'):
+            get_active_model_version_id(cursor, model_type)
+
+warmup.add_step("banking_model", lambda: warmup_model('banking'))
+warmup.add_step("credit_card_model", lambda: warmup_model('credit_card'))
+warmup.add_step("database", warmup_database, required=False)
+warmup.start()
+
 # ============================================
 # MAIN PREDICTION ENDPOINT
 # ============================================
@@ -422,12 +347,29 @@ def home():
             "mode": "production" if os.getenv('DATABASE_URL') else "local"
         },
         "models": {
-            "banking": "available" if model_banking else "missing",
-            "credit_card": "available" if model_cc else "missing"
+            "banking": "available" if registry.get('banking') else "missing",
+            "credit_card": "available" if registry.get('credit_card') else "missing"
         },
-        "genai": "enabled" if GENAI_ENABLED else "disabled"
+        "genai": "enabled" if GENAI_ENABLED else "disabled",
+        "warmup": warmup.status
     })
 
+@app.route("/live", methods=["GET"])
+def live():
+    """Liveness: the worker process is up and answering HTTP"""
+    return jsonify({"status": "alive", "worker_pid": os.getpid()})
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness: 200 once this worker has finished warmup, 503 while warming or if it failed"""
+    warmup.start()  # no-op unless this process was forked without the gunicorn hook
+    return jsonify({
+        "status": "ready" if warmup.ready else warmup.status,
+        "worker_pid": os.getpid(),
+        "startup_ms": startup_report.startup_ms,
+        "warmup": warmup.describe()
+    }), 200 if warmup.ready else 503
+
 @app.route("/predict", methods=["POST"])
 @app.route("/api/check-fraud", methods=["POST"])
 def predict():
@@ -435,37 +377,44 @@ def predict():
         data = request.get_json()
         mode = data.get('mode', 'banking').lower()
         
+        # Grab the active bundle once - a hot swap mid-request won't affect us
+        bundle = registry.get('credit_card' if mode == 'credit_card' else 'banking')
+        
         if mode == 'credit_card':
             # CREDIT CARD MODE
-            if not model_cc:
+            if not bundle:
                 return jsonify({"status": "error", "message": "Credit card model unavailable"}), 400
-            
-            features_df = prepare_credit_card_features(data)
-            proba = model_cc.predict_proba(features_df)[0][1]
-            pred = int(proba >= threshold_cc)
-            top_features = explainer_cc.explain(features_df, 5) if explainer_cc else []
             amount = float(data.get('Amount', 0))
-            threshold = threshold_cc
             model_name = "Credit Card (V1-V28)"
             
         else:
             # BANKING MODE (default)
-            if not model_banking:
+            if not bundle:
                 return jsonify({"status": "error", "message": "Banking model unavailable"}), 400
-            
-            features_df = prepare_banking_features(data)
-            proba = model_banking.predict_proba(features_df)[0][1]
-            pred = int(proba >= threshold_banking)
-            top_features = explainer_banking.explain(features_df, 5) if explainer_banking else []
             amount = float(data.get('Transaction_Amount', 0))
-            threshold = threshold_banking
             model_name = "Banking"
         
+        features_df = bundle.prepare_one(data)
+        if micro_batcher is not None:
+            proba = micro_batcher.predict(bundle, features_df)[0]
+        else:
+            proba = bundle.predict_proba(features_df)[0]
+        threshold = bundle.threshold
+        pred = int(proba >= threshold)
+        top_features = bundle.explainer.explain(features_df, 5, proba=proba) if bundle.explainer else []
+        
         # Risk
-        risk = "CRITICAL" if proba >= 0.7 else "HIGH" if proba >= 0.5 else "MEDIUM" if proba >= 0.4 else "LOW" if proba >= 0.2 else "MINIMAL"
+        risk = risk_level_for(proba)
+        
+        # GenAI - inline, or deferred to a background job when async was requested
+        explanation_mode = str(
+            data.get('explanation_mode') or request.args.get('explanation') or GENAI_EXPLANATION_MODE
+        ).lower()
+        async_explanation = GENAI_ENABLED and explanation_mode == 'async'
         
-        # GenAI
-        if GENAI_ENABLED:
+        if async_explanation:
+            ai_exp = None
+        elif GENAI_ENABLED:
             ai_exp = explain_transaction(top_features, proba, amount, mode)
         else:
             ai_exp = generate_fallback(pred, proba, top_features, amount)
@@ -481,14 +430,18 @@ def predict():
                     'risk_level': risk,
                     'threshold_used': threshold,
                     'top_features': top_features,
-                    'ai_explanation': ai_exp,
-                    'ai_provider': 'groq' if GENAI_ENABLED else 'fallback',
+                    'ai_explanation': ai_exp or '',
+                    'ai_provider': 'pending' if async_explanation else AI_PROVIDER,
                     'api_endpoint': '/api/check-fraud',
                     'request_ip': request.remote_addr,
                     **data  # Include all original data
                 }
                 
-                prediction_id = save_prediction_to_db(db_data)
+                if PREDICTION_WRITE_BEHIND:
+                    # Id is reserved now, row is bulk-inserted in the background
+                    prediction_id = prediction_writer.submit(db_data)
+                else:
+                    prediction_id = save_prediction_to_db(db_data)
                 if not prediction_id:
                     print("⚠️  Prediction NOT saved to database (save_prediction_to_db returned None)")
             except Exception as e:
@@ -496,6 +449,15 @@ def predict():
         else:
             print("ℹ️  Database disabled: Prediction not saved")
         
+        explanation_job = None
+        if async_explanation:
+            explanation_job = explanation_jobs.submit(
+                explain_transaction, top_features, proba, amount, mode,
+                prediction_id=prediction_id,
+                provider=AI_PROVIDER,
+                fallback=lambda: generate_fallback(pred, proba, top_features, amount)
+            )
+        
         response = {
             "status": "success",
             "mode": mode,
@@ -504,13 +466,21 @@ def predict():
             "fraud_probability": float(proba),
             "risk_level": risk,
             "threshold": threshold,
-            "features_used": len(features_df.columns),
+            "model_version": bundle.version,
+            "features_used": features_df.shape[1],
             "top_contributing_features": top_features,
             "ai_explanation": ai_exp,
             "message": "⚠️ FRAUD DETECTED" if pred == 1 else "✅ Normal",
             "transaction_amount": amount,
             "prediction_id": prediction_id # Always include, even if None
         }
+        if explanation_job is not None:
+            response.update({
+                "explanation_status": "pending",
+                "explanation_token": explanation_job.token,
+                "explanation_url": f"/api/explanations/{explanation_job.token}",
+                "explanation_stream_url": f"/api/explanations/{explanation_job.token}/stream"
+            })
         
         print(f"✅ Prediction completed: Mode={mode}, ID={prediction_id}, Prob={proba:.4f}")
         
@@ -520,6 +490,294 @@ def predict():
         import traceback
         return jsonify({"status": "error", "message": str(e), "trace": traceback.format_exc()}), 500
 
+# ============================================
+# BATCH PREDICTION ENDPOINT
+# ============================================
+@app.route("/api/check-fraud/batch", methods=["POST"])
+def predict_batch():
+    """
+    Score many transactions in one request.
+
+    Body: {"mode": "banking", "transactions": [{...}, ...], "save": false}
+    Each transaction may override "mode". Feature matrices are built in one
+    NumPy pass per mode and scored with a single predict_proba call.
+    With "explain": true, each result gets its top contributing features.
+    With "save": true, results are persisted through the write-behind queue.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"status": "error", "message": 'Body must be a JSON object: {"transactions": [...]}'}), 400
+        transactions = data.get('transactions')
+        default_mode = str(data.get('mode') or 'banking').lower()
+
+        if not isinstance(transactions, list) or not transactions:
+            return jsonify({"status": "error", "message": "transactions must be a non-empty list"}), 400
+        if len(transactions) > MAX_BATCH_SIZE:
+            return jsonify({"status": "error", "message": f"Batch too large ({len(transactions)} > {MAX_BATCH_SIZE})"}), 413
+        bad = next((i for i, t in enumerate(transactions) if not isinstance(t, dict)), None)
+        if bad is not None:
+            return jsonify({
+                "status": "error",
+                "message": f"transactions[{bad}] must be an object",
+                "index": bad
+            }), 400
+
+        # Group row indices by mode so each model is called once
+        results = [None] * len(transactions)
+
+        for mode, indices in group_by_mode(transactions, default_mode).items():
+            bundle = registry.get(mode)
+            if not bundle:
+                label = "Credit card" if mode == 'credit_card' else "Banking"
+                return jsonify({"status": "error", "message": f"{label} model unavailable"}), 400
+
+            try:
+                scored = score_records(bundle, [transactions[i] for i in indices], explain=bool(data.get('explain')))
+            except ValueError:
+                # Report the request index of the first bad transaction, not its row within the mode
+                for i in indices:
+                    try:
+                        score_records(bundle, [transactions[i]])
+                    except ValueError as e:
+                        return jsonify({"status": "error", "message": f"transactions[{i}]: {e}", "index": i}), 400
+                raise
+            for i, result in zip(indices, scored):
+                results[i] = {"index": i, **result}
+
+        if data.get('save') and DB_ENABLED:
+            for i, result in enumerate(results):
+                result['prediction_id'] = save_scored_transaction(
+                    transactions[i], result, '/api/check-fraud/batch', request.remote_addr
+                )
+
+        fraud_count = sum(r["prediction"] for r in results)
+        print(f"✅ Batch prediction completed: {len(results)} transactions, {fraud_count} flagged")
+
+        return jsonify({
+            "status": "success",
+            "count": len(results),
+            "fraud_count": fraud_count,
+            "results": results
+        })
+
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        import traceback
+        return jsonify({"status": "error", "message": str(e), "trace": traceback.format_exc()}), 500
+
+def save_scored_transaction(transaction, result, endpoint, request_ip):
+    """Persist one batch/stream result (write-behind queue when enabled); returns its prediction id"""
+    db_data = {
+        **transaction,
+        'mode': result['mode'],
+        'prediction': result['prediction'],
+        'fraud_probability': result['fraud_probability'],
+        'risk_level': result['risk_level'],
+        'threshold_used': result['threshold'],
+        'top_features': result.get('top_contributing_features', []),
+        'ai_provider': 'none',
+        'api_endpoint': endpoint,
+        'request_ip': request_ip
+    }
+    if PREDICTION_WRITE_BEHIND:
+        return prediction_writer.submit(db_data)
+    return save_prediction_to_db(db_data)
+
+# ============================================
+# STREAMING SCORING
+# ============================================
+@app.route("/api/check-fraud/stream", methods=["POST"])
+def predict_stream():
+    """
+    Score a (chunked) NDJSON or CSV body, streaming results back chunk by chunk.
+
+    Input format from Content-Type (text/csv -> CSV, otherwise NDJSON) or
+    ?format=ndjson|csv|tsv.
+    Query: mode (for rows without "mode"), chunk_size, explain=true, id_field,
+    output=ndjson|csv, save=true (persist through the write-behind queue).
+    NDJSON output ends with a {"summary": {...}} line.
+    """
+    args = request.args
+    in_format = args.get('format') or ('csv' if 'csv' in (request.content_type or '') else 'ndjson')
+    out_format = args.get('output', 'ndjson')
+    if in_format not in STREAM_PARSERS or out_format not in STREAM_FORMATTERS:
+        return jsonify({"status": "error", "message": "format must be ndjson, csv or tsv, output ndjson or csv"}), 400
+    try:
+        chunk_size = min(max(int(args.get('chunk_size', STREAM_CONFIG['chunk_size'])), 1), MAX_BATCH_SIZE)
+    except ValueError:
+        return jsonify({"status": "error", "message": "chunk_size must be an integer"}), 400
+
+    default_mode = args.get('mode', 'banking').lower()
+    explain = args.get('explain', 'false').lower() == 'true'
+    save = args.get('save', 'false').lower() == 'true' and DB_ENABLED
+    id_field = args.get('id_field')
+    body = request.stream
+    request_ip = request.remote_addr
+
+    def generate():
+        stats = StreamStats()
+        if out_format == 'csv':
+            yield stream_csv_header()
+        try:
+            rows = STREAM_PARSERS[in_format](iter_lines(body))
+            for records, results in score_stream(registry.get, rows, default_mode, chunk_size,
+                                                 explain, id_field, stats):
+                if save:
+                    for record, result in zip(records, results):
+                        if 'error' not in result:
+                            result['prediction_id'] = save_scored_transaction(
+                                record, result, '/api/check-fraud/stream', request_ip
+                            )
+                yield STREAM_FORMATTERS[out_format](results)
+        except Exception as e:
+            print(f"❌ Stream scoring aborted after {stats.rows} rows: {e}")
+            if out_format == 'ndjson':
+                yield json.dumps({"status": "error", "message": str(e)}) + "\n"
+            return
+
+        summary = stats.summary()
+        print(f"✅ Stream scoring completed: {summary['rows']} rows, {summary['fraud_count']} flagged, "
+              f"{summary['errors']} errors ({summary['rows_per_sec']} rows/s)")
+        if out_format == 'ndjson':
+            yield json.dumps({"summary": summary}) + "\n"
+
+    mimetype = 'text/csv' if out_format == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+# ============================================
+# METRICS
+# ============================================
+@app.route("/api/metrics", methods=["GET"])
+def metrics():
+    """Runtime metrics for this worker"""
+    data = {"worker_pid": os.getpid(), "startup": startup_report.report(), "warmup": warmup.describe()}
+    if DB_ENABLED:
+        data["db_pool"] = db.pool_metrics()
+    if DB_ENABLED and PREDICTION_WRITE_BEHIND:
+        data["prediction_writer"] = prediction_writer.metrics()
+    if micro_batcher is not None:
+        data["micro_batching"] = micro_batcher.metrics()
+    if GENAI_ENABLED:
+        data["explanations"] = explanation_jobs.metrics()
+        data["explanation_cache"] = explanation_cache.metrics()
+        data["explanation_inflight"] = explanation_inflight.metrics()
+    return jsonify(data)
+
+# ============================================
+# DEFERRED EXPLANATION ENDPOINTS
+# ============================================
+def lookup_explanation(token=None, prediction_id=None, wait=0.0):
+    """
+    Find an explanation by job token or prediction id, waiting up to `wait` seconds.
+    
+    Returns:
+        (payload, done) - payload is None if nothing is known about it
+    """
+    job = None
+    if GENAI_ENABLED:
+        job = explanation_jobs.get(token) if token else explanation_jobs.for_prediction(prediction_id)
+    if job is not None:
+        if wait > 0:
+            job.wait(wait)
+        return job.to_dict(), job.done
+    
+    if token or not DB_ENABLED:
+        return None, False
+    
+    # Job ran in another worker (or before a restart): read the stored row
+    deadline = time.time() + wait
+    while True:
+        if PREDICTION_WRITE_BEHIND:
+            prediction_writer.ensure_persisted(prediction_id)
+        row = get_prediction_by_id(prediction_id)
+        if row is None:
+            return None, False
+        done = row.get('ai_provider') != 'pending'
+        if done or time.time() >= deadline:
+            return {
+                "token": None,
+                "prediction_id": prediction_id,
+                "explanation_status": "done" if done else "pending",
+                "ai_explanation": row.get('ai_explanation') if done else None,
+                "ai_provider": row.get('ai_provider') if done else None
+            }, done
+        time.sleep(0.25)
+
+def explanation_response(token=None, prediction_id=None):
+    """JSON poll / long-poll (?wait=seconds) response: 200 when ready, 202 while pending"""
+    wait = min(float(request.args.get('wait', 0)), EXPLANATION_MAX_WAIT)
+    payload, done = lookup_explanation(token, prediction_id, wait)
+    if payload is None:
+        return jsonify({"status": "error", "message": "Explanation not found"}), 404
+    return jsonify({"status": "success", **payload}), 200 if done else 202
+
+def explanation_stream(token=None, prediction_id=None):
+    """Server-sent events: keep-alive comments while pending, then one `explanation` (or `error`) event"""
+    def generate():
+        deadline = time.time() + EXPLANATION_MAX_WAIT
+        while True:
+            payload, done = lookup_explanation(token, prediction_id, wait=1.0)
+            if payload is None:
+                yield f"event: error\ndata: {json.dumps({'message': 'Explanation not found'})}\n\n"
+                return
+            if done:
+                event = 'error' if payload['explanation_status'] == 'error' else 'explanation'
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+                return
+            if time.time() >= deadline:
+                yield f"event: timeout\ndata: {json.dumps(payload)}\n\n"
+                return
+            yield ": pending\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/api/explanations/<token>", methods=["GET"])
+def get_explanation(token):
+    """Explanation for an async job token"""
+    return explanation_response(token=token)
+
+@app.route("/api/explanations/<token>/stream", methods=["GET"])
+def stream_explanation(token):
+    return explanation_stream(token=token)
+
+@app.route("/api/predictions/<int:prediction_id>/explanation", methods=["GET"])
+def get_prediction_explanation(prediction_id):
+    """Explanation for a prediction (works from any worker when the DB is enabled)"""
+    return explanation_response(prediction_id=prediction_id)
+
+@app.route("/api/predictions/<int:prediction_id>/explanation/stream", methods=["GET"])
+def stream_prediction_explanation(prediction_id):
+    return explanation_stream(prediction_id=prediction_id)
+
+# ============================================
+# MODEL REGISTRY ENDPOINTS
+# ============================================
+@app.route("/api/models/active", methods=["GET"])
+def active_models():
+    """Versions currently served by this worker"""
+    return jsonify({
+        "status": "success",
+        "worker_pid": os.getpid(),
+        "models": registry.status(),
+        "errors": registry.last_error
+    })
+
+@app.route("/api/models/reload", methods=["POST"])
+@require_admin
+def reload_models():
+    """Check the manifest / model_versions now instead of waiting for the next poll"""
+    try:
+        swapped = registry.refresh()
+        return jsonify({"status": "success", "swapped": swapped, "models": registry.status()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 # ============================================
 # DATABASE ENDPOINTS
 # ============================================
@@ -530,6 +788,8 @@ def get_prediction(prediction_id):
         return jsonify({"status": "error", "message": "Database not available"}), 503
     
     try:
+        if PREDICTION_WRITE_BEHIND:
+            prediction_writer.ensure_persisted(prediction_id)
         prediction = get_prediction_by_id(prediction_id)
         
         if prediction:
@@ -570,7 +830,9 @@ def submit_feedback(prediction_id):
         return jsonify({"status": "error", "message": "Database not available"}), 503
     
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"status": "error", "message": "Expected a JSON object body"}), 400
         actual_class = data.get('actual_class')
         feedback_note = data.get('feedback_note', '')
         
@@ -580,12 +842,34 @@ def submit_feedback(prediction_id):
                 "message": "actual_class must be 0 (normal) or 1 (fraud)"
             }), 400
         
+        if PREDICTION_WRITE_BEHIND:
+            prediction_writer.ensure_persisted(prediction_id)
+        
         success = update_prediction_feedback(
             prediction_id,
             actual_class,
             feedback_note
         )
         
+        if success is None and PREDICTION_WRITE_BEHIND and allocated_prediction_ids([prediction_id]):
+            # Id handed out but not inserted yet: another worker is still buffering it
+            success = prediction_writer.retry_until_settled(
+                lambda: update_prediction_feedback(prediction_id, actual_class, feedback_note)
+            )
+            if success is None:
+                return jsonify({
+                    "status": "error",
+                    "message": "Prediction not persisted yet, retry shortly",
+                    "prediction_id": prediction_id
+                }), 409
+        
+        if success is None:
+            return jsonify({
+                "status": "error",
+                "message": "Prediction not found",
+                "prediction_id": prediction_id
+            }), 404
+        
         if success:
             # Auto-trigger retraining check
             if auto_trigger_retraining:
@@ -608,6 +892,127 @@ def submit_feedback(prediction_id):
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+def _retry_buffered_labels(labels, result, source):
+    """
+    Re-apply labels whose prediction id is allocated but not inserted yet
+    (buffered by another worker's write-behind queue); merges into result
+    """
+    buffered = allocated_prediction_ids(result['not_found'])
+    if not buffered:
+        return
+    pending = list(buffered)
+    
+    def label_id(label):
+        try:
+            return int(label['prediction_id'])
+        except (KeyError, TypeError, ValueError):
+            return None
+    
+    def attempt():
+        # All labels of those ids, in order: same dedup/validation as the first pass
+        waiting = set(pending)
+        retried = bulk_update_prediction_feedback(
+            [label for label in labels if label_id(label) in waiting], feedback_source=source
+        )
+        result['recorded'] += retried['recorded']
+        for feedback_type, count in retried['by_type'].items():
+            result['by_type'][feedback_type] = result['by_type'].get(feedback_type, 0) + count
+        pending[:] = retried['not_found']
+        return True if not pending else None
+    
+    prediction_writer.retry_until_settled(attempt)
+    landed = set(buffered) - set(pending)
+    result['not_found'] = [i for i in result['not_found'] if i not in landed]
+
+@app.route("/api/feedback/bulk", methods=["POST"])
+def submit_feedback_bulk():
+    """
+    Record many labels at once (chargeback file imports).
+
+    Body: JSON {"labels": [{"prediction_id", "actual_class", "feedback_note"?,
+    "confidence_level"?}, ...], "source"?}, or a CSV / NDJSON file with the
+    same fields (Content-Type text/csv or application/x-ndjson, or ?format=).
+    ?source= sets feedback_source (default "bulk_import").
+    """
+    if not DB_ENABLED:
+        return jsonify({"status": "error", "message": "Database not available"}), 503
+    
+    try:
+        content_type = request.content_type or ''
+        in_format = request.args.get('format') or (
+            'csv' if 'csv' in content_type else 'ndjson' if 'ndjson' in content_type else 'json'
+        )
+        source = request.args.get('source')
+        line_numbers = None
+        
+        if in_format == 'json':
+            data = request.get_json(silent=True)
+            if isinstance(data, dict):
+                source = source or data.get('source')
+                data = data.get('labels')
+            if not isinstance(data, list):
+                return jsonify({
+                    "status": "error",
+                    "message": 'Expected {"labels": [...]} or a JSON array'
+                }), 400
+            labels = data
+        elif in_format in STREAM_PARSERS:
+            labels, line_numbers, parse_errors = [], [], []
+            for line_no, record, error in STREAM_PARSERS[in_format](iter_lines(request.stream)):
+                if error:
+                    parse_errors.append({'line': line_no, 'error': error})
+                    continue
+                labels.append(record)
+                line_numbers.append(line_no)
+                if len(labels) > FEEDBACK_BULK_MAX_ROWS:
+                    break
+        else:
+            return jsonify({"status": "error", "message": "format must be json, csv or ndjson"}), 400
+        
+        if len(labels) > FEEDBACK_BULK_MAX_ROWS:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {FEEDBACK_BULK_MAX_ROWS} labels per request"
+            }), 413
+        
+        source = str(source or 'bulk_import')[:50]
+        
+        if PREDICTION_WRITE_BEHIND:
+            for label in labels:
+                if isinstance(label, dict) and isinstance(label.get('prediction_id'), int):
+                    prediction_writer.ensure_persisted(label['prediction_id'])
+        
+        start = time.time()
+        result = bulk_update_prediction_feedback(labels, feedback_source=source)
+        if result['not_found'] and PREDICTION_WRITE_BEHIND:
+            _retry_buffered_labels(labels, result, source)
+        elapsed = time.time() - start
+        
+        if line_numbers is not None:
+            # Report file line numbers instead of positions in the parsed list
+            for item in result['invalid']:
+                item['line'] = line_numbers[item.pop('index')]
+            result['invalid'] = parse_errors + result['invalid']
+        
+        print(f"✅ Bulk feedback ({source}): {result['recorded']}/{result['received']} recorded, "
+              f"{len(result['not_found'])} not found, {len(result['invalid'])} invalid in {elapsed:.2f}s")
+        
+        if result['recorded'] and auto_trigger_retraining:
+            try:
+                auto_trigger_retraining()
+            except Exception as e:
+                print(f"⚠️  Auto-trigger check failed: {e}")
+        
+        return jsonify({
+            "status": "success",
+            "source": source,
+            **result,
+            "processing_time_ms": round(elapsed * 1000, 1)
+        })
+    
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route("/api/stats", methods=["GET"])
 def get_stats():
     """Get basic statistics"""
@@ -638,14 +1043,41 @@ def get_stats():
 # ============================================
 # SHUTDOWN HANDLER
 # ============================================
-@app.teardown_appcontext
-def shutdown_session(exception=None):
-    """Close database on shutdown"""
+# The connection pool is per worker process: created on first use after fork,
+# reused by every request and closed once at worker exit (atexit in db_dual).
+# Closing it on request teardown forced a new Postgres handshake per request.
+
+# ============================================
+# WORKER LIFECYCLE (gunicorn preload_app, see gunicorn.conf.py)
+# ============================================
+# With preload the master imports this module once - models, feature layouts
+# and tree indexes are built there and shared copy-on-write by every worker.
+# Sockets and threads must not cross the fork, so the master releases them
+# and each worker restarts its own.
+
+def before_fork():
+    """Master, before forking workers: release per-process resources"""
+    # Finish deferred model loading here so workers share it too
+    startup_report.wait_background()
+    warmup.wait()
+    registry.load_models()
+    registry.stop_watcher()
     if DB_ENABLED:
-        try:
-            close_database()
-        except:
-            pass
+        from database.db_dual import close_database
+        close_database()
+    # Move everything loaded so far out of the GC's reach: collections would
+    # otherwise write to every object header and un-share the pages
+    gc.collect()
+    gc.freeze()
+
+def after_fork():
+    """Worker, right after fork: restart this process's background threads"""
+    try:
+        registry.start_watcher(db=db if DB_ENABLED else None)
+    except Exception as e:
+        print(f"⚠️  Model registry watcher: DISABLED ({e})")
+    # Thread pools and DB connections are per process: warm this worker's own
+    warmup.start()
 
 if __name__ == "__main__":
     import os
@@ -655,4 +1087,12 @@ if __name__ == "__main__":
     print("Modes:")
     print("  • banking: Raw transaction data")
     print("  • credit_card: V1-V28 + Amount + Time\n")
-    app.run(host="0.0.0.0", port=port, debug=False)
+    retrain_runner = None
+    if DB_ENABLED:
+        from retraining.worker import start_background_runner, stop_background_runner
+        retrain_runner = start_background_runner()
+    try:
+        app.run(host="0.0.0.0", port=port, debug=False)
+    finally:
+        if retrain_runner is not None:
+            stop_background_runner(retrain_runner)
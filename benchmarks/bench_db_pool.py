@@ -0,0 +1,57 @@
+# benchmarks/bench_db_pool.py - Per-request DB latency: pool reused vs. closed on teardown
+"""
+Simulates a request that reads one prediction, under two pool lifecycles:
+
+- teardown: the old behaviour (close_database() after every request, so the
+  next request rebuilds the pool and pays a new connect/auth handshake)
+- persistent: one pool per process, reused across requests
+
+Usage:
+    DATABASE_URL=postgresql://... python benchmarks/bench_db_pool.py --requests 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_dual import db, close_database, get_recent_predictions
+
+def run(n_requests, close_after_request):
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        get_recent_predictions(limit=1)
+        if close_after_request:
+            close_database()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def summarize(label, latencies):
+    print(f"{label:<12} mean {latencies.mean():7.3f} ms | p50 {np.percentile(latencies, 50):7.3f} ms | "
+          f"p95 {np.percentile(latencies, 95):7.3f} ms | p99 {np.percentile(latencies, 99):7.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    db.ensure_pool()
+    run(20, close_after_request=False)  # warm up server-side caches
+
+    teardown = run(args.requests, close_after_request=True)
+    persistent = run(args.requests, close_after_request=False)
+
+    print(f"\n📊 {args.requests} simulated requests each\n")
+    summarize("teardown", teardown)
+    summarize("persistent", persistent)
+    print(f"\n⚡ Mean latency drop: {teardown.mean() - persistent.mean():.3f} ms/request "
+          f"({teardown.mean() / persistent.mean():.1f}x faster)")
+    print(f"   Connections opened (persistent run): {db.pool_metrics()['created']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_feedback_ingest.py - Feedback write paths: per-label statements vs CTE vs bulk
+"""
+Labels N unlabeled predictions each way and reports labels/s:
+
+    three statements  - UPDATE, SELECT prediction, INSERT feedback (the old
+                        update_prediction_feedback)
+    single CTE        - update_prediction_feedback: UPDATE ... RETURNING
+                        feeding the INSERT, one round trip per label
+    bulk              - bulk_update_prediction_feedback: the same CTE for
+                        FEEDBACK_BULK_PAGE_SIZE labels per statement
+
+Writes labels and feedback rows: point DATABASE_URL at a scratch database
+with at least 3 x N unlabeled predictions.
+
+Usage:
+    python benchmarks/bench_feedback_ingest.py --labels 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_dual import db, init_database, update_prediction_feedback, bulk_update_prediction_feedback
+
+def three_statements(prediction_id, actual_class, feedback_note='', confidence_level=3):
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            UPDATE predictions SET actual_class = %s, feedback_received_at = NOW() WHERE id = %s
+        """, (actual_class, prediction_id))
+        cursor.execute("SELECT prediction, fraud_probability FROM predictions WHERE id = %s", (prediction_id,))
+        pred_data = cursor.fetchone()
+        if pred_data:
+            predicted = pred_data['prediction']
+            if predicted == actual_class:
+                feedback_type = 'true_positive' if actual_class == 1 else 'true_negative'
+            else:
+                feedback_type = 'false_positive' if predicted == 1 else 'false_negative'
+            cursor.execute("""
+                INSERT INTO feedback (
+                    prediction_id, actual_class, feedback_type,
+                    feedback_note, confidence_level, feedback_source
+                ) VALUES (%s, %s, %s, %s, %s, %s)
+            """, (prediction_id, actual_class, feedback_type, feedback_note, confidence_level, 'api'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--labels', type=int, default=2000, help="labels per method")
+    args = parser.parse_args()
+
+    if not init_database():
+        sys.exit("❌ DATABASE_URL is required")
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT id FROM predictions WHERE actual_class IS NULL ORDER BY id LIMIT %s", (3 * args.labels,))
+        ids = [row['id'] for row in cursor.fetchall()]
+    if len(ids) < 3 * args.labels:
+        sys.exit(f"❌ Need {3 * args.labels} unlabeled predictions, found {len(ids)}")
+
+    batches = [ids[i * args.labels:(i + 1) * args.labels] for i in range(3)]
+    print(f"{'method':<18}{'labels':>8}{'seconds':>9}{'labels/s':>10}{'ms/label':>10}")
+
+    for name, batch in (('three statements', batches[0]), ('single CTE', batches[1])):
+        write = three_statements if name == 'three statements' else update_prediction_feedback
+        start = time.perf_counter()
+        for prediction_id in batch:
+            write(prediction_id, prediction_id % 2)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<18}{len(batch):>8}{elapsed:>9.2f}{len(batch) / elapsed:>10.0f}{elapsed / len(batch) * 1000:>10.3f}")
+
+    start = time.perf_counter()
+    result = bulk_update_prediction_feedback(
+        [{'prediction_id': i, 'actual_class': i % 2} for i in batches[2]], feedback_source='benchmark'
+    )
+    elapsed = time.perf_counter() - start
+    print(f"{'bulk':<18}{result['recorded']:>8}{elapsed:>9.2f}{result['recorded'] / elapsed:>10.0f}"
+          f"{elapsed / max(result['recorded'], 1) * 1000:>10.3f}")
+
+if __name__ == "__main__":
+    main()
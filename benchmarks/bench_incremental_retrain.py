@@ -0,0 +1,106 @@
+# benchmarks/bench_incremental_retrain.py - Full retrain vs incremental booster update
+"""
+Splits creditcard.csv by Time into history (oldest rows), new feedback and a
+holdout of the newest rows, then compares:
+
+    full         - retrain_credit_card_with_dataset's recipe: 100 fresh trees
+                   on history + feedback (30 raw columns)
+    incremental  - the active booster + INCREMENTAL_ROUNDS trees on feedback +
+                   a replay sample of history (serving features)
+    base         - the active booster unchanged
+
+All three are scored on the same holdout rows. Reports wall time (data prep
+and training) and metric deltas of incremental vs full. No database needed.
+
+Usage:
+    python benchmarks/bench_incremental_retrain.py --dataset data/creditcard.csv --feedback 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from xgboost import XGBClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving.model_registry import DEFAULT_ARTIFACTS
+from retraining.dataset_cache import load_dataset
+from retraining.incremental import (
+    INCREMENTAL_CONFIG, METRIC_NAMES, load_booster_model, booster_feature_names,
+    credit_card_frame, replay_sample, continue_training, evaluate, metric_deltas
+)
+
+def split_by_time(df, feedback_rows, holdout_frac):
+    df = df.sort_values('Time', kind='stable').reset_index(drop=True)
+    n_holdout = int(len(df) * holdout_frac)
+    history_end = len(df) - n_holdout - feedback_rows
+    return df.iloc[:history_end], df.iloc[history_end:len(df) - n_holdout], df.iloc[len(df) - n_holdout:]
+
+def full_retrain(history, feedback):
+    start = time.perf_counter()
+    combined = pd.concat([history, feedback], ignore_index=True)
+    X, y = combined.drop(columns=['Class']), combined['Class']
+    prep = time.perf_counter() - start
+    model = XGBClassifier(
+        n_estimators=100, max_depth=6, learning_rate=0.1,
+        scale_pos_weight=(y == 0).sum() / max((y == 1).sum(), 1),
+        random_state=42, n_jobs=-1, eval_metric='logloss'
+    )
+    start = time.perf_counter()
+    model.fit(X, y, verbose=False)
+    return model, prep, time.perf_counter() - start
+
+def incremental_update(base_model, feature_names, history, feedback, replay_rows):
+    start = time.perf_counter()
+    combined = pd.concat([feedback, replay_sample(history, replay_rows)], ignore_index=True)
+    X, y = credit_card_frame(combined, feature_names), combined['Class'].astype(int)
+    prep = time.perf_counter() - start
+    model, train = continue_training(base_model, X, y)
+    return model, prep, train
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', default=os.path.join('data', 'creditcard.csv'))
+    parser.add_argument('--base-model', default=DEFAULT_ARTIFACTS['credit_card']['model_path'])
+    parser.add_argument('--feedback', type=int, default=2000, help="newest rows before the holdout used as feedback")
+    parser.add_argument('--holdout', type=float, default=0.1, help="fraction of newest rows held out")
+    parser.add_argument('--replay', type=int, default=INCREMENTAL_CONFIG['replay_rows'])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = load_dataset(args.dataset)
+    read_s = time.perf_counter() - start
+    history, feedback, holdout = split_by_time(df, args.feedback, args.holdout)
+    print(f"📊 {len(df):,} rows (read in {read_s:.1f}s): history {len(history):,}, "
+          f"feedback {len(feedback):,}, holdout {len(holdout):,} ({holdout['Class'].mean()*100:.3f}% fraud)")
+
+    base = load_booster_model(args.base_model)
+    feature_names = booster_feature_names(base)
+    holdout_serving = credit_card_frame(holdout, feature_names)
+
+    full, full_prep, full_train = full_retrain(history, feedback)
+    inc, inc_prep, inc_train = incremental_update(base, feature_names, history, feedback, args.replay)
+
+    results = {
+        'base': (evaluate(base, holdout_serving, holdout['Class']), 0.0, 0.0, base.get_booster().num_boosted_rounds()),
+        'full': (evaluate(full, holdout.drop(columns=['Class']), holdout['Class']), full_prep, full_train, 100),
+        'incremental': (evaluate(inc, holdout_serving, holdout['Class']), inc_prep, inc_train,
+                        inc.get_booster().num_boosted_rounds())
+    }
+
+    print(f"\n{'model':<13}{'trees':>7}{'prep s':>9}{'train s':>9}" + "".join(f"{m:>11}" for m in METRIC_NAMES))
+    for name, (metrics, prep, train, trees) in results.items():
+        print(f"{name:<13}{trees:>7}{prep:>9.2f}{train:>9.2f}"
+              + "".join(f"{metrics[m]:>11.4f}" if metrics[m] is not None else f"{'-':>11}" for m in METRIC_NAMES))
+
+    deltas = metric_deltas(results['incremental'][0], results['full'][0])
+    full_s, inc_s = full_prep + full_train + read_s, inc_prep + inc_train + read_s
+    print(f"\n⏱️  Wall time incl. reading the dataset: full {full_s:.1f}s, incremental {inc_s:.1f}s "
+          f"({full_s / inc_s:.1f}x); training only {full_train / inc_train:.1f}x")
+    print("📈 Incremental - full: " + ", ".join(f"{m} {d:+.4f}" for m, d in deltas.items()))
+
+if __name__ == "__main__":
+    main()
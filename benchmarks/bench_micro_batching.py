@@ -0,0 +1,78 @@
+# benchmarks/bench_micro_batching.py - Per-request scoring vs MicroBatcher under concurrency
+"""
+N client threads each score single transactions back to back, either straight
+through ModelBundle.predict_proba or through serving.micro_batcher.MicroBatcher.
+Reports throughput, per-request latency and the batcher's fill rate for a few
+MICRO_BATCH_MAX_ROWS / MICRO_BATCH_MAX_WAIT_MS settings.
+
+Usage:
+    python benchmarks/bench_micro_batching.py --threads 16 --requests 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving.model_registry import load_bundle, DEFAULT_ARTIFACTS
+from serving.micro_batcher import MicroBatcher
+from benchmarks.bench_tree_paths import banking_rows, credit_card_rows
+
+SETTINGS = ((8, 1.0), (32, 2.0), (64, 5.0))
+
+def run(score, rows, n_threads, per_thread):
+    latencies = [[] for _ in range(n_threads)]
+
+    def client(t):
+        for i in range(per_thread):
+            row = rows[(t * per_thread + i) % len(rows)]
+            start = time.perf_counter()
+            score(row)
+            latencies[t].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(t,)) for t in range(n_threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    lat = np.concatenate([np.asarray(l) for l in latencies])
+    return len(lat) / elapsed, np.median(lat), np.percentile(lat, 99)
+
+def bench(model_type, n_threads, per_thread):
+    rng = random.Random(11)
+    bundle = load_bundle(model_type, **DEFAULT_ARTIFACTS[model_type])
+    records = banking_rows(1000, rng) if model_type == 'banking' else credit_card_rows(1000, rng)
+    X = bundle.prepare_many(records)
+    rows = [X[i:i + 1] for i in range(len(X))]
+
+    print(f"\n=== {model_type.upper()} - {n_threads} threads x {per_thread} requests ===")
+    print(f"{'mode':<24}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'fill':>8}{'avg rows':>10}")
+    rps, p50, p99 = run(lambda row: bundle.predict_proba(row), rows, n_threads, per_thread)
+    print(f"{'direct':<24}{rps:>9.0f}{p50:>9.2f}{p99:>9.2f}")
+
+    for max_rows, max_wait_ms in SETTINGS:
+        batcher = MicroBatcher(max_rows=max_rows, max_wait_ms=max_wait_ms)
+        rps, p50, p99 = run(lambda row: batcher.predict(bundle, row), rows, n_threads, per_thread)
+        m = batcher.metrics()
+        label = f"batched {max_rows} rows/{max_wait_ms:g} ms"
+        print(f"{label:<24}{rps:>9.0f}{p50:>9.2f}{p99:>9.2f}{m['fill_rate']:>8.0%}{m['avg_batch_rows']:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help="requests per thread")
+    args = parser.parse_args()
+
+    for model_type in ('banking', 'credit_card'):
+        bench(model_type, args.threads, args.requests)
+
+if __name__ == "__main__":
+    main()
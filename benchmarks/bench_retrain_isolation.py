@@ -0,0 +1,89 @@
+# benchmarks/bench_retrain_isolation.py - Scoring latency while a retrain runs
+"""
+Scores single credit card transactions back to back and reports latency
+while the same credit card retrain runs:
+
+    idle        - nothing else running
+    in-thread   - retrain_credit_card_with_dataset() in a thread of the
+                  serving process (what the retraining routes used to do)
+    worker      - the job run by retraining.worker: spawned child, pinned to
+                  RETRAIN_MAX_THREADS CPUs, nice RETRAIN_NICE, memory-capped
+
+Needs DATABASE_URL (feedback rows, model_versions) and data/creditcard.csv.
+Retrains register and may activate model versions: point it at a scratch
+database.
+
+Usage:
+    python benchmarks/bench_retrain_isolation.py --mode full
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving.model_registry import load_bundle, DEFAULT_ARTIFACTS
+from benchmarks.bench_tree_paths import credit_card_rows
+from database.db_dual import init_database
+
+def score_while(busy, score, rows, min_seconds=2.0):
+    """Score rows until busy() is False (at least min_seconds); per-request ms"""
+    latencies = []
+    start = time.perf_counter()
+    i = 0
+    while busy() or time.perf_counter() - start < min_seconds:
+        row = rows[i % len(rows)]
+        t = time.perf_counter()
+        score(row)
+        latencies.append((time.perf_counter() - t) * 1000)
+        i += 1
+    return np.asarray(latencies), time.perf_counter() - start
+
+def in_thread(mode):
+    from retraining.auto_retrain_dual import retrain_credit_card_with_dataset
+    thread = threading.Thread(target=retrain_credit_card_with_dataset, kwargs={'mode': mode}, daemon=True)
+    thread.start()
+    return thread
+
+def via_worker(mode):
+    from retraining.jobs import ensure_job_table, enqueue_job, claim_next_job
+    from retraining.worker import run_job, WORKER_CONFIG, THREAD_ENV_VARS
+    ensure_job_table()
+    os.environ.update({var: str(WORKER_CONFIG['max_threads']) for var in THREAD_ENV_VARS})
+    enqueue_job('credit_card', mode=mode, trigger='benchmark')
+    job = claim_next_job()
+    thread = threading.Thread(target=run_job, args=(job,), daemon=True)
+    thread.start()
+    return thread
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('incremental', 'full'), default='full')
+    args = parser.parse_args()
+
+    if not init_database():
+        sys.exit("❌ DATABASE_URL is required")
+
+    bundle = load_bundle('credit_card', **DEFAULT_ARTIFACTS['credit_card'])
+    X = bundle.prepare_many(credit_card_rows(1000, random.Random(11)))
+    rows = [X[i:i + 1] for i in range(len(X))]
+    score = bundle.predict_proba
+    for row in rows[:200]:
+        score(row)
+
+    print(f"{'scenario':<12}{'requests':>10}{'seconds':>9}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    scenarios = (('idle', None), ('in-thread', in_thread), ('worker', via_worker))
+    for name, start_retrain in scenarios:
+        thread = start_retrain(args.mode) if start_retrain else None
+        lat, seconds = score_while(lambda: thread is not None and thread.is_alive(), score, rows)
+        print(f"{name:<12}{len(lat):>10,}{seconds:>9.1f}{np.median(lat):>9.2f}"
+              f"{np.percentile(lat, 99):>9.2f}{lat.max():>9.1f}")
+
+if __name__ == "__main__":
+    main()
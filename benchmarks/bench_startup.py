@@ -0,0 +1,70 @@
+# benchmarks/bench_startup.py - Cold start: time until `import app` returns
+"""
+Imports the app in fresh interpreters (what every gunicorn worker without
+preload does) and reports the time until the import returns, with the
+startup phases and the slowest imports from the app's own startup report.
+
+The import report is a diagnostic and off in production; this benchmark
+turns it on (STARTUP_IMPORT_REPORT=true) for its child processes only, and
+with --compare also times runs without it to show the tracking overhead.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --compare
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = (time.perf_counter() - start) * 1000
+sys.__stdout__.write("\\n@@" + json.dumps({'import_ms': elapsed, 'report': app.startup_report.report()}) + "\\n")
+"""
+
+def cold_start(track_imports):
+    """One fresh `import app`: (wall ms including interpreter start, child's report)"""
+    env = dict(os.environ,
+               STARTUP_IMPORT_REPORT='true' if track_imports else 'false',
+               WARMUP_ENABLED='false',
+               RETRAIN_WORKER_AUTOSTART='false')
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD], cwd=REPO_ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    wall_ms = (time.perf_counter() - start) * 1000
+    line = next(l for l in reversed(out.splitlines()) if l.startswith('@@'))
+    return wall_ms, json.loads(line[2:])
+
+def summarize(label, runs):
+    import_ms = [r['import_ms'] for _, r in runs]
+    wall_ms = [w for w, _ in runs]
+    print(f"{label:<22} import app: median {statistics.median(import_ms):7.0f} ms "
+          f"(min {min(import_ms):.0f})   process: median {statistics.median(wall_ms):7.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--compare', action='store_true', help="also time runs with the import report off")
+    args = parser.parse_args()
+
+    tracked = [cold_start(True) for _ in range(args.runs)]
+    summarize("import report on", tracked)
+    if args.compare:
+        summarize("import report off", [cold_start(False) for _ in range(args.runs)])
+
+    report = tracked[-1][1]['report']
+    print("\nPhases (last run): " + " | ".join(f"{k} {v:.0f} ms" for k, v in report['phases_ms'].items()))
+    print(f"Slowest top-level imports ({report['modules_imported']} modules):")
+    for name, ms in report['import_ms'].items():
+        print(f"  {name:<36}{ms:>9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_tree_inference.py - NumPy tree engine vs XGBoost predict_proba
+"""
+Checks that serving.tree_paths.TreeEnsemble reproduces XGBClassifier.predict_proba
+bit-for-bit on the banking and credit card models, then times both paths for
+single rows and small batches (the sizes /api/check-fraud sees).
+
+Usage:
+    python benchmarks/bench_tree_inference.py --rows 5000 --repeats 300
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving.model_registry import load_bundle, DEFAULT_ARTIFACTS
+from serving.tree_paths import TreeEnsemble
+from benchmarks.bench_tree_paths import banking_rows, credit_card_rows
+
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+
+def latencies_us(fn, X, batch, repeats):
+    out = np.empty(repeats)
+    for i in range(repeats):
+        start_row = (i * batch) % (len(X) - batch + 1)
+        rows = X[start_row:start_row + batch]
+        start = time.perf_counter()
+        fn(rows)
+        out[i] = (time.perf_counter() - start) * 1e6
+    return out
+
+def bench(model_type, n_rows, repeats):
+    rng = random.Random(7)
+    bundle = load_bundle(model_type, **DEFAULT_ARTIFACTS[model_type])
+    records = banking_rows(n_rows, rng) if model_type == 'banking' else credit_card_rows(n_rows, rng)
+    X = bundle.prepare_many(records)
+    engine = TreeEnsemble.from_booster(bundle.model, bundle.features)
+
+    xgb_proba = bundle.model.predict_proba(X)[:, 1]
+    np_proba = engine.predict_proba(X)
+    single_match = np.mean([engine.predict_proba(X[i:i + 1])[0] == bundle.model.predict_proba(X[i:i + 1])[0, 1]
+                            for i in range(min(500, n_rows))])
+
+    print(f"\n=== {model_type.upper()} ({engine.n_trees} trees, depth {engine.max_depth}) ===")
+    print(f"Bit-identical probabilities: batch {np.mean(np_proba == xgb_proba):.2%} of {n_rows} rows | "
+          f"single-row {single_match:.2%} | max |diff| {np.abs(np_proba - xgb_proba).max():.1e}")
+
+    xgb_fn = lambda rows: bundle.model.predict_proba(rows)[:, 1]
+    print(f"{'rows':>5} | {'xgboost p50':>12} {'p99':>9} | {'numpy p50':>10} {'p99':>9} | speed-up")
+    for batch in BATCH_SIZES:
+        if batch > n_rows:
+            break
+        xgb_lat = latencies_us(xgb_fn, X, batch, repeats)
+        np_lat = latencies_us(engine.predict_proba, X, batch, repeats)
+        print(f"{batch:>5} | {np.median(xgb_lat):>9.0f} us {np.percentile(xgb_lat, 99):>6.0f} us | "
+              f"{np.median(np_lat):>7.0f} us {np.percentile(np_lat, 99):>6.0f} us | "
+              f"{np.median(xgb_lat) / np.median(np_lat):>6.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeats', type=int, default=300)
+    args = parser.parse_args()
+
+    for model_type in ('banking', 'credit_card'):
+        bench(model_type, args.rows, args.repeats)
+    print("\nTREE_INFERENCE_MAX_ROWS should sit below the batch size where the speed-up drops under 1x.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_tree_paths.py - Tree path index vs shap.TreeExplainer
+"""
+For the banking and credit card boosters, compares Saabas contributions from
+serving.tree_paths.TreeEnsemble against TreeSHAP (shap.TreeExplainer):
+
+- latency: one row at a time (request path) and whole-batch throughput
+- agreement: top-5 feature overlap, top-1 match, sign agreement on the
+  top-5 and Spearman rank correlation of |contribution| per row
+- exactness: index contributions vs XGBoost's own Saabas (approx_contribs)
+  and additivity (contributions + bias == margin)
+
+Usage:
+    python benchmarks/bench_tree_paths.py --rows 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import xgboost as xgb
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serving.model_registry import load_bundle, DEFAULT_ARTIFACTS
+from serving.tree_paths import TreeEnsemble
+from serving.attribution import top_k_by_magnitude
+
+TOP_K = 5
+
+def banking_rows(n, rng):
+    """Synthetic raw banking transactions (same shape as API payloads)"""
+    types = ["Online", "ATM", "POS", "Transfer"]
+    return [{
+        "Transaction_Amount": rng.uniform(1, 9000),
+        "Account_Balance": rng.uniform(0, 20000),
+        "Timestamp": f"2023-10-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+        "Transaction_Type": rng.choice(types),
+        "Daily_Transaction_Count": rng.randint(0, 20),
+        "Avg_Transaction_Amount_7d": rng.uniform(10, 3000),
+        "Failed_Transaction_Count_7d": rng.randint(0, 6),
+        "Card_Age": rng.randint(1, 700),
+        "Transaction_Distance": rng.uniform(0, 6000),
+        "IP_Address_Flag": rng.randint(0, 1)
+    } for _ in range(n)]
+
+def credit_card_rows(n, rng):
+    return [{
+        "Time": rng.uniform(0, 172800),
+        "Amount": rng.expovariate(1 / 90),
+        **{f"V{i}": rng.gauss(0, 1.5) for i in range(1, 29)}
+    } for _ in range(n)]
+
+def spearman_rows(a, b):
+    """Row-wise Spearman correlation between two (n, F) matrices"""
+    ra = np.argsort(np.argsort(a, axis=1), axis=1).astype(np.float64)
+    rb = np.argsort(np.argsort(b, axis=1), axis=1).astype(np.float64)
+    ra -= ra.mean(axis=1, keepdims=True)
+    rb -= rb.mean(axis=1, keepdims=True)
+    return (ra * rb).sum(axis=1) / np.sqrt((ra ** 2).sum(axis=1) * (rb ** 2).sum(axis=1))
+
+def per_row_us(fn, X, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(X[i:i + 1])
+    return (time.perf_counter() - start) / repeats * 1e6
+
+def bench(model_type, n_rows, single_repeats, shap_module):
+    rng = random.Random(42)
+    bundle = load_bundle(model_type, **DEFAULT_ARTIFACTS[model_type])
+    records = banking_rows(n_rows, rng) if model_type == 'banking' else credit_card_rows(n_rows, rng)
+    X = bundle.prepare_many(records)
+    booster = bundle.model.get_booster()
+
+    start = time.perf_counter()
+    index = TreeEnsemble.from_booster(bundle.model, bundle.features)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n=== {model_type.upper()} ({index.n_trees} trees, depth {index.max_depth}, "
+          f"{len(bundle.features)} features) ===")
+    print(f"Index build: {build_ms:.1f} ms")
+
+    start = time.perf_counter()
+    saabas = index.contributions(X)
+    batch_us = (time.perf_counter() - start) / n_rows * 1e6
+    single_us = per_row_us(index.contributions, X, single_repeats)
+
+    dmatrix = xgb.DMatrix(X, feature_names=booster.feature_names)
+    reference = booster.predict(dmatrix, pred_contribs=True, approx_contribs=True)[:, :-1]
+    margin = booster.predict(dmatrix, output_margin=True)
+    print(f"Exactness vs XGBoost Saabas: max |diff| {np.abs(saabas - reference).max():.2e}; "
+          f"additivity max |diff| {np.abs(saabas.sum(axis=1) + index.bias - margin).max():.2e}")
+
+    print(f"{'':<22}{'single row':>14}{'batch / row':>14}")
+    print(f"{'path index':<22}{single_us:>11.1f} us{batch_us:>11.1f} us")
+
+    if shap_module is None:
+        print("shap not installed - skipping TreeSHAP comparison")
+        return
+
+    explainer = shap_module.TreeExplainer(bundle.model)
+    start = time.perf_counter()
+    shap_values = np.asarray(explainer.shap_values(X))
+    shap_batch_us = (time.perf_counter() - start) / n_rows * 1e6
+    shap_single_us = per_row_us(explainer.shap_values, X, min(single_repeats, 200))
+    print(f"{'shap.TreeExplainer':<22}{shap_single_us:>11.1f} us{shap_batch_us:>11.1f} us")
+    print(f"Speed-up (single row): {shap_single_us / single_us:.1f}x")
+
+    top_index = top_k_by_magnitude(saabas, TOP_K)
+    top_shap = top_k_by_magnitude(shap_values, TOP_K)
+    overlap = np.mean([len(set(a) & set(b)) / TOP_K for a, b in zip(top_index, top_shap)])
+    top1 = np.mean(top_index[:, 0] == top_shap[:, 0])
+    signs = np.mean(np.sign(np.take_along_axis(saabas, top_shap, axis=1)) ==
+                    np.sign(np.take_along_axis(shap_values, top_shap, axis=1)))
+    rho = spearman_rows(np.abs(saabas), np.abs(shap_values))
+    print(f"Agreement with TreeSHAP: top-{TOP_K} overlap {overlap:.1%} | top-1 match {top1:.1%} | "
+          f"sign agreement (SHAP top-{TOP_K}) {signs:.1%} | Spearman |contrib| median {np.median(rho):.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--single', type=int, default=500, help="rows timed one at a time")
+    args = parser.parse_args()
+
+    try:
+        import shap
+    except ImportError:
+        shap = None
+
+    for model_type in ('banking', 'credit_card'):
+        bench(model_type, args.rows, min(args.single, args.rows), shap)
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,19 @@ Supports both Railway (DATABASE_URL) and local development (DB_HOST, etc.)
 """
 
 import psycopg2
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from contextlib import contextmanager
 from decimal import Decimal
 from datetime import datetime
+import atexit
 import json
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+from database.pool import BlockingConnectionPool
+
 load_dotenv()
 
 # ============================================
@@ -39,6 +43,7 @@ class Database:
     
     def __init__(self):
         self.connection_pool = None
+        self._pool_lock = threading.Lock()
         
         # Check if DATABASE_URL exists (Railway/Production)
         database_url = os.getenv('DATABASE_URL')
@@ -66,25 +71,19 @@ class Database:
             print(f"🔧 DB Config: {self.config['user']}@{self.config['host']}:{self.config['port']}/{self.config['database']}")
             self.use_dsn = False
     
-    def initialize_pool(self, minconn=1, maxconn=20):
-        """Initialize connection pool"""
+    def initialize_pool(self, minconn=None, maxconn=None):
+        """Initialize connection pool (blocking, thread-safe; sizes default to DB_POOL_MIN/MAX)"""
         try:
-            if self.connection_pool is not None:
+            if self.connection_pool is not None and self.connection_pool.pid == os.getpid():
                 try:
                     self.connection_pool.closeall()
                 except:
                     pass
             
-            if self.use_dsn:
-                # Railway: Use DATABASE_URL
-                self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                    minconn, maxconn, **self.config
-                )
-            else:
-                # Local: Use individual parameters
-                self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                    minconn, maxconn, **self.config
-                )
+            # Same kwargs either way: {'dsn': DATABASE_URL} on Railway, individual params locally
+            self.connection_pool = BlockingConnectionPool(
+                minconn, maxconn, **self.config
+            )
             
             print("✅ Database connection pool created")
             return True
@@ -94,21 +93,32 @@ class Database:
             return False
     
     def ensure_pool(self):
-        """Ensure connection pool exists"""
-        if self.connection_pool is None or self.connection_pool.closed:
-            self.initialize_pool()
+        """Ensure this process has an open pool (one per worker, created after fork)"""
+        current = self.connection_pool
+        if current is not None and not current.closed and current.pid == os.getpid():
+            return
+        with self._pool_lock:
+            current = self.connection_pool
+            if current is not None and current.pid != os.getpid():
+                # Inherited across fork: those sockets belong to the parent's sessions,
+                # so drop the reference without closing them
+                self.connection_pool = None
+            if self.connection_pool is None or self.connection_pool.closed:
+                self.initialize_pool()
     
     @contextmanager
     def get_connection(self):
         """Get connection from pool"""
         self.ensure_pool()
+        # Returned to the pool it came from, even if initialize_pool() replaced it meanwhile
+        pool = self.connection_pool
         conn = None
         try:
-            conn = self.connection_pool.getconn()
+            conn = pool.getconn()
             yield conn
         finally:
             if conn:
-                self.connection_pool.putconn(conn)
+                pool.putconn(conn)
     
     @contextmanager
     def get_cursor(self):
@@ -129,6 +139,12 @@ class Database:
         if self.connection_pool:
             self.connection_pool.closeall()
             print("✅ All database connections closed")
+    
+    def pool_metrics(self):
+        """Live pool metrics (in-use, idle, wait times, checkout latency histogram)"""
+        if self.connection_pool is None:
+            return {'initialized': False}
+        return self.connection_pool.metrics()
 
 # Global database instance
 db = Database()
@@ -136,140 +152,134 @@ db = Database()
 # ============================================
 # SAVE PREDICTION (DUAL MODE)
 # ============================================
+# Every column a prediction row can fill (banking and credit card share one table;
+# columns of the other mode are left NULL)
+PREDICTION_COLUMNS = [
+    'model_type', 'amount', 'transaction_time',
+    'transaction_datetime', 'transaction_date', 'transaction_hour',
+    'account_balance', 'transaction_type', 'daily_transaction_count',
+    'avg_transaction_amount_7d', 'failed_transaction_count_7d',
+    'card_age', 'transaction_distance', 'ip_address_flag',
+    *[f'v{i}' for i in range(1, 29)],
+    'prediction', 'fraud_probability', 'risk_level', 'threshold_used',
+    'top_features', 'ai_explanation', 'ai_provider',
+    'model_version_id', 'api_endpoint', 'request_ip'
+]
+
+def build_prediction_row(prediction_data, model_version_id):
+    """
+    Convert API prediction data into a predictions row (dict keyed by PREDICTION_COLUMNS)
+    """
+    model_type = prediction_data.get('mode', 'banking')
+    row = dict.fromkeys(PREDICTION_COLUMNS)
+    
+    # Common fields
+    row.update({
+        'model_type': model_type,
+        'prediction': prediction_data.get('prediction', 0),
+        'fraud_probability': float(prediction_data.get('fraud_probability', 0)),
+        'risk_level': prediction_data.get('risk_level', 'UNKNOWN'),
+        'threshold_used': float(prediction_data.get('threshold_used', 0.5)),
+        'top_features': json.dumps(prediction_data.get('top_features', [])),
+        'ai_explanation': prediction_data.get('ai_explanation', ''),
+        'ai_provider': prediction_data.get('ai_provider', 'fallback'),
+        'model_version_id': model_version_id,
+        'api_endpoint': prediction_data.get('api_endpoint', '/api/check-fraud'),
+        'request_ip': prediction_data.get('request_ip', 'unknown')
+    })
+    
+    if model_type == 'banking':
+        # BANKING MODE
+        # Parse timestamp
+        timestamp_str = prediction_data.get('Timestamp', '')
+        try:
+            transaction_datetime = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
+        except:
+            transaction_datetime = datetime.now()
+        
+        row.update({
+            'amount': float(prediction_data.get('Transaction_Amount', 0)),
+            'transaction_datetime': transaction_datetime,
+            'transaction_date': transaction_datetime.date(),
+            'transaction_hour': transaction_datetime.hour,
+            'account_balance': float(prediction_data.get('Account_Balance', 0)),
+            'transaction_type': prediction_data.get('Transaction_Type', 'POS'),
+            'daily_transaction_count': int(prediction_data.get('Daily_Transaction_Count', 0)),
+            'avg_transaction_amount_7d': float(prediction_data.get('Avg_Transaction_Amount_7d', 0)),
+            'failed_transaction_count_7d': int(prediction_data.get('Failed_Transaction_Count_7d', 0)),
+            'card_age': int(prediction_data.get('Card_Age', 0)),
+            'transaction_distance': float(prediction_data.get('Transaction_Distance', 0)),
+            'ip_address_flag': int(prediction_data.get('IP_Address_Flag', 0))
+        })
+    else:
+        # CREDIT CARD MODE
+        row['amount'] = float(prediction_data.get('Amount', 0))
+        row['transaction_time'] = int(prediction_data.get('Time', 0))
+        
+        # Extract V1-V28
+        for i in range(1, 29):
+            row[f'v{i}'] = float(prediction_data.get(f'V{i}', 0))
+    
+    return row
+
+# ============================================
+# ACTIVE MODEL VERSION CACHE
+# ============================================
+# model_type -> (model_versions.id, fetched_at). Refreshed on TTL expiry or when
+# retraining / the model registry reports an activation.
+ACTIVE_VERSION_TTL = float(os.getenv('ACTIVE_VERSION_TTL', 60))
+_active_version_cache = {}
+_active_version_lock = threading.Lock()
+
+def get_active_model_version_id(cursor, model_type):
+    """Active model_versions.id for model_type (1 if none is active), cached"""
+    cached = _active_version_cache.get(model_type)
+    if cached and time.time() - cached[1] < ACTIVE_VERSION_TTL:
+        return cached[0]
+    
+    cursor.execute("""
+        SELECT id FROM model_versions 
+        WHERE model_type = %s AND is_active = true 
+        LIMIT 1
+    """, (model_type,))
+    
+    model_version = cursor.fetchone()
+    version_id = model_version['id'] if model_version else 1
+    
+    with _active_version_lock:
+        _active_version_cache[model_type] = (version_id, time.time())
+    return version_id
+
+def invalidate_active_model_version(model_type=None):
+    """Drop the cached active version id (all model types if model_type is None)"""
+    with _active_version_lock:
+        if model_type is None:
+            _active_version_cache.clear()
+        else:
+            _active_version_cache.pop(model_type, None)
+
+INSERT_PREDICTION_SQL = """
+    INSERT INTO predictions ({columns})
+    VALUES ({values})
+    RETURNING id
+""".format(
+    columns=', '.join(PREDICTION_COLUMNS),
+    values=', '.join(f'%({c})s' for c in PREDICTION_COLUMNS)
+)
+
 def save_prediction_to_db(prediction_data):
     """
     Save prediction to database (supports both banking and credit card)
     """
     try:
         with db.get_cursor() as cursor:
-            # Get model type
             model_type = prediction_data.get('mode', 'banking')
+            model_version_id = get_active_model_version_id(cursor, model_type)
             
-            # Get active model version
-            cursor.execute("""
-                SELECT id FROM model_versions 
-                WHERE model_type = %s AND is_active = true 
-                LIMIT 1
-            """, (model_type,))
-            
-            model_version = cursor.fetchone()
-            model_version_id = model_version['id'] if model_version else 1
-            
-            # Common fields
-            common_data = {
-                'model_type': model_type,
-                'prediction': prediction_data.get('prediction', 0),
-                'fraud_probability': float(prediction_data.get('fraud_probability', 0)),
-                'risk_level': prediction_data.get('risk_level', 'UNKNOWN'),
-                'threshold_used': float(prediction_data.get('threshold_used', 0.5)),
-                'top_features': json.dumps(prediction_data.get('top_features', [])),
-                'ai_explanation': prediction_data.get('ai_explanation', ''),
-                'ai_provider': prediction_data.get('ai_provider', 'fallback'),
-                'model_version_id': model_version_id,
-                'api_endpoint': prediction_data.get('api_endpoint', '/api/check-fraud'),
-                'request_ip': prediction_data.get('request_ip', 'unknown')
-            }
-            
-            if model_type == 'banking':
-                # BANKING MODE
-                amount = float(prediction_data.get('Transaction_Amount', 0))
-                
-                # Parse timestamp
-                timestamp_str = prediction_data.get('Timestamp', '')
-                try:
-                    dt = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                    transaction_datetime = dt
-                    transaction_date = dt.date()
-                    transaction_hour = dt.hour
-                except:
-                    transaction_datetime = datetime.now()
-                    transaction_date = transaction_datetime.date()
-                    transaction_hour = transaction_datetime.hour
-                
-                # Banking specific fields
-                banking_data = {
-                    'amount': amount,
-                    'transaction_datetime': transaction_datetime,
-                    'transaction_date': transaction_date,
-                    'transaction_hour': transaction_hour,
-                    'account_balance': float(prediction_data.get('Account_Balance', 0)),
-                    'transaction_type': prediction_data.get('Transaction_Type', 'POS'),
-                    'daily_transaction_count': int(prediction_data.get('Daily_Transaction_Count', 0)),
-                    'avg_transaction_amount_7d': float(prediction_data.get('Avg_Transaction_Amount_7d', 0)),
-                    'failed_transaction_count_7d': int(prediction_data.get('Failed_Transaction_Count_7d', 0)),
-                    'card_age': int(prediction_data.get('Card_Age', 0)),
-                    'transaction_distance': float(prediction_data.get('Transaction_Distance', 0)),
-                    'ip_address_flag': int(prediction_data.get('IP_Address_Flag', 0))
-                }
-                
-                # Merge with common data
-                insert_data = {**common_data, **banking_data}
-                
-                # Insert query for banking
-                query = """
-                    INSERT INTO predictions (
-                        model_type, amount, transaction_datetime, transaction_date, transaction_hour,
-                        account_balance, transaction_type, daily_transaction_count,
-                        avg_transaction_amount_7d, failed_transaction_count_7d,
-                        card_age, transaction_distance, ip_address_flag,
-                        prediction, fraud_probability, risk_level, threshold_used,
-                        top_features, ai_explanation, ai_provider,
-                        model_version_id, api_endpoint, request_ip
-                    ) VALUES (
-                        %(model_type)s, %(amount)s, %(transaction_datetime)s, %(transaction_date)s, %(transaction_hour)s,
-                        %(account_balance)s, %(transaction_type)s, %(daily_transaction_count)s,
-                        %(avg_transaction_amount_7d)s, %(failed_transaction_count_7d)s,
-                        %(card_age)s, %(transaction_distance)s, %(ip_address_flag)s,
-                        %(prediction)s, %(fraud_probability)s, %(risk_level)s, %(threshold_used)s,
-                        %(top_features)s, %(ai_explanation)s, %(ai_provider)s,
-                        %(model_version_id)s, %(api_endpoint)s, %(request_ip)s
-                    ) RETURNING id
-                """
-                
-            else:
-                # CREDIT CARD MODE
-                amount = float(prediction_data.get('Amount', 0))
-                transaction_time = int(prediction_data.get('Time', 0))
-                
-                # Extract V1-V28
-                v_features = {}
-                for i in range(1, 29):
-                    v_key = f'V{i}'
-                    v_features[f'v{i}'] = float(prediction_data.get(v_key, 0))
-                
-                # Credit card specific fields
-                cc_data = {
-                    'amount': amount,
-                    'transaction_time': transaction_time,
-                    **v_features
-                }
-                
-                # Merge with common data
-                insert_data = {**common_data, **cc_data}
-                
-                # Insert query for credit card
-                query = """
-                    INSERT INTO predictions (
-                        model_type, amount, transaction_time,
-                        v1, v2, v3, v4, v5, v6, v7, v8, v9, v10,
-                        v11, v12, v13, v14, v15, v16, v17, v18, v19, v20,
-                        v21, v22, v23, v24, v25, v26, v27, v28,
-                        prediction, fraud_probability, risk_level, threshold_used,
-                        top_features, ai_explanation, ai_provider,
-                        model_version_id, api_endpoint, request_ip
-                    ) VALUES (
-                        %(model_type)s, %(amount)s, %(transaction_time)s,
-                        %(v1)s, %(v2)s, %(v3)s, %(v4)s, %(v5)s, %(v6)s, %(v7)s, %(v8)s, %(v9)s, %(v10)s,
-                        %(v11)s, %(v12)s, %(v13)s, %(v14)s, %(v15)s, %(v16)s, %(v17)s, %(v18)s, %(v19)s, %(v20)s,
-                        %(v21)s, %(v22)s, %(v23)s, %(v24)s, %(v25)s, %(v26)s, %(v27)s, %(v28)s,
-                        %(prediction)s, %(fraud_probability)s, %(risk_level)s, %(threshold_used)s,
-                        %(top_features)s, %(ai_explanation)s, %(ai_provider)s,
-                        %(model_version_id)s, %(api_endpoint)s, %(request_ip)s
-                    ) RETURNING id
-                """
+            insert_data = build_prediction_row(prediction_data, model_version_id)
             
             # Execute insert
-            cursor.execute(query, insert_data)
+            cursor.execute(INSERT_PREDICTION_SQL, insert_data)
             prediction_id = cursor.fetchone()['id']
             
             print(f"✅ Prediction saved: ID {prediction_id} ({model_type} mode)")
@@ -304,6 +314,20 @@ def get_prediction_by_id(prediction_id):
         print(f"❌ Error fetching prediction: {e}")
         return None
 
+def update_prediction_explanation(prediction_id, ai_explanation, ai_provider):
+    """Store an explanation generated after the prediction was saved"""
+    try:
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE predictions
+                SET ai_explanation = %s, ai_provider = %s
+                WHERE id = %s
+            """, (ai_explanation, ai_provider, prediction_id))
+            return cursor.rowcount > 0
+    except Exception as e:
+        print(f"❌ Error saving explanation: {e}")
+        return False
+
 def get_recent_predictions(limit=50, model_type=None):
     """Get recent predictions"""
     try:
@@ -337,45 +361,168 @@ def get_recent_predictions(limit=50, model_type=None):
 # ============================================
 # FEEDBACK MANAGEMENT
 # ============================================
+# Same classification the feedback route used to do in Python, over the updated row "u"
+FEEDBACK_TYPE_SQL = """
+    CASE WHEN u.prediction = u.actual_class
+         THEN CASE WHEN u.actual_class = 1 THEN 'true_positive' ELSE 'true_negative' END
+         ELSE CASE WHEN u.prediction = 1 THEN 'false_positive' ELSE 'false_negative' END
+    END
+"""
+
+# One round trip: label the prediction and log the feedback row from its RETURNING
+FEEDBACK_SQL = f"""
+    WITH u AS (
+        UPDATE predictions
+        SET actual_class = %(actual_class)s, feedback_received_at = NOW()
+        WHERE id = %(prediction_id)s
+        RETURNING id, prediction, actual_class
+    )
+    INSERT INTO feedback (
+        prediction_id, actual_class, feedback_type,
+        feedback_note, confidence_level, feedback_source
+    )
+    SELECT u.id, u.actual_class, {FEEDBACK_TYPE_SQL},
+           %(feedback_note)s, %(confidence_level)s, %(feedback_source)s
+    FROM u
+    RETURNING feedback_type
+"""
+
+# Same statement for a page of labels (execute_values fills VALUES %s)
+FEEDBACK_BULK_SQL = f"""
+    WITH incoming (prediction_id, actual_class, feedback_note, confidence_level, feedback_source) AS (
+        VALUES %s
+    ),
+    u AS (
+        UPDATE predictions p
+        SET actual_class = i.actual_class, feedback_received_at = NOW()
+        FROM incoming i
+        WHERE p.id = i.prediction_id
+        RETURNING p.id, p.prediction, p.actual_class, i.feedback_note, i.confidence_level, i.feedback_source
+    )
+    INSERT INTO feedback (
+        prediction_id, actual_class, feedback_type,
+        feedback_note, confidence_level, feedback_source
+    )
+    SELECT u.id, u.actual_class, {FEEDBACK_TYPE_SQL},
+           u.feedback_note, u.confidence_level, u.feedback_source
+    FROM u
+    RETURNING prediction_id, feedback_type
+"""
+FEEDBACK_BULK_TEMPLATE = "(%s::integer, %s::integer, %s::text, %s::integer, %s::varchar)"
+
+FEEDBACK_BULK_CONFIG = {
+    'page_size': int(os.getenv('FEEDBACK_BULK_PAGE_SIZE', 1000))   # labels per statement
+}
+
 def update_prediction_feedback(prediction_id, actual_class, feedback_note='', confidence_level=3):
-    """Update prediction with feedback"""
+    """
+    Update prediction with feedback (single statement)
+
+    Returns:
+        True if recorded, None if no prediction has that id (yet), False on error
+    """
     try:
         with db.get_cursor() as cursor:
-            cursor.execute("""
-                UPDATE predictions 
-                SET actual_class = %s, feedback_received_at = NOW()
-                WHERE id = %s
-            """, (actual_class, prediction_id))
-            
-            cursor.execute("""
-                SELECT prediction, fraud_probability 
-                FROM predictions 
-                WHERE id = %s
-            """, (prediction_id,))
-            pred_data = cursor.fetchone()
-            
-            if pred_data:
-                predicted = pred_data['prediction']
-                
-                if predicted == actual_class:
-                    feedback_type = 'true_positive' if actual_class == 1 else 'true_negative'
-                else:
-                    feedback_type = 'false_positive' if predicted == 1 else 'false_negative'
-                
-                cursor.execute("""
-                    INSERT INTO feedback (
-                        prediction_id, actual_class, feedback_type, 
-                        feedback_note, confidence_level, feedback_source
-                    ) VALUES (%s, %s, %s, %s, %s, %s)
-                """, (prediction_id, actual_class, feedback_type, feedback_note, confidence_level, 'api'))
-                
-                print(f"✅ Feedback recorded: ID {prediction_id}, Type: {feedback_type}")
+            cursor.execute(FEEDBACK_SQL, {
+                'prediction_id': prediction_id,
+                'actual_class': actual_class,
+                'feedback_note': feedback_note,
+                'confidence_level': confidence_level,
+                'feedback_source': 'api'
+            })
+            row = cursor.fetchone()
+            if row is None:
+                return None
             
+            print(f"✅ Feedback recorded: ID {prediction_id}, Type: {row['feedback_type']}")
             return True
     except Exception as e:
         print(f"❌ Error updating feedback: {e}")
         return False
 
+def allocated_prediction_ids(prediction_ids):
+    """
+    The ids the predictions sequence has already handed out.
+
+    With write-behind a prediction id is returned to the client before its
+    row is inserted, so an allocated id missing from the table may still be
+    buffered by some worker; any other missing id does not exist.
+    """
+    if not prediction_ids:
+        return []
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT COALESCE(pg_sequence_last_value(pg_get_serial_sequence('predictions', 'id')), 0) AS last_id
+        """)
+        last_id = cursor.fetchone()['last_id']
+    return [prediction_id for prediction_id in prediction_ids if 0 < prediction_id <= last_id]
+
+def _validate_label(label):
+    """Normalized (prediction_id, actual_class, note, confidence) or raises ValueError"""
+    try:
+        prediction_id = int(label['prediction_id'])
+        actual_class = int(label['actual_class'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("prediction_id and actual_class must be integers")
+    if actual_class not in (0, 1):
+        raise ValueError("actual_class must be 0 (normal) or 1 (fraud)")
+    confidence = label.get('confidence_level')
+    confidence = 3 if confidence in (None, '') else int(confidence)
+    if not 1 <= confidence <= 5:
+        raise ValueError("confidence_level must be between 1 and 5")
+    note = label.get('feedback_note')
+    return prediction_id, actual_class, '' if note is None else str(note), confidence
+
+def bulk_update_prediction_feedback(labels, feedback_source='bulk_import', page_size=None):
+    """
+    Record many labels at once (chargeback imports, analyst batches).
+
+    labels: iterable of dicts with prediction_id, actual_class and optional
+    feedback_note / confidence_level. Invalid rows are skipped and reported;
+    a prediction_id given twice keeps its last label. Valid rows are written
+    in one transaction, page_size labels per UPDATE ... RETURNING -> INSERT
+    statement.
+
+    Returns:
+        {'received', 'recorded', 'duplicates', 'not_found': [ids],
+         'invalid': [{'index', 'error'}], 'by_type': {feedback_type: n}}
+    """
+    page_size = page_size or FEEDBACK_BULK_CONFIG['page_size']
+    rows, invalid, received = {}, [], 0
+    for index, label in enumerate(labels):
+        received += 1
+        try:
+            prediction_id, actual_class, note, confidence = _validate_label(label)
+        except (ValueError, TypeError, AttributeError) as e:
+            invalid.append({'index': index, 'error': str(e)})
+            continue
+        rows.pop(prediction_id, None)   # re-insert so the last label keeps its order
+        rows[prediction_id] = (prediction_id, actual_class, note, confidence, feedback_source)
+
+    result = {
+        'received': received,
+        'recorded': 0,
+        'duplicates': received - len(invalid) - len(rows),
+        'not_found': [],
+        'invalid': invalid,
+        'by_type': {}
+    }
+    if not rows:
+        return result
+
+    with db.get_cursor() as cursor:
+        written = execute_values(
+            cursor, FEEDBACK_BULK_SQL, list(rows.values()),
+            template=FEEDBACK_BULK_TEMPLATE, page_size=page_size, fetch=True
+        )
+    found = set()
+    for row in written:
+        found.add(row['prediction_id'])
+        result['by_type'][row['feedback_type']] = result['by_type'].get(row['feedback_type'], 0) + 1
+    result['recorded'] = len(written)
+    result['not_found'] = [prediction_id for prediction_id in rows if prediction_id not in found]
+    return result
+
 def get_feedback_count(model_type=None, days=30):
     """Get feedback count"""
     try:
@@ -402,9 +549,169 @@ def get_feedback_count(model_type=None, days=30):
         print(f"❌ Error getting feedback count: {e}")
         return 0
 
-def get_feedback_data_for_retraining(model_type, limit=None):
-    """Get feedback data for model retraining"""
+# ============================================
+# FEEDBACK COUNTERS / RETRAIN WATERMARKS
+# ============================================
+# Same objects as schema_dual.sql, for databases created before them
+FEEDBACK_COUNTERS_DDL = """
+    CREATE TABLE IF NOT EXISTS feedback_counters (
+        model_type VARCHAR(20) PRIMARY KEY CHECK (model_type IN ('banking', 'credit_card')),
+        labels_received BIGINT NOT NULL DEFAULT 0,
+        last_trigger_count BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    ALTER TABLE model_versions ADD COLUMN IF NOT EXISTS feedback_watermark BIGINT;
+
+    CREATE OR REPLACE FUNCTION count_prediction_labels()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        -- Statement-level: one counter upsert per statement, however many rows it labels
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO feedback_counters AS c (model_type, labels_received)
+            SELECT model_type, COUNT(*) FROM new_rows
+            WHERE actual_class IS NOT NULL
+            GROUP BY model_type
+            ON CONFLICT (model_type) DO UPDATE SET
+                labels_received = c.labels_received + EXCLUDED.labels_received,
+                updated_at = CURRENT_TIMESTAMP;
+        ELSE
+            INSERT INTO feedback_counters AS c (model_type, labels_received)
+            SELECT n.model_type, COUNT(*) FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE o.actual_class IS NULL AND n.actual_class IS NOT NULL
+            GROUP BY n.model_type
+            ON CONFLICT (model_type) DO UPDATE SET
+                labels_received = c.labels_received + EXCLUDED.labels_received,
+                updated_at = CURRENT_TIMESTAMP;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS trigger_count_label_insert ON predictions;
+    CREATE TRIGGER trigger_count_label_insert
+    AFTER INSERT ON predictions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_prediction_labels();
+
+    DROP TRIGGER IF EXISTS trigger_count_label_update ON predictions;
+    CREATE TRIGGER trigger_count_label_update
+    AFTER UPDATE ON predictions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_prediction_labels();
+
+    CREATE OR REPLACE FUNCTION set_feedback_watermark()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        IF NEW.feedback_watermark IS NULL THEN
+            SELECT labels_received INTO NEW.feedback_watermark
+            FROM feedback_counters WHERE model_type = NEW.model_type;
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS trigger_feedback_watermark ON model_versions;
+    CREATE TRIGGER trigger_feedback_watermark
+    BEFORE INSERT ON model_versions
+    FOR EACH ROW
+    EXECUTE FUNCTION set_feedback_watermark();
+"""
+
+FEEDBACK_COUNTERS_LOCK_KEY = 727002
+
+def ensure_feedback_counters():
+    """
+    Install feedback_counters and its triggers if this database predates them.
+
+    Backfills once, in the transaction that creates the triggers (which locks
+    predictions against concurrent labels, so the count is exact): current
+    labeled rows, and each existing version's watermark from the labels
+    received before it was created.
+    """
+    try:
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT to_regclass('feedback_counters') IS NOT NULL AS ready")
+            if cursor.fetchone()['ready']:
+                return True
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (FEEDBACK_COUNTERS_LOCK_KEY,))
+            cursor.execute("SELECT to_regclass('feedback_counters') IS NOT NULL AS ready")
+            if cursor.fetchone()['ready']:
+                return True   # another worker installed it while we waited
+
+            print("⚙️  Installing feedback counters...")
+            cursor.execute(FEEDBACK_COUNTERS_DDL)
+            cursor.execute("""
+                INSERT INTO feedback_counters (model_type, labels_received, last_trigger_count)
+                SELECT m.model_type, COUNT(p.id), COUNT(p.id)
+                FROM (VALUES ('banking'), ('credit_card')) AS m(model_type)
+                LEFT JOIN predictions p ON p.model_type = m.model_type AND p.actual_class IS NOT NULL
+                GROUP BY m.model_type
+                ON CONFLICT (model_type) DO NOTHING
+            """)
+            cursor.execute("""
+                UPDATE model_versions mv SET feedback_watermark = (
+                    SELECT COUNT(*) FROM predictions p
+                    WHERE p.model_type = mv.model_type
+                      AND p.actual_class IS NOT NULL
+                      AND p.feedback_received_at <= mv.created_at
+                )
+                WHERE feedback_watermark IS NULL
+            """)
+            print("✅ Feedback counters installed")
+            return True
+    except Exception as e:
+        print(f"❌ Error installing feedback counters: {e}")
+        return False
+
+def get_retrain_watermarks():
+    """
+    Labels received per model type vs. its retrain watermark (two indexed rows, no scan).
+
+    The watermark is the later of the active version's feedback_watermark and
+    the count the last succeeded auto-retrain job was queued at (see
+    retraining.jobs.finish_job).
+
+    Returns:
+        {model_type: {'feedback_count', 'watermark', 'new_feedback', 'active_version'}}
+    """
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT c.model_type, c.labels_received, c.last_trigger_count,
+                   mv.version, COALESCE(mv.feedback_watermark, 0) AS version_watermark
+            FROM feedback_counters c
+            LEFT JOIN model_versions mv ON mv.model_type = c.model_type AND mv.is_active = TRUE
+            ORDER BY mv.created_at
+        """)
+        watermarks = {}
+        for row in cursor.fetchall():
+            watermark = max(row['version_watermark'], row['last_trigger_count'])
+            watermarks[row['model_type']] = {
+                'feedback_count': row['labels_received'],
+                'watermark': watermark,
+                'new_feedback': max(row['labels_received'] - watermark, 0),
+                'active_version': row['version']
+            }
+        return watermarks
+
+def get_feedback_data_for_retraining(model_type, limit=None, since=None, before=None):
+    """
+    Get feedback data for model retraining
+
+    since / before: only feedback received after / before these timestamps
+    (incremental retraining: new feedback vs. replay history)
+    """
     try:
+        window = ""
+        params = []
+        if since is not None:
+            window += " AND feedback_received_at > %s"
+            params.append(since)
+        if before is not None:
+            window += " AND feedback_received_at <= %s"
+            params.append(before)
+
         with db.get_cursor() as cursor:
             if model_type == 'banking':
                 query = """
@@ -418,7 +725,7 @@ def get_feedback_data_for_retraining(model_type, limit=None):
                         actual_class as "Class"
                     FROM predictions
                     WHERE model_type = 'banking'
-                      AND actual_class IS NOT NULL
+                      AND actual_class IS NOT NULL{window}
                     ORDER BY feedback_received_at DESC
                 """
             else:
@@ -435,14 +742,14 @@ def get_feedback_data_for_retraining(model_type, limit=None):
                         actual_class as "Class"
                     FROM predictions
                     WHERE model_type = 'credit_card'
-                      AND actual_class IS NOT NULL
+                      AND actual_class IS NOT NULL{window}
                     ORDER BY feedback_received_at DESC
                 """
             
             if limit:
                 query += f" LIMIT {limit}"
             
-            cursor.execute(query)
+            cursor.execute(query.format(window=window), params or None)
             results = cursor.fetchall()
             
             if not results:
@@ -559,6 +866,8 @@ def setup_schema_if_needed():
     except Exception as e:
         print(f"❌ Error setting up database schema: {e}")
 
+    ensure_feedback_counters()
+
 # ============================================
 # INITIALIZATION
 # ============================================
@@ -575,14 +884,17 @@ def init_database():
     return success
 
 def close_database():
-    """Close database connections"""
+    """Close this process's database connections (worker shutdown only)"""
     try:
-        if db.connection_pool and not db.connection_pool.closed:
+        if db.connection_pool and not db.connection_pool.closed and db.connection_pool.pid == os.getpid():
             db.close_all()
     except Exception as e:
         # Ignore if pool already closed
         pass
 
+# Registered before the write-behind flush hook, so it runs after it at exit
+atexit.register(close_database)
+
 if __name__ == "__main__":
     print("\n🧪 Testing Database Connection...")
     
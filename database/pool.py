@@ -0,0 +1,229 @@
+# database/pool.py - Thread-safe blocking connection pool
+"""
+Drop-in replacement for psycopg2.pool.SimpleConnectionPool for threaded workers.
+
+- getconn() blocks (up to timeout seconds) when every connection is checked out,
+  instead of raising PoolError straight away
+- Connections idle for longer than health_check_after are pinged before reuse;
+  broken connections are discarded and replaced
+- Connections older than max_lifetime are recycled when they are returned
+- metrics() reports in-use / idle counts, wait times and a checkout latency histogram
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+POOL_CONFIG = {
+    'minconn': int(os.getenv('DB_POOL_MIN', 1)),
+    'maxconn': int(os.getenv('DB_POOL_MAX', 20)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+    'health_check_after': float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', 30))
+}
+
+# Upper bounds (ms) of the checkout latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class PoolTimeout(PoolError):
+    """No connection became available within the pool timeout"""
+
+class BlockingConnectionPool:
+    """Bounded pool where callers wait for a free connection"""
+
+    def __init__(self, minconn=None, maxconn=None, timeout=None, max_lifetime=None,
+                 health_check_after=None, **connect_kwargs):
+        self.minconn = POOL_CONFIG['minconn'] if minconn is None else minconn
+        self.maxconn = POOL_CONFIG['maxconn'] if maxconn is None else maxconn
+        self.timeout = POOL_CONFIG['timeout'] if timeout is None else timeout
+        self.max_lifetime = POOL_CONFIG['max_lifetime'] if max_lifetime is None else max_lifetime
+        self.health_check_after = (POOL_CONFIG['health_check_after']
+                                   if health_check_after is None else health_check_after)
+        if self.maxconn < 1 or self.minconn > self.maxconn:
+            raise ValueError("Pool needs 0 <= minconn <= maxconn and maxconn >= 1")
+
+        self._connect_kwargs = connect_kwargs
+        self._cond = threading.Condition(threading.RLock())
+        self._idle = deque()        # (conn, returned_at), most recently returned on the right
+        self._in_use = {}           # id(conn) -> conn
+        self._created_at = {}       # id(conn) -> creation time
+        self._opening = 0           # connections being opened / health-checked outside the lock
+        self._waiting = 0
+        self.closed = False
+        self.pid = os.getpid()
+
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+            'wait_time_total_ms': 0.0,
+            'wait_time_max_ms': 0.0
+        }
+        self._histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+        for _ in range(self.minconn):
+            conn = self._connect()
+            self._idle.append((conn, time.monotonic()))
+
+    # ---------- connection lifecycle ----------
+    def _connect(self):
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._stats['created'] += 1
+        return conn
+
+    def _discard(self, conn):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn, now):
+        created = self._created_at.get(id(conn), now)
+        return self.max_lifetime > 0 and now - created >= self.max_lifetime
+
+    def _healthy(self, conn, idle_since, now):
+        """Cheap check always; round-trip ping only after health_check_after idle seconds"""
+        if conn.closed:
+            return False
+        if now - idle_since < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    # ---------- pool API (psycopg2-compatible) ----------
+    def getconn(self, key=None, timeout=None):
+        """Check out a connection, waiting up to timeout seconds for one to free up"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            candidate = None
+            with self._cond:
+                if self.closed:
+                    raise PoolError("connection pool is closed")
+
+                while not self._idle and len(self._in_use) + self._opening >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(
+                            f"no database connection available within {timeout:.1f}s "
+                            f"({self.maxconn} in use)"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    if self.closed:
+                        raise PoolError("connection pool is closed")
+
+                if self._idle:
+                    candidate = self._idle.pop()
+                self._opening += 1
+
+            if candidate is not None:
+                conn, idle_since = candidate
+                if not self._healthy(conn, idle_since, time.monotonic()):
+                    with self._cond:
+                        self._opening -= 1
+                        self._stats['health_check_failures'] += 1
+                        self._discard(conn)
+                        self._cond.notify()
+                    continue
+            else:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+
+            with self._cond:
+                self._opening -= 1
+                self._in_use[id(conn)] = conn
+                self._record_checkout((time.monotonic() - start) * 1000)
+            return conn
+
+    def putconn(self, conn, key=None, close=False):
+        """Return a connection; broken or expired ones are closed instead of reused"""
+        with self._cond:
+            if self._in_use.pop(id(conn), None) is None:
+                raise PoolError("trying to put unkeyed connection")
+
+            now = time.monotonic()
+            if self.closed or close or conn.closed:
+                self._discard(conn)
+            elif self._expired(conn, now):
+                self._stats['recycled'] += 1
+                self._discard(conn)
+            else:
+                try:
+                    if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    self._idle.append((conn, now))
+                except Exception:
+                    self._discard(conn)
+            self._cond.notify()
+
+    def closeall(self):
+        """Close every idle connection; checked-out ones are closed when returned"""
+        with self._cond:
+            self.closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._discard(conn)
+            # In-use connections still belong to their threads: putconn() discards
+            # them once self.closed is set
+            self._cond.notify_all()
+
+    # ---------- metrics ----------
+    def _record_checkout(self, wait_ms):
+        """Caller holds self._cond"""
+        self._stats['checkouts'] += 1
+        self._stats['wait_time_total_ms'] += wait_ms
+        self._stats['wait_time_max_ms'] = max(self._stats['wait_time_max_ms'], wait_ms)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if wait_ms <= bound:
+                self._histogram[i] += 1
+                break
+        else:
+            self._histogram[-1] += 1
+
+    def metrics(self):
+        with self._cond:
+            checkouts = self._stats['checkouts']
+            histogram = {f"le_{bound}ms": count
+                         for bound, count in zip(LATENCY_BUCKETS_MS, self._histogram)}
+            histogram['gt_%dms' % LATENCY_BUCKETS_MS[-1]] = self._histogram[-1]
+            return {
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'opening': self._opening,
+                'waiting': self._waiting,
+                'minconn': self.minconn,
+                'maxconn': self.maxconn,
+                'closed': self.closed,
+                **self._stats,
+                'wait_time_total_ms': round(self._stats['wait_time_total_ms'], 3),
+                'wait_time_max_ms': round(self._stats['wait_time_max_ms'], 3),
+                'wait_time_avg_ms': round(self._stats['wait_time_total_ms'] / checkouts, 3) if checkouts else 0.0,
+                'checkout_latency_histogram': histogram
+            }
@@ -5,6 +5,8 @@
 -- ============================================
 -- DROP EXISTING TABLES
 -- ============================================
+DROP TABLE IF EXISTS retrain_jobs CASCADE;
+DROP TABLE IF EXISTS feedback_counters CASCADE;
 DROP TABLE IF EXISTS feedback CASCADE;
 DROP TABLE IF EXISTS predictions CASCADE;
 DROP TABLE IF EXISTS model_versions CASCADE;
@@ -21,7 +23,8 @@ CREATE TABLE model_versions (
     performance_metrics JSONB,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     is_active BOOLEAN DEFAULT FALSE,
-    description TEXT
+    description TEXT,
+    feedback_watermark BIGINT  -- feedback_counters.labels_received when registered
 );
 
 CREATE INDEX idx_model_active ON model_versions(is_active);
@@ -206,6 +209,46 @@ CREATE TABLE model_performance_log (
 CREATE INDEX idx_perf_log_model ON model_performance_log(model_version_id);
 CREATE INDEX idx_perf_log_date ON model_performance_log(evaluation_date DESC);
 
+-- ============================================
+-- TABLE 5: Retraining Jobs (queued by the web app, run by retraining.worker)
+-- ============================================
+CREATE TABLE retrain_jobs (
+    id SERIAL PRIMARY KEY,
+    model_type VARCHAR(20) NOT NULL CHECK (model_type IN ('banking', 'credit_card')),
+    mode VARCHAR(20),
+    trigger VARCHAR(20) NOT NULL DEFAULT 'manual',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    feedback_count INTEGER,
+    stage TEXT,
+    progress REAL DEFAULT 0,
+    worker VARCHAR(100),
+    result JSONB,
+    error TEXT,
+    requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- One queued/running job per model type
+CREATE UNIQUE INDEX idx_retrain_jobs_active ON retrain_jobs(model_type) WHERE status IN ('queued', 'running');
+CREATE INDEX idx_retrain_jobs_requested ON retrain_jobs(requested_at DESC);
+
+-- ============================================
+-- TABLE 6: Feedback Counters (maintained by triggers below)
+-- ============================================
+CREATE TABLE feedback_counters (
+    model_type VARCHAR(20) PRIMARY KEY CHECK (model_type IN ('banking', 'credit_card')),
+    labels_received BIGINT NOT NULL DEFAULT 0,     -- predictions that got actual_class, ever
+    last_trigger_count BIGINT NOT NULL DEFAULT 0,  -- labels_received when the last succeeded auto-retrain was queued
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO feedback_counters (model_type) VALUES ('banking'), ('credit_card');
+
+COMMENT ON TABLE feedback_counters IS 'Per-model label counts so the retraining trigger check never scans predictions';
+
 -- ============================================
 -- VIEWS FOR ANALYTICS
 -- ============================================
@@ -450,5 +493,60 @@ BEFORE UPDATE ON feedback
 FOR EACH ROW
 EXECUTE FUNCTION update_feedback_timestamp();
 
+-- Trigger: Count labels per model type (in the transaction that writes the label)
+CREATE OR REPLACE FUNCTION count_prediction_labels()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Statement-level: one counter upsert per statement, however many rows it labels
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO feedback_counters AS c (model_type, labels_received)
+        SELECT model_type, COUNT(*) FROM new_rows
+        WHERE actual_class IS NOT NULL
+        GROUP BY model_type
+        ON CONFLICT (model_type) DO UPDATE SET
+            labels_received = c.labels_received + EXCLUDED.labels_received,
+            updated_at = CURRENT_TIMESTAMP;
+    ELSE
+        INSERT INTO feedback_counters AS c (model_type, labels_received)
+        SELECT n.model_type, COUNT(*) FROM new_rows n JOIN old_rows o ON o.id = n.id
+        WHERE o.actual_class IS NULL AND n.actual_class IS NOT NULL
+        GROUP BY n.model_type
+        ON CONFLICT (model_type) DO UPDATE SET
+            labels_received = c.labels_received + EXCLUDED.labels_received,
+            updated_at = CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_count_label_insert
+AFTER INSERT ON predictions
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION count_prediction_labels();
+
+CREATE TRIGGER trigger_count_label_update
+AFTER UPDATE ON predictions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION count_prediction_labels();
+
+-- Trigger: Stamp new model versions with the label count they were trained at
+CREATE OR REPLACE FUNCTION set_feedback_watermark()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.feedback_watermark IS NULL THEN
+        SELECT labels_received INTO NEW.feedback_watermark
+        FROM feedback_counters WHERE model_type = NEW.model_type;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_feedback_watermark
+BEFORE INSERT ON model_versions
+FOR EACH ROW
+EXECUTE FUNCTION set_feedback_watermark();
+
 
 -- Schema creation complete
@@ -0,0 +1,340 @@
+# database/write_behind.py - Asynchronous prediction persistence
+"""
+Write-behind queue for the predictions table.
+
+- Request threads reserve a prediction id from a pre-allocated sequence block
+  and hand the row to an in-memory buffer (no DB round trip on the hot path)
+- A background thread flushes the buffer with one multi-row INSERT
+  (execute_values) when it reaches batch_size rows or every flush_interval seconds
+- The buffer is bounded: when it is full, submit() waits up to put_timeout and
+  then writes the row synchronously (back-pressure instead of unbounded memory)
+- Rows that fail on a connection error go back to the front of the buffer and
+  are retried with exponential backoff (their ids were already returned to
+  clients); only rows the database rejects (data errors) are dropped
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2.extras import execute_values
+from psycopg2.pool import PoolError
+
+from database.db_dual import (
+    db,
+    PREDICTION_COLUMNS,
+    build_prediction_row,
+    get_active_model_version_id
+)
+
+WRITE_BEHIND_CONFIG = {
+    'batch_size': int(os.getenv('PREDICTION_FLUSH_BATCH', 500)),
+    'flush_interval': float(os.getenv('PREDICTION_FLUSH_INTERVAL', 0.5)),
+    'max_pending': int(os.getenv('PREDICTION_MAX_PENDING', 10000)),
+    'id_block_size': int(os.getenv('PREDICTION_ID_BLOCK', 200)),
+    'put_timeout': float(os.getenv('PREDICTION_PUT_TIMEOUT', 2.0)),
+    # How long updates of a fresh id wait for another worker's buffer to flush
+    # it (keep a few times that worker's flush_interval)
+    'settle_timeout': float(os.getenv('PREDICTION_SETTLE_TIMEOUT', 2.0)),
+    # Longest wait between retries while the database is unreachable
+    'max_backoff': float(os.getenv('PREDICTION_RETRY_MAX_BACKOFF', 30.0))
+}
+
+BULK_INSERT_SQL = "INSERT INTO predictions (id, {columns}) VALUES %s".format(
+    columns=', '.join(PREDICTION_COLUMNS)
+)
+
+INSERT_WITH_ID_SQL = "INSERT INTO predictions (id, {columns}) VALUES (%(id)s, {values})".format(
+    columns=', '.join(PREDICTION_COLUMNS),
+    values=', '.join(f'%({c})s' for c in PREDICTION_COLUMNS)
+)
+
+def is_connection_error(error):
+    """True for failures worth retrying (database down, pool exhausted), not bad rows"""
+    return isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError))
+
+class PredictionWriter:
+    """Buffers predictions in memory and bulk-inserts them in the background"""
+
+    def __init__(self, database=db, batch_size=None, flush_interval=None,
+                 max_pending=None, id_block_size=None, put_timeout=None, max_backoff=None):
+        self.db = database
+        self.batch_size = batch_size or WRITE_BEHIND_CONFIG['batch_size']
+        self.flush_interval = flush_interval or WRITE_BEHIND_CONFIG['flush_interval']
+        self.max_pending = max_pending or WRITE_BEHIND_CONFIG['max_pending']
+        self.id_block_size = id_block_size or WRITE_BEHIND_CONFIG['id_block_size']
+        self.put_timeout = put_timeout or WRITE_BEHIND_CONFIG['put_timeout']
+        self.max_backoff = max_backoff or WRITE_BEHIND_CONFIG['max_backoff']
+
+        self._cond = threading.Condition()
+        self._pending = {}          # prediction_id -> (model_type, prediction_data), insertion ordered
+        self._inflight = set()      # ids taken by the flusher, not yet committed
+        self._id_lock = threading.Lock()
+        self._ids = deque()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._backoff = 0.0         # current retry delay while the DB is unreachable
+        self._retry_at = 0.0
+
+        # Updated under self._cond (request threads and the flusher both write)
+        self.stats = {
+            'submitted': 0,
+            'flushed': 0,
+            'flushes': 0,
+            'sync_fallbacks': 0,
+            'requeued': 0,
+            'failed': 0
+        }
+
+    # ---------- ids ----------
+    def _reserve_id(self):
+        """Next id from the pre-allocated block (refills with one query per block)"""
+        with self._id_lock:
+            if not self._ids:
+                with self.db.get_cursor() as cursor:
+                    cursor.execute("""
+                        SELECT nextval(pg_get_serial_sequence('predictions', 'id')) AS id
+                        FROM generate_series(1, %s)
+                    """, (self.id_block_size,))
+                    self._ids.extend(r['id'] for r in cursor.fetchall())
+            return self._ids.popleft()
+
+    # ---------- lifecycle ----------
+    def _ensure_started(self):
+        # Threads don't survive fork: (re)start per process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Inherited state belongs to the parent process
+                self._pending.clear()
+                self._inflight.clear()
+                self._ids.clear()
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, daemon=True, name="PredictionWriter")
+            self._thread.start()
+
+    def stop(self):
+        """Flush everything still buffered and stop the background thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout=10)
+        self.flush()
+
+    # ---------- producer side ----------
+    def submit(self, prediction_data):
+        """
+        Queue a prediction for persistence.
+
+        Returns:
+            The prediction id the row will be stored under
+        """
+        self._ensure_started()
+        prediction_id = self._reserve_id()
+        model_type = prediction_data.get('mode', 'banking')
+
+        with self._cond:
+            deadline = time.time() + self.put_timeout
+            while len(self._pending) >= self.max_pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            if len(self._pending) < self.max_pending:
+                self._pending[prediction_id] = (model_type, prediction_data)
+                self.stats['submitted'] += 1
+                if len(self._pending) >= self.batch_size:
+                    self._cond.notify_all()
+                return prediction_id
+
+        # Buffer still full: write this row ourselves (slow but lossless)
+        with self._cond:
+            self.stats['sync_fallbacks'] += 1
+        if not self._write_rows([(prediction_id, model_type, prediction_data)], requeue=False):
+            return None     # not stored: don't hand out an id nothing will find
+        return prediction_id
+
+    def is_pending(self, prediction_id):
+        with self._cond:
+            return prediction_id in self._pending or prediction_id in self._inflight
+
+    def ensure_persisted(self, prediction_id, timeout=5.0):
+        """Block until prediction_id is in the DB (used before reads/updates of fresh ids)"""
+        deadline = time.time() + timeout
+        while self.is_pending(prediction_id) and time.time() < deadline:
+            if prediction_id in self._pending and not self._backing_off():
+                self.flush()
+            else:
+                time.sleep(0.01)
+
+    def retry_until_settled(self, attempt, timeout=None, interval=0.05):
+        """
+        Call attempt() until it returns something other than None (or timeout).
+
+        ensure_persisted() only covers this process's buffer. A prediction id
+        handed out by another worker lands in the table once that worker
+        flushes, so updates that matched no row retry through this.
+        """
+        timeout = WRITE_BEHIND_CONFIG['settle_timeout'] if timeout is None else timeout
+        deadline = time.time() + timeout
+        result = attempt()
+        while result is None and time.time() < deadline:
+            time.sleep(interval)
+            result = attempt()
+        return result
+
+    # ---------- consumer side ----------
+    def _take_batch(self):
+        """Pop up to batch_size pending rows (caller holds self._cond)"""
+        batch = []
+        for prediction_id in list(self._pending)[:self.batch_size]:
+            model_type, data = self._pending.pop(prediction_id)
+            self._inflight.add(prediction_id)
+            batch.append((prediction_id, model_type, data))
+        self._cond.notify_all()  # wake producers waiting for space
+        return batch
+
+    def _backing_off(self):
+        return time.time() < self._retry_at
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._backing_off() and not self._stopping:
+                    self._cond.wait(self._retry_at - time.time())
+                    continue
+                if not self._stopping and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._stopping and (not self._pending or self._backing_off()):
+                    return      # stop() makes the last attempt
+                batch = self._take_batch()
+            if batch:
+                self._write_rows(batch)
+
+    def flush(self):
+        """
+        Synchronously write everything currently buffered. Returns rows written.
+
+        Stops early (rows stay buffered) while the database is unreachable.
+        """
+        written = 0
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return written
+            written += self._write_rows(batch)
+            if self._backing_off():
+                return written
+
+    def _requeue(self, rows):
+        """Put rows back at the front of the buffer and back off before the next attempt"""
+        with self._cond:
+            self._pending = {
+                **{prediction_id: (model_type, data) for prediction_id, model_type, data in rows},
+                **self._pending
+            }
+            self.stats['requeued'] += len(rows)
+            self._backoff = min(max(self._backoff * 2, self.flush_interval), self.max_backoff)
+            self._retry_at = time.time() + self._backoff
+
+    def _unreachable(self, rows, error, requeue):
+        if requeue:
+            self._requeue(rows)
+            print(f"⚠️  Database unreachable, {len(rows)} predictions stay queued "
+                  f"(retry in {self._backoff:.1f}s): {error}")
+        else:
+            with self._cond:
+                self.stats['failed'] += len(rows)
+            print(f"❌ Database unreachable, {len(rows)} predictions not stored: {error}")
+
+    def _write_rows(self, batch, requeue=True):
+        """
+        Insert (id, model_type, data) tuples in one statement.
+
+        On a data error rows are retried one by one so only the bad ones are
+        dropped; on a connection error they go back to the buffer (requeue)
+        or count as failed.
+        """
+        try:
+            with self.db.get_cursor() as cursor:
+                version_ids = {}
+                values = []
+                for prediction_id, model_type, data in batch:
+                    if model_type not in version_ids:
+                        version_ids[model_type] = get_active_model_version_id(cursor, model_type)
+                    row = build_prediction_row(data, version_ids[model_type])
+                    values.append((prediction_id, *[row[c] for c in PREDICTION_COLUMNS]))
+                execute_values(cursor, BULK_INSERT_SQL, values, page_size=len(values))
+            with self._cond:
+                self.stats['flushed'] += len(batch)
+                self.stats['flushes'] += 1
+                self._backoff, self._retry_at = 0.0, 0.0
+            return len(batch)
+        except Exception as e:
+            if is_connection_error(e):
+                self._unreachable(batch, e, requeue)
+                return 0
+            print(f"❌ Bulk prediction insert failed ({len(batch)} rows): {e}")
+            return self._write_rows_individually(batch, requeue)
+        finally:
+            with self._cond:
+                for prediction_id, _, _ in batch:
+                    self._inflight.discard(prediction_id)
+
+    def _write_rows_individually(self, batch, requeue=True):
+        """Fallback that isolates bad rows so one bad prediction doesn't drop a batch"""
+        written = 0
+        for i, (prediction_id, model_type, data) in enumerate(batch):
+            try:
+                with self.db.get_cursor() as cursor:
+                    row = build_prediction_row(data, get_active_model_version_id(cursor, model_type))
+                    row['id'] = prediction_id
+                    cursor.execute(INSERT_WITH_ID_SQL, row)
+                written += 1
+            except Exception as e:
+                if is_connection_error(e):
+                    # The rest would fail the same way
+                    self._unreachable(batch[i:], e, requeue)
+                    break
+                with self._cond:
+                    self.stats['failed'] += 1
+                print(f"❌ Dropped prediction {prediction_id}: {e}")
+        with self._cond:
+            self.stats['flushed'] += written
+        return written
+
+    def metrics(self):
+        with self._cond:
+            stats = dict(self.stats)
+            pending = len(self._pending)
+            inflight = len(self._inflight)
+        return {
+            **stats,
+            'pending': pending,
+            'inflight': inflight,
+            'max_pending': self.max_pending,
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval
+        }
+
+# Global writer instance
+prediction_writer = PredictionWriter()
+
+@atexit.register
+def _flush_on_exit():
+    if prediction_writer._pid == os.getpid():
+        try:
+            prediction_writer.stop()
+        except Exception as e:
+            print(f"⚠️  Prediction writer shutdown flush failed: {e}")
@@ -0,0 +1,351 @@
+# features/batch_features.py - Vectorized feature preparation for batch scoring
+"""
+Builds the banking and credit card feature matrices for many transactions
+in one NumPy pass, plus a DataFrame-free single-row path for banking.
+Mirrors the training feature logic row for row, so batch and single scoring
+give the same probabilities.
+"""
+
+import re
+import math
+import numpy as np
+from datetime import datetime
+
+# Continuous banking features scaled by scaler_banking.pkl (same order as training)
+BANKING_CONTINUOUS = [
+    'amount', 'balance', 'spend_ratio', 'amount_vs_avg',
+    'amount_log', 'balance_log', 'hour', 'day_of_week',
+    'daily_count', 'avg_7d', 'failed_7d', 'card_age', 'distance', 'trust_score'
+]
+
+# Canonical order of engineered banking features (matches features_banking.json)
+BANKING_FEATURES = [
+    'amount', 'balance', 'spend_ratio', 'amount_vs_avg', 'within_2x_avg',
+    'within_3x_avg', 'amount_log', 'balance_log', 'hour', 'day_of_week',
+    'is_weekend', 'late_night', 'very_late_night', 'business_hours',
+    'is_atm', 'is_online', 'is_pos', 'is_transfer', 'daily_count',
+    'very_high_daily_count', 'reasonable_daily_count', 'avg_7d',
+    'failed_7d', 'few_failed', 'many_failed', 'card_age', 'very_new_card',
+    'new_card', 'established_card', 'mature_card', 'distance', 'local_txn',
+    'nearby_txn', 'far_txn', 'very_far_txn', 'small_amount', 'normal_amount',
+    'large_amount', 'very_large_amount', 'healthy_balance', 'low_balance',
+    'suspicious_ip', 'trust_score', 'high_trust'
+]
+
+TIMESTAMP_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+# ============================================
+# HELPERS
+# ============================================
+def _numbers(values, key):
+    """
+    float64 array of one field's values
+
+    Raises:
+        ValueError: naming the first row whose value isn't a number (null, list, text)
+    """
+    try:
+        column = np.array(values, dtype=np.float64)
+        if column.ndim == 1 and not any(v is None for v in values):
+            return column
+    except (TypeError, ValueError):
+        pass
+    for row, value in enumerate(values):
+        try:
+            if value is None or isinstance(value, (list, dict)):
+                raise TypeError
+            float(value)
+        except (TypeError, ValueError):
+            where = f"Row {row}: " if len(values) > 1 else ""
+            raise ValueError(f"{where}{key} must be a number, got {value!r}")
+    raise ValueError(f"{key} must be a number")
+
+def _column(records, key, default):
+    """Collect one raw input field across all records as float64"""
+    return _numbers([r.get(key, default) for r in records], key)
+
+def _int_column(records, key, default):
+    """Same as _column but truncated like int() in the single-row path"""
+    return np.trunc(_column(records, key, default))
+
+def _flag(condition):
+    return condition.astype(np.float64)
+
+def _parse_timestamps(timestamps):
+    """
+    Parse 'YYYY-mm-dd HH:MM:SS' strings into (hour, day_of_week) arrays.
+    Unparseable timestamps fall back to hour=12, day_of_week=2 (Wednesday noon).
+    """
+    n = len(timestamps)
+    hour = np.full(n, 12.0)
+    day_of_week = np.full(n, 2.0)
+
+    valid = [i for i, ts in enumerate(timestamps) if isinstance(ts, str) and TIMESTAMP_PATTERN.match(ts)]
+    if not valid:
+        return hour, day_of_week
+
+    try:
+        parsed = np.array([timestamps[i] for i in valid], dtype='datetime64[s]')
+    except ValueError:
+        # Out-of-range values (e.g. month 13) - parse row by row
+        parsed = []
+        kept = []
+        for i in valid:
+            try:
+                parsed.append(np.datetime64(datetime.strptime(timestamps[i], "%Y-%m-%d %H:%M:%S"), 's'))
+                kept.append(i)
+            except ValueError:
+                pass
+        valid = kept
+        parsed = np.array(parsed, dtype='datetime64[s]')
+
+    seconds = parsed.astype(np.int64)
+    days = seconds // 86400
+    hour[valid] = (seconds - days * 86400) // 3600
+    day_of_week[valid] = (days + 3) % 7  # 1970-01-01 was a Thursday
+    return hour, day_of_week
+
+def _contains(upper_types, token):
+    return np.char.find(upper_types, token) >= 0
+
+# ============================================
+# BANKING
+# ============================================
+def banking_feature_values(data):
+    """
+    Compute the engineered banking features for one raw transaction.
+
+    Returns:
+        List of floats in BANKING_FEATURES order (unscaled)
+    """
+    amount = float(data.get('Transaction_Amount', 0))
+    balance = float(data.get('Account_Balance', 0))
+    timestamp = data.get('Timestamp', '')
+    txn_type = str(data.get('Transaction_Type', 'POS')).upper()
+    daily_count = int(data.get('Daily_Transaction_Count', 1))
+    avg_7d = float(data.get('Avg_Transaction_Amount_7d', amount))
+    failed_7d = int(data.get('Failed_Transaction_Count_7d', 0))
+    card_age = int(data.get('Card_Age', 100))
+    distance = float(data.get('Transaction_Distance', 500))
+    suspicious_ip = int(data.get('IP_Address_Flag', 0))
+
+    try:
+        dt = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        hour = dt.hour
+        day_of_week = dt.weekday()
+    except:
+        hour = 12
+        day_of_week = 2
+
+    within_2x_avg = 1 if amount <= (avg_7d * 2) else 0
+    reasonable_daily_count = 1 if daily_count <= 10 else 0
+    few_failed = 1 if failed_7d <= 2 else 0
+    established_card = 1 if card_age > 90 else 0
+
+    trust_score = (
+        established_card +
+        few_failed +
+        (1 if balance >= amount else 0) +
+        within_2x_avg +
+        reasonable_daily_count
+    )
+
+    return [
+        amount, balance, amount / (balance + amount + 1), amount / (avg_7d + 1),
+        within_2x_avg, 1 if amount <= (avg_7d * 3) else 0,
+        math.log1p(amount), math.log1p(balance), hour, day_of_week,
+        1 if day_of_week >= 5 else 0,
+        1 if (hour >= 23 or hour <= 5) else 0,
+        1 if (hour >= 1 and hour <= 4) else 0,
+        1 if (hour >= 9 and hour <= 17) else 0,
+        1 if 'ATM' in txn_type else 0,
+        1 if 'ONLINE' in txn_type else 0,
+        1 if 'POS' in txn_type else 0,
+        1 if 'TRANSFER' in txn_type else 0,
+        daily_count, 1 if daily_count > 15 else 0, reasonable_daily_count,
+        avg_7d, failed_7d, few_failed, 1 if failed_7d > 5 else 0,
+        card_age, 1 if card_age < 7 else 0, 1 if card_age < 30 else 0,
+        established_card, 1 if card_age > 180 else 0,
+        distance, 1 if distance < 50 else 0, 1 if distance < 200 else 0,
+        1 if distance > 1000 else 0, 1 if distance > 3000 else 0,
+        1 if amount < 100 else 0, 1 if (amount >= 100 and amount <= 500) else 0,
+        1 if amount > 500 else 0, 1 if amount > 2000 else 0,
+        1 if balance > 5000 else 0, 1 if balance < 1000 else 0,
+        suspicious_ip, trust_score, 1 if trust_score >= 4 else 0
+    ]
+
+def banking_feature_columns(records):
+    """
+    Compute the engineered banking features for many raw transactions at once.
+
+    Returns:
+        Dict of feature name -> float64 array (unscaled)
+    """
+    amount = _column(records, 'Transaction_Amount', 0)
+    balance = _column(records, 'Account_Balance', 0)
+    avg_7d = _numbers([r.get('Avg_Transaction_Amount_7d', a) for r, a in zip(records, amount)],
+                      'Avg_Transaction_Amount_7d')
+    daily_count = _int_column(records, 'Daily_Transaction_Count', 1)
+    failed_7d = _int_column(records, 'Failed_Transaction_Count_7d', 0)
+    card_age = _int_column(records, 'Card_Age', 100)
+    distance = _column(records, 'Transaction_Distance', 500)
+    suspicious_ip = _int_column(records, 'IP_Address_Flag', 0)
+
+    hour, day_of_week = _parse_timestamps([r.get('Timestamp', '') for r in records])
+    txn_types = np.char.upper(np.array([str(r.get('Transaction_Type', 'POS')) for r in records], dtype=str))
+
+    within_2x_avg = _flag(amount <= avg_7d * 2)
+    few_failed = _flag(failed_7d <= 2)
+    established_card = _flag(card_age > 90)
+    reasonable_daily_count = _flag(daily_count <= 10)
+
+    trust_score = (
+        established_card +
+        few_failed +
+        _flag(balance >= amount) +
+        within_2x_avg +
+        reasonable_daily_count
+    )
+
+    features = {
+        'amount': amount,
+        'balance': balance,
+        'spend_ratio': amount / (balance + amount + 1),
+        'amount_vs_avg': amount / (avg_7d + 1),
+        'within_2x_avg': within_2x_avg,
+        'within_3x_avg': _flag(amount <= avg_7d * 3),
+        'amount_log': np.log1p(amount),
+        'balance_log': np.log1p(balance),
+        'hour': hour,
+        'day_of_week': day_of_week,
+        'is_weekend': _flag(day_of_week >= 5),
+        'late_night': _flag((hour >= 23) | (hour <= 5)),
+        'very_late_night': _flag((hour >= 1) & (hour <= 4)),
+        'business_hours': _flag((hour >= 9) & (hour <= 17)),
+        'is_atm': _flag(_contains(txn_types, 'ATM')),
+        'is_online': _flag(_contains(txn_types, 'ONLINE')),
+        'is_pos': _flag(_contains(txn_types, 'POS')),
+        'is_transfer': _flag(_contains(txn_types, 'TRANSFER')),
+        'daily_count': daily_count,
+        'very_high_daily_count': _flag(daily_count > 15),
+        'reasonable_daily_count': reasonable_daily_count,
+        'avg_7d': avg_7d,
+        'failed_7d': failed_7d,
+        'few_failed': few_failed,
+        'many_failed': _flag(failed_7d > 5),
+        'card_age': card_age,
+        'very_new_card': _flag(card_age < 7),
+        'new_card': _flag(card_age < 30),
+        'established_card': established_card,
+        'mature_card': _flag(card_age > 180),
+        'distance': distance,
+        'local_txn': _flag(distance < 50),
+        'nearby_txn': _flag(distance < 200),
+        'far_txn': _flag(distance > 1000),
+        'very_far_txn': _flag(distance > 3000),
+        'small_amount': _flag(amount < 100),
+        'normal_amount': _flag((amount >= 100) & (amount <= 500)),
+        'large_amount': _flag(amount > 500),
+        'very_large_amount': _flag(amount > 2000),
+        'healthy_balance': _flag(balance > 5000),
+        'low_balance': _flag(balance < 1000),
+        'suspicious_ip': suspicious_ip,
+        'trust_score': trust_score,
+        'high_trust': _flag(trust_score >= 4),
+    }
+
+    return features
+
+class BankingFeatureLayout:
+    """
+    Column layout for the banking model, resolved once at startup.
+
+    Maps BANKING_FEATURES onto the model's feature order (features_banking.json)
+    and turns the fitted StandardScaler into mean/scale vectors over that order,
+    so rows and matrices are written straight into float32 arrays.
+    """
+
+    def __init__(self, feature_names, scaler=None):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.index = {name: j for j, name in enumerate(self.feature_names)}
+
+        # Canonical positions we compute -> destination columns in the model order.
+        # Model columns we do not compute stay 0.
+        present = [(i, self.index[name]) for i, name in enumerate(BANKING_FEATURES) if name in self.index]
+        self._src = np.array([i for i, _ in present], dtype=np.intp)
+        self._dest = np.array([j for _, j in present], dtype=np.intp)
+
+        self._scale_idx = None
+        self._mean = None
+        self._scale = None
+        if scaler is not None:
+            try:
+                scaled = list(getattr(scaler, 'feature_names_in_', BANKING_CONTINUOUS))
+                mean = scaler.mean_ if getattr(scaler, 'with_mean', True) else np.zeros(len(scaled))
+                scale = scaler.scale_ if getattr(scaler, 'with_std', True) else np.ones(len(scaled))
+                keep = [k for k, name in enumerate(scaled) if name in self.index]
+                self._scale_idx = np.array([self.index[scaled[k]] for k in keep], dtype=np.intp)
+                self._mean = np.asarray(mean, dtype=np.float64)[keep]
+                self._scale = np.asarray(scale, dtype=np.float64)[keep]
+            except Exception as e:
+                print(f"Scaling error: {e}")
+                self._scale_idx = None
+
+    def _finish(self, X):
+        """Scale the continuous columns (float64) and cast to float32"""
+        if self._scale_idx is not None:
+            X[:, self._scale_idx] = (X[:, self._scale_idx] - self._mean) / self._scale
+        return X.astype(np.float32)
+
+    def row(self, data):
+        """Single transaction -> float32 array of shape (1, n_features)"""
+        values = np.array(banking_feature_values(data), dtype=np.float64)
+        X = np.zeros((1, self.n_features), dtype=np.float64)
+        X[0, self._dest] = values[self._src]
+        return self._finish(X)
+
+    def matrix(self, records):
+        """Many transactions -> float32 array of shape (len(records), n_features)"""
+        columns = banking_feature_columns(records)
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        for i, j in zip(self._src, self._dest):
+            X[:, j] = columns[BANKING_FEATURES[i]]
+        return self._finish(X)
+
+# ============================================
+# CREDIT CARD
+# ============================================
+def build_credit_card_matrix(records, feature_names):
+    """
+    Build the credit card feature matrix (V1-V28 + Amount + Time engineered).
+
+    Raises:
+        ValueError: If any record is missing one of V1-V28
+    """
+    for row, r in enumerate(records):
+        for i in range(1, 29):
+            if f'V{i}' not in r:
+                where = f"Row {row}: " if len(records) > 1 else ""
+                raise ValueError(f"{where}Missing V{i}. Credit card mode requires V1-V28.")
+
+    features = {f'V{i}': _column(records, f'V{i}', 0) for i in range(1, 29)}
+    amount = _column(records, 'Amount', 0)
+    time = _column(records, 'Time', 0)
+
+    features.update({
+        'Amount': amount,
+        'Time': time,
+        'Hour': (time / 3600) % 24,
+        'time_gap': np.zeros(len(records)),
+        'txn_last_1hr': np.ones(len(records)),
+        'Amount_log': np.log1p(amount),
+        'amount_roll_mean_3': amount,
+        'amount_roll_std_3': np.zeros(len(records)),
+    })
+
+    available = [f for f in feature_names if f in features]
+    X = np.empty((len(records), len(available)), dtype=np.float32)
+    for j, col in enumerate(available):
+        X[:, j] = features[col]
+    return X
@@ -0,0 +1,48 @@
+# gunicorn.conf.py - Gunicorn settings for the prediction service
+"""
+Loads the app (both models, feature layouts, tree indexes, explainers) once
+in the master and forks workers from it, so they share those pages
+copy-on-write instead of each deserializing its own copy.
+
+GUNICORN_PRELOAD=false falls back to importing the app in every worker.
+The master also starts the retraining worker (python -m retraining.worker)
+when the database is enabled, unless RETRAIN_WORKER_AUTOSTART=false (e.g.
+when it runs as its own service). Only one runner stays up per database: one
+started by another master (a replica, or the new master during a USR2
+upgrade) exits straight away.
+Command-line flags (railway.toml) override the defaults below.
+"""
+
+import os
+import sys
+
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('PORT', 5000)}")
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+_retrain_runner = None
+
+def when_ready(server):
+    global _retrain_runner
+    app = sys.modules.get('app')
+    if app is not None and not app.DB_ENABLED:
+        # Preloaded app running without a database: nothing to retrain from
+        return
+    from retraining.worker import start_background_runner
+    _retrain_runner = start_background_runner()
+
+def on_exit(server):
+    if _retrain_runner is not None:
+        from retraining.worker import stop_background_runner
+        stop_background_runner(_retrain_runner)
+
+def pre_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import before_fork
+        before_fork()
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from app import after_fork
+        after_fork()
@@ -22,6 +22,7 @@ from imblearn.under_sampling import RandomUnderSampler
 
 from database.db import get_feedback_for_retraining, db
 from features.features_eng import engineer_features
+from retraining.dataset_cache import load_dataset
 
 # ============================================
 # RETRAINING CONFIGURATION
@@ -150,7 +151,7 @@ def prepare_retraining_data():
     # Load original training data
     print("  Loading original training data...")
     try:
-        original_data = pd.read_csv("data/creditcard.csv")
+        original_data = load_dataset("data/creditcard.csv")
         print(f"  ✅ Original data: {len(original_data):,} samples")
     except Exception as e:
         print(f"  ❌ Error loading original data: {e}")
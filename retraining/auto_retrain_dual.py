@@ -6,6 +6,8 @@ Complete retraining system for dual mode (banking + credit card)
 - Trains new model
 - Compares performance with old model
 - Auto-activates if improvement >= 2%
+- Incremental mode (credit card): continues the active booster with new
+  feedback + a replay sample instead of training from scratch
 """
 
 import pandas as pd
@@ -29,7 +31,21 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database.db_dual import (
     get_feedback_data_for_retraining,
     Database,
-    convert_decimals
+    convert_decimals,
+    invalidate_active_model_version
+)
+from serving.model_registry import write_manifest_entry, unservable_features, DEFAULT_ARTIFACTS
+from retraining.dataset_cache import load_dataset
+from retraining.incremental import (
+    INCREMENTAL_CONFIG,
+    load_booster_model,
+    booster_feature_names,
+    credit_card_frame,
+    replay_sample,
+    continue_training,
+    evaluate,
+    metric_deltas,
+    print_metrics
 )
 
 # Configuration
@@ -38,13 +54,38 @@ RETRAIN_CONFIG = {
     'improvement_threshold': 0.01,  # 1% improvement (lowered from 2%)
     'test_size': 0.2,
     'models_dir': 'models',
-    'data_dir': 'data'
+    'data_dir': 'data',
+    # Training threads; the retraining worker caps this (RETRAIN_MAX_THREADS)
+    'n_jobs': int(os.getenv('RETRAIN_N_JOBS', -1))
 }
 
+# Progress reporting (retraining.worker writes it to the job row)
+_progress_callback = None
+
+def set_progress_callback(callback):
+    """callback(stage, fraction) is called at each retraining step; None clears it"""
+    global _progress_callback
+    _progress_callback = callback
+
+def _progress(stage, fraction):
+    if _progress_callback is None:
+        return
+    try:
+        _progress_callback(stage, fraction)
+    except Exception as e:
+        print(f"⚠️  Progress update failed: {e}")
+
+def _servable(model_type, features):
+    """Whether the API's model registry can load a model trained on these columns"""
+    unknown = unservable_features(model_type, features)
+    if unknown:
+        print(f"   ⚠️  Not servable: the {model_type} pipeline can't build {sorted(unknown)[:5]}")
+    return not unknown
+
 # ============================================
 # CREDIT CARD RETRAINING (with original dataset)
 # ============================================
-def retrain_credit_card_with_dataset():
+def retrain_credit_card_with_dataset(mode=None):
     """
     Retrain credit card model:
     1. Load original creditcard.csv
@@ -52,10 +93,22 @@ def retrain_credit_card_with_dataset():
     3. Train new model
     4. Compare with old model
     5. Activate if better
+
+    mode: "full" (default, RETRAIN_MODE) retrains from scratch; "incremental"
+    continues the active booster and only falls back to this full retrain
+    when it can't
     """
+    mode = (mode or INCREMENTAL_CONFIG['mode']).lower()
+    if mode == 'incremental':
+        result = retrain_credit_card_incremental()
+        if result.get('status') != 'fallback':
+            return result
+        print(f"⚠️  {result['message']} - running a full retrain")
+    
     try:
         import time
         time.sleep(0.1)
+        started = time.perf_counter()
         
         print(f"\n{'='*70}")
         print("🔄 CREDIT CARD RETRAINING (WITH ORIGINAL DATASET)")
@@ -65,6 +118,7 @@ def retrain_credit_card_with_dataset():
         local_db = Database()
         local_db.initialize_pool()
         
+        _progress('loading_dataset', 0.05)
         # Step 1: Load original dataset
         print("📊 Loading original creditcard.csv...")
         dataset_path = os.path.join(RETRAIN_CONFIG['data_dir'], 'creditcard.csv')
@@ -73,9 +127,10 @@ def retrain_credit_card_with_dataset():
             print(f"❌ Dataset not found: {dataset_path}")
             return {"status": "error", "message": "creditcard.csv not found"}
         
-        original_df = pd.read_csv(dataset_path)
+        original_df = load_dataset(dataset_path)
         print(f"✅ Loaded {len(original_df):,} original samples")
         
+        _progress('loading_feedback', 0.2)
         # Step 2: Load feedback data
         print("📊 Loading feedback samples...")
         feedback_data = get_feedback_data_for_retraining('credit_card', limit=1000)
@@ -101,6 +156,7 @@ def retrain_credit_card_with_dataset():
         
         print(f"   Fraud rate: {y.mean()*100:.4f}%")
         
+        _progress('preparing', 0.25)
         # Step 4: Train-test split
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=RETRAIN_CONFIG['test_size'], 
@@ -109,6 +165,7 @@ def retrain_credit_card_with_dataset():
         
         print(f"   Train: {len(X_train):,}, Test: {len(X_test):,}")
         
+        _progress('training', 0.3)
         # Step 5: Train new model
         print("🤖 Training XGBoost...")
         
@@ -119,13 +176,14 @@ def retrain_credit_card_with_dataset():
             learning_rate=0.1,
             scale_pos_weight=scale_pos_weight,
             random_state=42,
-            n_jobs=-1,
+            n_jobs=RETRAIN_CONFIG['n_jobs'],
             eval_metric='logloss'
         )
         
         model.fit(X_train, y_train, verbose=False)
         print("✅ Training complete")
         
+        _progress('evaluating', 0.8)
         # Step 6: Evaluate new model
         print("📊 Evaluating new model...")
         y_pred = model.predict(X_test)
@@ -188,6 +246,7 @@ def retrain_credit_card_with_dataset():
             print("   No current active model, will deploy new one")
             should_deploy = True
         
+        _progress('saving', 0.9)
         # Step 8: Save new model with UNIQUE identifier (UUID)
         import uuid
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -226,6 +285,8 @@ def retrain_credit_card_with_dataset():
                 0.4,
                 json.dumps({
                     **new_metrics,
+                    'training_mode': 'full',
+                    'wall_time_s': round(time.perf_counter() - started, 2),
                     'trained_samples': len(combined_df),
                     'feedback_samples': len(feedback_df),
                     'comparison': comparison
@@ -243,6 +304,9 @@ def retrain_credit_card_with_dataset():
                 # Activate new
                 cursor.execute("UPDATE model_versions SET is_active = TRUE WHERE id = %s", (new_version_id,))
             
+            # Let running servers hot-swap to the new version
+            write_manifest_entry('credit_card', version_name, model_path, 0.4)
+            invalidate_active_model_version('credit_card')
             print(f"✅ NEW MODEL ACTIVATED: {version_name}")
         else:
             print(f"⚠️  New model saved but NOT activated (current model is better)")
@@ -251,9 +315,14 @@ def retrain_credit_card_with_dataset():
         
         print(f"{'='*70}\n")
         
+        wall_time = round(time.perf_counter() - started, 2)
+        print(f"⏱️  Full retrain wall time: {wall_time:.1f}s")
+        
         return {
             "status": "success",
             "model_type": "credit_card",
+            "training_mode": "full",
+            "wall_time_s": wall_time,
             "version": version_name,
             "samples_used": len(combined_df),
             "feedback_samples": len(feedback_df),
@@ -267,7 +336,239 @@ def retrain_credit_card_with_dataset():
         print(f"❌ CC retraining error: {e}")
         import traceback
         traceback.print_exc()
-        return {"status": "error", "message": str(e)}
+        return {"status": "error", "message": str(e) or type(e).__name__}
+
+# ============================================
+# CREDIT CARD INCREMENTAL UPDATE (continue the active booster)
+# ============================================
+def _incremental_fallback(message):
+    return {"status": "fallback", "message": message}
+
+def retrain_credit_card_incremental():
+    """
+    Incremental credit card update:
+    1. Load the active booster
+    2. New feedback since it was created + replay sample of history
+    3. Add INCREMENTAL_ROUNDS trees (xgb_model continuation)
+    4. Compare with the active booster on held-out new feedback
+    5. Activate if F1 improves by improvement_threshold, like a full retrain
+
+    Returns status "fallback" when only a full retrain can help
+    (no XGBoost model to continue, or it has grown past INCREMENTAL_MAX_TREES)
+    """
+    local_db = None
+    try:
+        import time
+        started = time.perf_counter()
+        
+        print(f"\n{'='*70}")
+        print("🔄 CREDIT CARD INCREMENTAL UPDATE (CONTINUING ACTIVE BOOSTER)")
+        print(f"{'='*70}")
+        
+        local_db = Database()
+        local_db.initialize_pool()
+        
+        _progress('loading_model', 0.05)
+        # Step 1: Active booster
+        with local_db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT version, model_path, threshold, created_at, performance_metrics
+                FROM model_versions
+                WHERE model_type = 'credit_card' AND is_active = TRUE
+                LIMIT 1
+            """)
+            current_model = cursor.fetchone()
+        
+        model_path = current_model['model_path'] if current_model else DEFAULT_ARTIFACTS['credit_card']['model_path']
+        threshold = float(current_model['threshold']) if current_model else 0.4
+        base_model = load_booster_model(model_path)
+        if base_model is None:
+            return _incremental_fallback(f"Active model {model_path} is not an XGBoost booster")
+        
+        base_trees = base_model.get_booster().num_boosted_rounds()
+        if base_trees + INCREMENTAL_CONFIG['rounds'] > INCREMENTAL_CONFIG['max_trees']:
+            return _incremental_fallback(f"Active booster already has {base_trees} trees")
+        feature_names = booster_feature_names(base_model)
+        print(f"📦 Base: {current_model['version'] if current_model else model_path} "
+              f"({base_trees} trees, {len(feature_names)} features)")
+        
+        _progress('loading_feedback', 0.15)
+        # Step 2: New feedback (since the active version was created)
+        since = current_model['created_at'] if current_model else None
+        feedback_data = get_feedback_data_for_retraining(
+            'credit_card', limit=INCREMENTAL_CONFIG['feedback_limit'], since=since
+        )
+        if len(feedback_data) < RETRAIN_CONFIG['min_feedback_samples']:
+            return {
+                "status": "error",
+                "message": f"Need {RETRAIN_CONFIG['min_feedback_samples']}+ new feedbacks, got {len(feedback_data)}"
+            }
+        feedback_df = pd.DataFrame(feedback_data)
+        print(f"✅ {len(feedback_df)} new feedback samples")
+        
+        _progress('loading_dataset', 0.25)
+        # Step 3: Replay sample of history (original dataset, else older feedback)
+        dataset_path = os.path.join(RETRAIN_CONFIG['data_dir'], 'creditcard.csv')
+        if os.path.exists(dataset_path):
+            history_df, replay_source = load_dataset(dataset_path), 'creditcard.csv'
+        else:
+            older = get_feedback_data_for_retraining('credit_card', before=since) if since else []
+            history_df, replay_source = pd.DataFrame(older, columns=feedback_df.columns), 'feedback'
+        replay_df = replay_sample(history_df, INCREMENTAL_CONFIG['replay_rows'])
+        print(f"✅ Replay: {len(replay_df):,} samples from {replay_source}")
+        
+        # Only new feedback is held out: the active booster was trained on the replay rows
+        labels = feedback_df['Class'].astype(int)
+        stratify = labels if labels.value_counts().min() >= 2 and labels.nunique() > 1 else None
+        train_feedback, test_feedback = train_test_split(
+            feedback_df, test_size=RETRAIN_CONFIG['test_size'], random_state=42, stratify=stratify
+        )
+        combined_df = pd.concat([train_feedback, replay_df], ignore_index=True)
+        X_train = credit_card_frame(combined_df, feature_names)
+        y_train = combined_df['Class'].astype(int)
+        X_test = credit_card_frame(test_feedback, feature_names)
+        y_test = test_feedback['Class'].astype(int)
+        print(f"   Train: {len(X_train):,} (feedback + replay), Test: {len(X_test):,} held-out feedback, "
+              f"Fraud rate: {y_train.mean()*100:.2f}%")
+        
+        _progress('training', 0.4)
+        # Step 4: Continue boosting
+        print(f"🤖 Adding {INCREMENTAL_CONFIG['rounds']} trees "
+              f"(learning rate {INCREMENTAL_CONFIG['learning_rate']})...")
+        model, train_time = continue_training(base_model, X_train, y_train)
+        print(f"✅ Training complete in {train_time:.1f}s")
+        
+        _progress('evaluating', 0.8)
+        # Step 5: Compare with the active booster on the held-out feedback
+        baseline_metrics = evaluate(base_model, X_test, y_test)
+        new_metrics = evaluate(model, X_test, y_test)
+        deltas = metric_deltas(new_metrics, baseline_metrics)
+        print_metrics("Active booster:", baseline_metrics)
+        print_metrics("Updated booster:", new_metrics, baseline_metrics)
+        
+        improvement = deltas.get('f1_score', 0.0)
+        should_deploy = improvement >= RETRAIN_CONFIG['improvement_threshold']
+        comparison = {
+            'old_version': current_model['version'] if current_model else None,
+            'old_f1': baseline_metrics['f1_score'],
+            'new_f1': new_metrics['f1_score'],
+            'improvement': improvement,
+            'improvement_pct': improvement * 100
+        }
+        
+        # Last full retrain, for the cost comparison
+        with local_db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT version, performance_metrics
+                FROM model_versions
+                WHERE model_type = 'credit_card'
+                  AND performance_metrics->>'training_mode' = 'full'
+                ORDER BY created_at DESC
+                LIMIT 1
+            """)
+            last_full = cursor.fetchone()
+        
+        _progress('saving', 0.9)
+        # Step 6: Save + register
+        import uuid
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp_unique = f"{timestamp}_{str(uuid.uuid4())[:8]}"
+        model_path = f"models/fraud_model_cc_incremental_{timestamp_unique}.json"
+        model.save_model(model_path)
+        print(f"\n💾 Saved: {model_path}")
+        
+        wall_time = round(time.perf_counter() - started, 2)
+        vs_full = None
+        if last_full and last_full['performance_metrics'].get('wall_time_s'):
+            full_metrics = last_full['performance_metrics']
+            vs_full = {
+                'version': last_full['version'],
+                'full_wall_time_s': full_metrics['wall_time_s'],
+                'speedup': round(full_metrics['wall_time_s'] / wall_time, 1) if wall_time else None,
+                'metric_deltas': metric_deltas(new_metrics, full_metrics)
+            }
+        
+        version_name = f"cc_incremental_{timestamp_unique}"
+        with local_db.get_cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO model_versions (
+                    version, model_type, model_path, threshold, 
+                    performance_metrics, is_active
+                ) VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (
+                version_name,
+                'credit_card',
+                model_path,
+                threshold,
+                json.dumps({
+                    **new_metrics,
+                    'training_mode': 'incremental',
+                    'wall_time_s': wall_time,
+                    'train_time_s': round(train_time, 2),
+                    'base_version': comparison['old_version'],
+                    'base_trees': base_trees,
+                    'added_trees': INCREMENTAL_CONFIG['rounds'],
+                    'trained_samples': len(X_train),
+                    'test_samples': len(X_test),
+                    'feedback_samples': len(feedback_df),
+                    'replay_samples': len(replay_df),
+                    'replay_source': replay_source,
+                    'baseline_metrics': baseline_metrics,
+                    'metric_deltas': deltas,
+                    'vs_full_retrain': vs_full,
+                    'comparison': comparison
+                }),
+                False
+            ))
+            new_version_id = cursor.fetchone()['id']
+        
+        # Step 7: Activate if better than the active booster
+        if should_deploy:
+            with local_db.get_cursor() as cursor:
+                cursor.execute("UPDATE model_versions SET is_active = FALSE WHERE model_type = 'credit_card'")
+                cursor.execute("UPDATE model_versions SET is_active = TRUE WHERE id = %s", (new_version_id,))
+            write_manifest_entry('credit_card', version_name, model_path, threshold)
+            invalidate_active_model_version('credit_card')
+            print(f"✅ UPDATED MODEL ACTIVATED: {version_name}")
+        else:
+            print(f"⚠️  Updated model saved but NOT activated (F1 {improvement:+.4f}, "
+                  f"threshold {RETRAIN_CONFIG['improvement_threshold']})")
+        
+        print(f"⏱️  Incremental update wall time: {wall_time:.1f}s")
+        if vs_full:
+            print(f"   Last full retrain ({vs_full['version']}): {vs_full['full_wall_time_s']:.1f}s "
+                  f"-> {vs_full['speedup']}x faster")
+        print(f"{'='*70}\n")
+        
+        return {
+            "status": "success",
+            "model_type": "credit_card",
+            "training_mode": "incremental",
+            "wall_time_s": wall_time,
+            "version": version_name,
+            "base_version": comparison['old_version'],
+            "added_trees": INCREMENTAL_CONFIG['rounds'],
+            "samples_used": len(combined_df) + len(test_feedback),
+            "feedback_samples": len(feedback_df),
+            "replay_samples": len(replay_df),
+            "metrics": new_metrics,
+            "baseline_metrics": baseline_metrics,
+            "metric_deltas": deltas,
+            "vs_full_retrain": vs_full,
+            "comparison": comparison,
+            "deployed": should_deploy,
+            "model_path": model_path
+        }
+        
+    except Exception as e:
+        print(f"❌ CC incremental update error: {e}")
+        import traceback
+        traceback.print_exc()
+        return {"status": "error", "message": str(e) or type(e).__name__}
+    finally:
+        if local_db is not None:
+            local_db.close_all()
 
 # ============================================
 # BANKING RETRAINING (with synthetic dataset)
@@ -284,7 +585,8 @@ def retrain_banking_with_dataset():
     try:
         import time
         time.sleep(0.1)
-        
+        started = time.perf_counter()
+
         print(f"\n{'='*70}")
         print("🔄 BANKING RETRAINING (WITH SYNTHETIC DATASET)")
         print(f"{'='*70}")
@@ -293,6 +595,7 @@ def retrain_banking_with_dataset():
         local_db = Database()
         local_db.initialize_pool()
         
+        _progress('loading_dataset', 0.05)
         # Step 1: Load synthetic banking dataset
         print("📊 Loading synthetic banking dataset...")
         
@@ -317,7 +620,7 @@ def retrain_banking_with_dataset():
             print(f"⚠️  Falling back to feedback-only retraining")
             return retrain_banking_with_feedback_only()
         
-        original_df = pd.read_csv(dataset_path)
+        original_df = load_dataset(dataset_path)
         print(f"✅ Loaded {len(original_df):,} original samples from {os.path.basename(dataset_path)}")
         
         # Ensure Class column exists - handle multiple possible names
@@ -352,6 +655,7 @@ def retrain_banking_with_dataset():
             if old_name in original_df.columns:
                 original_df = original_df.rename(columns={old_name: new_name})
         
+        _progress('loading_feedback', 0.2)
         # Step 2: Load feedback data
         print("📊 Loading feedback samples...")
         feedback_data = get_feedback_data_for_retraining('banking', limit=1000)
@@ -396,6 +700,7 @@ def retrain_banking_with_dataset():
         
         print(f"   Fraud rate: {y.mean()*100:.2f}%")
         
+        _progress('preparing', 0.25)
         # Step 5: Train-test split
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=RETRAIN_CONFIG['test_size'], 
@@ -404,6 +709,7 @@ def retrain_banking_with_dataset():
         
         print(f"   Train: {len(X_train):,}, Test: {len(X_test):,}")
         
+        _progress('training', 0.3)
         # Step 6: Train new model
         print("🤖 Training RandomForest...")
         
@@ -412,12 +718,13 @@ def retrain_banking_with_dataset():
             max_depth=10,
             random_state=42,
             class_weight='balanced',
-            n_jobs=-1
+            n_jobs=RETRAIN_CONFIG['n_jobs']
         )
         
         model.fit(X_train, y_train)
         print("✅ Training complete")
         
+        _progress('evaluating', 0.8)
         # Step 7: Evaluate new model
         print("📊 Evaluating new model...")
         y_pred = model.predict(X_test)
@@ -480,6 +787,12 @@ def retrain_banking_with_dataset():
             print("   No current active model, will deploy new one")
             should_deploy = True
         
+        # Never activate what the registry would reject: the API would keep the
+        # old model while predictions got stamped with the new version
+        servable = _servable('banking', common_features)
+        should_deploy = should_deploy and servable
+        
+        _progress('saving', 0.9)
         # Step 9: Save new model with UNIQUE identifier (UUID)
         import uuid
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -518,8 +831,11 @@ def retrain_banking_with_dataset():
                 0.3,
                 json.dumps({
                     **new_metrics,
+                    'training_mode': 'full',
+                    'wall_time_s': round(time.perf_counter() - started, 2),
                     'trained_samples': len(combined_df),
                     'feedback_samples': len(feedback_df),
+                    'servable': servable,
                     'comparison': comparison
                 }),
                 False
@@ -527,13 +843,18 @@ def retrain_banking_with_dataset():
             
             new_version_id = cursor.fetchone()['id']
         
-        # Step 11: Activate if better
+        # Step 11: Activate if better (and servable)
         if should_deploy:
             with local_db.get_cursor() as cursor:
                 cursor.execute("UPDATE model_versions SET is_active = FALSE WHERE model_type = 'banking'")
                 cursor.execute("UPDATE model_versions SET is_active = TRUE WHERE id = %s", (new_version_id,))
             
+            # Let running servers hot-swap to the new version
+            write_manifest_entry('banking', version_name, model_path, 0.3)
+            invalidate_active_model_version('banking')
             print(f"✅ NEW MODEL ACTIVATED: {version_name}")
+        elif not servable:
+            print(f"⚠️  New model saved but NOT activated (the API can't serve its features)")
         else:
             print(f"⚠️  New model saved but NOT activated (current model is better)")
         
@@ -549,6 +870,7 @@ def retrain_banking_with_dataset():
             "feedback_samples": len(feedback_df),
             "metrics": new_metrics,
             "comparison": comparison,
+            "servable": servable,
             "deployed": should_deploy,
             "model_path": model_path
         }
@@ -557,7 +879,7 @@ def retrain_banking_with_dataset():
         print(f"❌ Banking retraining error: {e}")
         import traceback
         traceback.print_exc()
-        return {"status": "error", "message": str(e)}
+        return {"status": "error", "message": str(e) or type(e).__name__}
 
 def retrain_banking_with_feedback_only():
     """
@@ -575,6 +897,7 @@ def retrain_banking_with_feedback_only():
         local_db = Database()
         local_db.initialize_pool()
         
+        _progress('loading_feedback', 0.1)
         # Load feedback
         print("📊 Loading feedback samples...")
         feedback_data = get_feedback_data_for_retraining('banking', limit=1000)
@@ -600,6 +923,7 @@ def retrain_banking_with_feedback_only():
             stratify=y if len(y) > 10 else None
         )
         
+        _progress('training', 0.3)
         # Train model
         print("🤖 Training RandomForest...")
         model = RandomForestClassifier(
@@ -607,11 +931,12 @@ def retrain_banking_with_feedback_only():
             max_depth=10,
             random_state=42,
             class_weight='balanced',
-            n_jobs=-1
+            n_jobs=RETRAIN_CONFIG['n_jobs']
         )
         model.fit(X_train, y_train)
         print("✅ Training complete")
         
+        _progress('evaluating', 0.8)
         # Evaluate
         print("📊 Evaluating...")
         y_pred = model.predict(X_test)
@@ -662,7 +987,10 @@ def retrain_banking_with_feedback_only():
             should_deploy = improvement >= RETRAIN_CONFIG['improvement_threshold']
         else:
             should_deploy = True
+        servable = _servable('banking', feature_cols)
+        should_deploy = should_deploy and servable
         
+        _progress('saving', 0.9)
         # Save model
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
         model_path = f"models/fraud_model_banking_retrained_{timestamp}.pkl"
@@ -681,7 +1009,7 @@ def retrain_banking_with_feedback_only():
                 RETURNING id
             """, (
                 version_name, 'banking', model_path, 0.3,
-                json.dumps({**new_metrics, 'samples': len(df), 'comparison': comparison}),
+                json.dumps({**new_metrics, 'samples': len(df), 'servable': servable, 'comparison': comparison}),
                 False
             ))
             new_version_id = cursor.fetchone()['id']
@@ -691,7 +1019,11 @@ def retrain_banking_with_feedback_only():
             with local_db.get_cursor() as cursor:
                 cursor.execute("UPDATE model_versions SET is_active = FALSE WHERE model_type = 'banking'")
                 cursor.execute("UPDATE model_versions SET is_active = TRUE WHERE id = %s", (new_version_id,))
+            write_manifest_entry('banking', version_name, model_path, 0.3)
+            invalidate_active_model_version('banking')
             print(f"✅ NEW MODEL ACTIVATED")
+        elif not servable:
+            print(f"⚠️  Not activated (the API can't serve its features)")
         else:
             print(f"⚠️  Not activated (current is better)")
         
@@ -705,6 +1037,7 @@ def retrain_banking_with_feedback_only():
             "samples_used": len(df),
             "metrics": new_metrics,
             "comparison": comparison,
+            "servable": servable,
             "deployed": should_deploy
         }
         
@@ -712,7 +1045,7 @@ def retrain_banking_with_feedback_only():
         print(f"❌ Banking retraining error: {e}")
         import traceback
         traceback.print_exc()
-        return {"status": "error", "message": str(e)}
+        return {"status": "error", "message": str(e) or type(e).__name__}
 
 # ============================================
 # TESTING
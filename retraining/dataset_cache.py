@@ -0,0 +1,252 @@
+# retraining/dataset_cache.py - Typed columnar cache for the training CSVs
+"""
+Every retraining run used to re-parse data/creditcard.csv (~150 MB of text)
+into float64 columns. load_dataset() converts a CSV once into one .npy file
+per column and afterwards memory-maps those files:
+
+    data/creditcard.csv
+    data/.cache/creditcard/current.json            -> which build is current
+    data/.cache/creditcard/<sha256[:16]>/meta.json    source size/mtime/sha256, columns
+    data/.cache/creditcard/<sha256[:16]>/000.npy ...  one typed column each
+
+- Numeric columns keep the dtype pd.read_csv gives them (float64, int64,
+  bool), so a cached load and the read_csv fallback return identical
+  frames and training inputs never depend on whether the cache worked;
+  text is stored as fixed-width unicode
+- Loads are zero-copy: numeric columns are np.load(mmap_mode='c') views, so
+  pages come from the page cache and writes stay private to the process
+- The cache is keyed by the source's sha256. A load only re-hashes the CSV
+  when its size/mtime changed (or DATASET_CACHE_VERIFY=true); a changed
+  hash triggers a rebuild
+- Builds go to a temp dir and are renamed into place, so concurrent
+  retraining processes never see a half-written cache
+
+Any cache problem falls back to pd.read_csv.
+
+    python -m retraining.dataset_cache data/creditcard.csv    # build + time it
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DATASET_CACHE_CONFIG = {
+    'enabled': os.getenv('DATASET_CACHE_ENABLED', 'true').lower() == 'true',
+    'cache_dir': os.getenv('DATASET_CACHE_DIR'),        # default: <csv dir>/.cache
+    'verify': os.getenv('DATASET_CACHE_VERIFY', 'false').lower() == 'true'
+}
+
+CACHE_FORMAT = 2   # 1 stored floats as float32
+
+# ============================================
+# HASHING / LAYOUT
+# ============================================
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cache_root(path):
+    base = DATASET_CACHE_CONFIG['cache_dir'] or os.path.join(os.path.dirname(os.path.abspath(path)), '.cache')
+    return os.path.join(base, os.path.splitext(os.path.basename(path))[0])
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_json_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+# ============================================
+# BUILDING
+# ============================================
+def _column_array(series):
+    """
+    pandas column -> (numpy array, missing mask or None)
+
+    Numeric columns unchanged (read_csv's dtype); NaN stays NaN in float
+    columns, missing text is stored as '' plus a mask
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series) \
+            or pd.api.types.is_float_dtype(series):
+        return series.to_numpy(), None
+    missing = series.isna().to_numpy()
+    array = np.asarray(series.fillna('').astype(str).to_numpy(), dtype=str)
+    return array, (missing if missing.any() else None)
+
+def build_cache(path, sha256=None):
+    """
+    Parse path once and write the columnar cache.
+
+    Returns:
+        The build's meta dict
+    """
+    start = time.perf_counter()
+    stat = os.stat(path)
+    sha256 = sha256 or file_sha256(path)
+    root = _cache_root(path)
+    build_dir = os.path.join(root, sha256[:16])
+    os.makedirs(root, exist_ok=True)
+
+    if _read_json(os.path.join(build_dir, 'meta.json')) is None:
+        df = pd.read_csv(path)
+        tmp_dir = os.path.join(root, f".build-{uuid.uuid4().hex[:8]}")
+        os.makedirs(tmp_dir)
+        columns = []
+        for i, name in enumerate(df.columns):
+            array, missing = _column_array(df[name])
+            column = {'name': str(name), 'dtype': array.dtype.str, 'file': f"{i:03d}.npy"}
+            np.save(os.path.join(tmp_dir, column['file']), array, allow_pickle=False)
+            if missing is not None:
+                column['missing'] = f"{i:03d}.missing.npy"
+                np.save(os.path.join(tmp_dir, column['missing']), missing, allow_pickle=False)
+            columns.append(column)
+        _write_json_atomic(os.path.join(tmp_dir, 'meta.json'), {
+            'format': CACHE_FORMAT,
+            'source': os.path.abspath(path),
+            'sha256': sha256,
+            'rows': len(df),
+            'columns': columns,
+            'source_bytes': stat.st_size,
+            'cache_bytes': sum(os.path.getsize(os.path.join(tmp_dir, f)) for f in os.listdir(tmp_dir)),
+            'built_at': datetime.now().isoformat(),
+            'build_s': round(time.perf_counter() - start, 2)
+        })
+        try:
+            os.rename(tmp_dir, build_dir)
+        except OSError:
+            # Another process finished the same build first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        del df
+
+    _write_json_atomic(os.path.join(root, 'current.json'), {
+        'build': sha256[:16], 'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns
+    })
+    _remove_stale_builds(root, keep=sha256[:16])
+    meta = _read_json(os.path.join(build_dir, 'meta.json'))
+    print(f"🗄️  Cached {os.path.basename(path)}: {meta['rows']:,} rows, {len(meta['columns'])} columns, "
+          f"{meta['source_bytes'] / 1e6:.0f} MB CSV -> {meta['cache_bytes'] / 1e6:.0f} MB columnar")
+    return meta
+
+def _remove_stale_builds(root, keep):
+    # Processes still mapping an old build keep their pages after the unlink
+    for entry in os.listdir(root):
+        entry_path = os.path.join(root, entry)
+        if entry != keep and os.path.isdir(entry_path) and not entry.startswith('.build-'):
+            shutil.rmtree(entry_path, ignore_errors=True)
+
+# ============================================
+# LOADING
+# ============================================
+def _current_meta(path, verify):
+    """Meta of a cache build matching path's contents (None = needs a build)"""
+    root = _cache_root(path)
+    current = _read_json(os.path.join(root, 'current.json'))
+    if not current:
+        return None, None
+    meta = _read_json(os.path.join(root, current['build'], 'meta.json'))
+    if not meta or meta.get('format') != CACHE_FORMAT:
+        return None, None
+
+    stat = os.stat(path)
+    if not verify and current['size'] == stat.st_size and current['mtime_ns'] == stat.st_mtime_ns:
+        return meta, current['sha256']
+
+    sha256 = file_sha256(path)
+    if sha256 != meta['sha256']:
+        return None, sha256
+    # Same content, new mtime (copied / touched): just refresh the stat
+    _write_json_atomic(os.path.join(root, 'current.json'), {
+        **current, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns
+    })
+    return meta, sha256
+
+def load_dataset(path, columns=None, verify=None):
+    """
+    The CSV at path as a DataFrame, from the columnar cache (built on first use).
+
+    columns: optional subset to load. Numeric columns are zero-copy memory maps.
+    """
+    if not DATASET_CACHE_CONFIG['enabled']:
+        return pd.read_csv(path, usecols=columns)
+    verify = DATASET_CACHE_CONFIG['verify'] if verify is None else verify
+
+    try:
+        meta, sha256 = _current_meta(path, verify)
+        if meta is None:
+            meta = build_cache(path, sha256)
+        build_dir = os.path.join(_cache_root(path), meta['sha256'][:16])
+        wanted = meta['columns'] if columns is None else [c for c in meta['columns'] if c['name'] in set(columns)]
+        data = {}
+        for column in wanted:
+            array = np.load(os.path.join(build_dir, column['file']), mmap_mode='c', allow_pickle=False)
+            if 'missing' in column:
+                array = array.astype(object)
+                array[np.load(os.path.join(build_dir, column['missing']))] = np.nan
+            data[column['name']] = array
+        return pd.DataFrame(data, copy=False)
+    except Exception as e:
+        print(f"⚠️  Dataset cache unavailable for {path} ({e}), reading CSV")
+        return pd.read_csv(path, usecols=columns)
+
+def cache_info(path):
+    """Meta of the current cache build for path (None if not cached)"""
+    current = _read_json(os.path.join(_cache_root(path), 'current.json'))
+    if not current:
+        return None
+    return _read_json(os.path.join(_cache_root(path), current['build'], 'meta.json'))
+
+# ============================================
+# CLI
+# ============================================
+def main():
+    import argparse
+    import resource
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help="CSV files to cache")
+    parser.add_argument('--rebuild', action='store_true', help="rebuild even if the cache is current")
+    parser.add_argument('--compare', action='store_true', help="also time pd.read_csv on the same file")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"❌ Not found: {path}", file=sys.stderr)
+            continue
+        if args.rebuild:
+            shutil.rmtree(_cache_root(path), ignore_errors=True)
+        load_dataset(path)   # builds if needed
+
+        start = time.perf_counter()
+        df = load_dataset(path)
+        load_s = time.perf_counter() - start
+        touch_start = time.perf_counter()
+        numeric_sum = float(df.select_dtypes('number').sum().sum())   # actually reads the pages
+        touch_s = time.perf_counter() - touch_start
+        print(f"✅ {path}: load {load_s * 1000:.1f} ms, full scan {touch_s * 1000:.0f} ms "
+              f"({len(df):,} rows, checksum {numeric_sum:.6g})")
+
+        if args.compare:
+            start = time.perf_counter()
+            pd.read_csv(path)
+            print(f"   pd.read_csv: {(time.perf_counter() - start) * 1000:.0f} ms")
+        print(f"   peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+if __name__ == "__main__":
+    main()
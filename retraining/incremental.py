@@ -0,0 +1,141 @@
+# retraining/incremental.py - Incremental XGBoost retraining from the active booster
+"""
+Instead of re-fitting 100 trees on the full dataset every time the feedback
+threshold is crossed, continue boosting from the model that is serving:
+
+    active booster (xgb_model) + new feedback + replay sample of history
+        -> INCREMENTAL_ROUNDS extra trees at a lower learning rate
+
+The replay sample keeps the new trees from over-fitting to the (small, biased)
+feedback set. Features are built with the serving pipeline for the booster's
+own feature names, so the continued model scores exactly what production sends.
+
+auto_retrain_dual.retrain_credit_card_with_dataset(mode='incremental') uses
+these helpers; benchmarks/bench_incremental_retrain.py compares them with a
+full retrain (wall time and metric deltas).
+"""
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from xgboost import XGBClassifier
+from sklearn.metrics import (
+    accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+)
+
+from features.batch_features import build_credit_card_matrix
+
+INCREMENTAL_CONFIG = {
+    'mode': os.getenv('RETRAIN_MODE', 'full'),                     # "full" | "incremental"
+    'rounds': int(os.getenv('INCREMENTAL_ROUNDS', 50)),            # trees added per update
+    'learning_rate': float(os.getenv('INCREMENTAL_LEARNING_RATE', 0.05)),
+    'max_depth': int(os.getenv('INCREMENTAL_MAX_DEPTH', 6)),
+    'replay_rows': int(os.getenv('INCREMENTAL_REPLAY_ROWS', 20000)),
+    'feedback_limit': int(os.getenv('INCREMENTAL_FEEDBACK_LIMIT', 5000)),
+    # The base booster is already calibrated; "balanced" reweights by neg/pos like a full retrain
+    'scale_pos_weight': os.getenv('INCREMENTAL_SCALE_POS_WEIGHT', '1'),
+    'max_trees': int(os.getenv('INCREMENTAL_MAX_TREES', 2000)),    # force a full retrain beyond this
+    'n_jobs': int(os.getenv('RETRAIN_N_JOBS', -1))
+}
+
+METRIC_NAMES = ('accuracy', 'precision', 'recall', 'f1_score', 'roc_auc')
+
+# ============================================
+# DATA
+# ============================================
+def load_booster_model(model_path):
+    """XGBClassifier for a saved .json/.ubj booster (None if the model isn't XGBoost)"""
+    if not model_path or not model_path.endswith(('.json', '.ubj')) or not os.path.exists(model_path):
+        return None
+    model = XGBClassifier()
+    model.load_model(model_path)
+    return model
+
+def booster_feature_names(model):
+    names = model.get_booster().feature_names
+    if not names:
+        raise ValueError("Booster has no feature names; can't align training columns")
+    return list(names)
+
+def credit_card_frame(df, feature_names):
+    """
+    Raw Time/V1-V28/Amount rows -> serving feature matrix, in the booster's column order.
+
+    Raises:
+        ValueError: If the booster uses a feature the serving pipeline can't build
+    """
+    records = df.drop(columns=['Class'], errors='ignore').to_dict('records')
+    X = build_credit_card_matrix(records, feature_names)
+    if X.shape[1] != len(feature_names):
+        raise ValueError(f"Booster expects {len(feature_names)} features, serving pipeline builds {X.shape[1]}")
+    return pd.DataFrame(X, columns=feature_names)
+
+def replay_sample(history_df, n, seed=42):
+    """Stratified random sample of n history rows (same fraud rate as history)"""
+    if history_df is None or len(history_df) == 0 or n <= 0:
+        return history_df.iloc[:0] if history_df is not None else None
+    if len(history_df) <= n:
+        return history_df
+    frac = n / len(history_df)
+    parts = [group.sample(max(1, int(round(len(group) * frac))), random_state=seed)
+             for _, group in history_df.groupby('Class')]
+    return pd.concat(parts)
+
+# ============================================
+# TRAINING
+# ============================================
+def continue_training(base_model, X_train, y_train, rounds=None, learning_rate=None, max_depth=None):
+    """
+    Add `rounds` trees on top of base_model's booster.
+
+    Returns:
+        (model, wall_time_s) - a new XGBClassifier holding old + new trees
+    """
+    scale_pos_weight = INCREMENTAL_CONFIG['scale_pos_weight']
+    if scale_pos_weight == 'balanced':
+        neg, pos = int((y_train == 0).sum()), int((y_train == 1).sum())
+        scale_pos_weight = (neg / pos) if pos else 1.0
+    model = XGBClassifier(
+        n_estimators=rounds or INCREMENTAL_CONFIG['rounds'],
+        learning_rate=learning_rate or INCREMENTAL_CONFIG['learning_rate'],
+        max_depth=max_depth or INCREMENTAL_CONFIG['max_depth'],
+        scale_pos_weight=float(scale_pos_weight),
+        random_state=42,
+        n_jobs=INCREMENTAL_CONFIG['n_jobs'],
+        eval_metric='logloss'
+    )
+    start = time.perf_counter()
+    model.fit(X_train, y_train, xgb_model=base_model.get_booster(), verbose=False)
+    return model, time.perf_counter() - start
+
+def evaluate(model, X, y):
+    """Same metrics the full retrain stores in model_versions.performance_metrics"""
+    y_pred = model.predict(X)
+    y_proba = model.predict_proba(X)[:, 1]
+    metrics = {
+        'accuracy': float(accuracy_score(y, y_pred)),
+        'precision': float(precision_score(y, y_pred, zero_division=0)),
+        'recall': float(recall_score(y, y_pred, zero_division=0)),
+        'f1_score': float(f1_score(y, y_pred, zero_division=0))
+    }
+    metrics['roc_auc'] = float(roc_auc_score(y, y_proba)) if len(np.unique(y)) > 1 else None
+    return metrics
+
+def metric_deltas(new, old):
+    """new - old for every metric both sides have"""
+    return {
+        name: round(new[name] - old[name], 6)
+        for name in METRIC_NAMES
+        if new.get(name) is not None and old.get(name) is not None
+    }
+
+def print_metrics(label, metrics, baseline=None):
+    deltas = metric_deltas(metrics, baseline) if baseline else {}
+    print(f"   {label}")
+    for name in METRIC_NAMES:
+        if metrics.get(name) is None:
+            continue
+        delta = f"  ({deltas[name]:+.4f})" if name in deltas else ""
+        print(f"     {name:<10} {metrics[name]:.4f}{delta}")
@@ -0,0 +1,222 @@
+# retraining/jobs.py - Retraining job queue (PostgreSQL)
+"""
+Web workers only enqueue retraining; retraining.worker runs the jobs in its
+own process. Everything goes through the retrain_jobs table:
+
+    queued -> running -> succeeded | failed
+
+- At most one queued/running job per model type (partial unique index), so
+  every gunicorn worker can call enqueue_job() without double-triggering
+- Runners claim jobs with FOR UPDATE SKIP LOCKED and hold a session advisory
+  lock (RETRAIN_JOB_LOCK_KEY) while training, so only one job trains at a
+  time across all processes and hosts
+- Runners write stage/progress and a heartbeat while a job runs; a job left
+  running by a crashed runner is failed by the next runner to take the lock
+- enqueue_job() NOTIFYs the runner, which otherwise polls
+
+Kept free of pandas/scikit-learn/xgboost so the web process can import it.
+"""
+
+import json
+import os
+import socket
+
+from database.db_dual import db, convert_decimals
+
+JOB_CONFIG = {
+    'lock_key': int(os.getenv('RETRAIN_JOB_LOCK_KEY', 727001)),
+    # Held by a runner for its whole life: one runner per database, however many masters start one
+    'runner_lock_key': int(os.getenv('RETRAIN_RUNNER_LOCK_KEY', 727003)),   # 727002: feedback counters DDL
+    'channel': 'retrain_jobs'
+}
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+JOBS_DDL = """
+    CREATE TABLE IF NOT EXISTS retrain_jobs (
+        id SERIAL PRIMARY KEY,
+        model_type VARCHAR(20) NOT NULL CHECK (model_type IN ('banking', 'credit_card')),
+        mode VARCHAR(20),
+        trigger VARCHAR(20) NOT NULL DEFAULT 'manual',
+        status VARCHAR(20) NOT NULL DEFAULT 'queued'
+            CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+        feedback_count INTEGER,
+        stage TEXT,
+        progress REAL DEFAULT 0,
+        worker VARCHAR(100),
+        result JSONB,
+        error TEXT,
+        requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        heartbeat_at TIMESTAMP,
+        finished_at TIMESTAMP
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_retrain_jobs_active
+        ON retrain_jobs(model_type) WHERE status IN ('queued', 'running');
+    CREATE INDEX IF NOT EXISTS idx_retrain_jobs_requested ON retrain_jobs(requested_at DESC);
+"""
+
+_table_ready = False
+
+def ensure_job_table():
+    """Create retrain_jobs if this database predates it (once per process)"""
+    global _table_ready
+    if _table_ready:
+        return
+    with db.get_cursor() as cursor:
+        cursor.execute(JOBS_DDL)
+    _table_ready = True
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _job(row):
+    return convert_decimals(dict(row)) if row else None
+
+# ============================================
+# WEB SIDE
+# ============================================
+def enqueue_job(model_type, mode=None, trigger='manual', feedback_count=None):
+    """
+    Queue a retraining job unless one is already queued/running for model_type.
+
+    Returns:
+        (job, created) - the new job, or the existing active one with created=False
+    """
+    ensure_job_table()
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO retrain_jobs (model_type, mode, trigger, feedback_count)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (model_type) WHERE status IN ('queued', 'running') DO NOTHING
+            RETURNING *
+        """, (model_type, mode, trigger, feedback_count))
+        row = cursor.fetchone()
+        if row is not None:
+            cursor.execute(f"NOTIFY {JOB_CONFIG['channel']}")
+            return _job(row), True
+        cursor.execute("""
+            SELECT * FROM retrain_jobs
+            WHERE model_type = %s AND status IN ('queued', 'running')
+        """, (model_type,))
+        return _job(cursor.fetchone()), False
+
+def get_job(job_id):
+    ensure_job_table()
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT * FROM retrain_jobs WHERE id = %s", (job_id,))
+        return _job(cursor.fetchone())
+
+def list_jobs(limit=20, model_type=None):
+    ensure_job_table()
+    with db.get_cursor() as cursor:
+        if model_type:
+            cursor.execute("SELECT * FROM retrain_jobs WHERE model_type = %s ORDER BY id DESC LIMIT %s",
+                           (model_type, limit))
+        else:
+            cursor.execute("SELECT * FROM retrain_jobs ORDER BY id DESC LIMIT %s", (limit,))
+        return [_job(row) for row in cursor.fetchall()]
+
+def active_jobs():
+    """{model_type: job} for queued/running jobs"""
+    ensure_job_table()
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT * FROM retrain_jobs WHERE status IN ('queued', 'running')")
+        return {row['model_type']: _job(row) for row in cursor.fetchall()}
+
+# ============================================
+# RUNNER SIDE
+# ============================================
+def claim_next_job(worker=None):
+    """Mark the oldest queued job running and return it (None if the queue is empty)"""
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            UPDATE retrain_jobs SET
+                status = 'running',
+                worker = %s,
+                stage = 'starting',
+                progress = 0,
+                started_at = CURRENT_TIMESTAMP,
+                heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = (
+                SELECT id FROM retrain_jobs
+                WHERE status = 'queued'
+                ORDER BY requested_at, id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+        """, (worker or worker_name(),))
+        return _job(cursor.fetchone())
+
+def update_progress(job_id, stage, progress=None):
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            UPDATE retrain_jobs SET
+                stage = %s,
+                progress = COALESCE(%s, progress),
+                heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status = 'running'
+        """, (stage, progress, job_id))
+
+def heartbeat(job_id):
+    with db.get_cursor() as cursor:
+        cursor.execute("UPDATE retrain_jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE id = %s", (job_id,))
+
+def finish_job(job_id, status, result=None, error=None):
+    """
+    Record a running job's outcome.
+
+    A succeeded job also moves its model's auto-retrain watermark to the
+    feedback count it was queued at (same transaction); a failed one leaves
+    it, so the labels it was meant to train on still count toward a retry.
+    """
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            UPDATE retrain_jobs SET
+                status = %s,
+                progress = CASE WHEN %s = 'succeeded' THEN 1 ELSE progress END,
+                stage = %s,
+                result = %s,
+                error = %s,
+                finished_at = CURRENT_TIMESTAMP,
+                heartbeat_at = CURRENT_TIMESTAMP
+            WHERE id = %s AND status = 'running'
+        """, (status, status, status, json.dumps(result, default=str) if result is not None else None,
+              error, job_id))
+        if status == 'succeeded':
+            cursor.execute("""
+                UPDATE feedback_counters c
+                SET last_trigger_count = GREATEST(c.last_trigger_count, j.feedback_count)
+                FROM retrain_jobs j
+                WHERE j.id = %s AND j.status = 'succeeded'
+                  AND j.feedback_count IS NOT NULL AND c.model_type = j.model_type
+            """, (job_id,))
+
+def fail_orphaned_jobs():
+    """
+    Fail jobs left 'running' by a runner that died.
+
+    Only call while holding the job lock: runners take the lock before
+    claiming, so no live runner can own a running job then.
+    """
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            UPDATE retrain_jobs SET
+                status = 'failed',
+                error = COALESCE(error, 'Runner stopped before the job finished'),
+                finished_at = CURRENT_TIMESTAMP
+            WHERE status = 'running'
+            RETURNING id
+        """)
+        return [row['id'] for row in cursor.fetchall()]
+
+def requeue_job(job_id):
+    """Put a running job back in the queue (runner shutting down)"""
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            UPDATE retrain_jobs SET
+                status = 'queued', stage = NULL, progress = 0, worker = NULL,
+                started_at = NULL, heartbeat_at = NULL
+            WHERE id = %s AND status = 'running'
+        """, (job_id,))
@@ -0,0 +1,337 @@
+# retraining/worker.py - Out-of-process retraining runner
+"""
+Runs the jobs queued in retrain_jobs (see retraining/jobs.py) so training
+never shares a process - or the CPU budget - with the web workers.
+
+Each job runs in a fresh spawned child process that:
+- is pinned to RETRAIN_MAX_THREADS CPUs (sched_setaffinity) with
+  OMP/OpenBLAS/MKL/XGBoost/scikit-learn threads capped to the same number
+- runs at nice RETRAIN_NICE, so request handling wins any CPU contention
+- has its address space capped at RETRAIN_MAX_MEMORY_MB (RLIMIT_AS); a
+  retrain that outgrows it fails the job instead of pushing the web
+  workers into swap or the OOM killer
+- is killed after RETRAIN_JOB_TIMEOUT seconds
+
+The runner itself only waits on LISTEN/NOTIFY (or polls), heartbeats the
+running job and records the outcome. A session advisory lock held for the
+runner's lifetime makes sure only one runs per database: a runner started
+while another is alive (a second gunicorn master, a replica) exits.
+
+    python -m retraining.worker            # run until SIGTERM
+    python -m retraining.worker --once     # drain the queue and exit
+
+gunicorn.conf.py / app.py start one automatically when the database is
+reachable (RETRAIN_WORKER_AUTOSTART).
+"""
+
+import multiprocessing as mp
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+import traceback
+
+import psycopg2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_dual import db, init_database
+from retraining.jobs import (
+    JOB_CONFIG,
+    ensure_job_table,
+    worker_name,
+    get_job,
+    claim_next_job,
+    heartbeat,
+    finish_job,
+    fail_orphaned_jobs,
+    requeue_job
+)
+
+WORKER_CONFIG = {
+    'autostart': os.getenv('RETRAIN_WORKER_AUTOSTART', 'true').lower() == 'true',
+    'max_threads': int(os.getenv('RETRAIN_MAX_THREADS', max(1, (os.cpu_count() or 2) // 2))),
+    'max_memory_mb': int(os.getenv('RETRAIN_MAX_MEMORY_MB', 4096)),    # 0 = no limit
+    'nice': int(os.getenv('RETRAIN_NICE', 10)),
+    'poll_interval': float(os.getenv('RETRAIN_POLL_INTERVAL', 5)),
+    'heartbeat_interval': float(os.getenv('RETRAIN_HEARTBEAT_INTERVAL', 5)),
+    'job_timeout': int(os.getenv('RETRAIN_JOB_TIMEOUT', 3600))
+}
+
+# Read by the native thread pools at import time, so they're set before the child starts
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS', 'LOKY_MAX_CPU_COUNT', 'RETRAIN_N_JOBS'
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_stopping = False
+_runner = None      # the process start_background_runner() started from this process
+
+# ============================================
+# CHILD PROCESS (one per job)
+# ============================================
+def _die_with_runner():
+    # Linux: SIGKILL this child if the runner dies, so a killed runner never leaves a training orphan
+    try:
+        import ctypes
+        ctypes.CDLL(None, use_errno=True).prctl(1, signal.SIGKILL)   # PR_SET_PDEATHSIG
+    except (OSError, AttributeError):
+        pass
+
+def _apply_limits(config):
+    """CPU pinning and niceness for the current process"""
+    limits = []
+    if config['max_threads'] > 0 and hasattr(os, 'sched_setaffinity'):
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, cpus[-config['max_threads']:])
+        limits.append(f"cpus {sorted(os.sched_getaffinity(0))}")
+    if config['nice'] > 0:
+        limits.append(f"nice {os.nice(config['nice'])}")
+    return limits
+
+def _cap_memory(config):
+    """
+    RLIMIT_AS for the current process. Applied after the training libraries
+    are imported: OpenBLAS spins instead of failing when it can't map its
+    buffers while loading
+    """
+    if config['max_memory_mb'] <= 0:
+        return None
+    try:
+        import resource
+        limit = config['max_memory_mb'] * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        return f"memory {config['max_memory_mb']} MB"
+    except (ImportError, ValueError, OSError) as e:
+        print(f"⚠️  Could not cap memory: {e}")
+        return None
+
+def _run_job(job, config):
+    """Child entry point: train, then record the result on the job row"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)   # the runner decides when to stop
+    _die_with_runner()
+    limits = _apply_limits(config)
+
+    from retraining.jobs import update_progress
+    try:
+        from retraining import auto_retrain_dual
+        limits.append(_cap_memory(config))
+        print(f"🧵 Job {job['id']} ({job['model_type']}) in pid {os.getpid()}: "
+              f"{', '.join(l for l in limits if l) or 'no limits'}")
+        auto_retrain_dual.set_progress_callback(lambda stage, fraction: update_progress(job['id'], stage, fraction))
+
+        if job['model_type'] == 'banking':
+            result = auto_retrain_dual.retrain_banking_with_dataset()
+        else:
+            result = auto_retrain_dual.retrain_credit_card_with_dataset(mode=job['mode'])
+        result = result or {}
+    except Exception as e:
+        traceback.print_exc()
+        result = {'status': 'error', 'message': str(e) or type(e).__name__}
+
+    if result.get('status') == 'success':
+        finish_job(job['id'], 'succeeded', result)
+        return
+    # The retrain functions report exceptions (MemoryError included) as status "error"
+    error = result.get('message') or 'Retraining failed'
+    if error == 'MemoryError':
+        error = f"Out of memory (RETRAIN_MAX_MEMORY_MB={config['max_memory_mb']})"
+    finish_job(job['id'], 'failed', result, error)
+
+# ============================================
+# RUNNER
+# ============================================
+def _handle_stop(signum, frame):
+    global _stopping
+    _stopping = True
+
+def run_job(job, config=None):
+    """Run one claimed job in a limited child process; returns the final job row"""
+    config = config or WORKER_CONFIG
+    print(f"\n🎯 Retrain job {job['id']}: {job['model_type']}"
+          f"{' (' + job['mode'] + ')' if job.get('mode') else ''}, trigger {job['trigger']}")
+
+    process = mp.get_context('spawn').Process(
+        target=_run_job, args=(job, config), name=f"retrain-job-{job['id']}"
+    )
+    started = time.monotonic()
+    process.start()
+
+    while True:
+        process.join(config['heartbeat_interval'])
+        if process.exitcode is not None:
+            break
+        heartbeat(job['id'])
+        if _stopping:
+            print(f"🛑 Runner stopping - job {job['id']} goes back to the queue")
+            process.terminate()
+            process.join(10)
+            requeue_job(job['id'])
+            return get_job(job['id'])
+        if time.monotonic() - started > config['job_timeout']:
+            process.terminate()
+            process.join(10)
+            if process.is_alive():
+                process.kill()
+            finish_job(job['id'], 'failed', error=f"Timed out after {config['job_timeout']}s")
+            break
+
+    final = get_job(job['id'])
+    if final and final['status'] == 'running':
+        # Child died before recording a result (killed, segfault, ...)
+        finish_job(job['id'], 'failed', error=f"Retraining process exited with code {process.exitcode}")
+        final = get_job(job['id'])
+
+    icon = "✅" if final and final['status'] == 'succeeded' else "❌"
+    print(f"{icon} Job {job['id']} {final['status'] if final else 'missing'} "
+          f"in {time.monotonic() - started:.1f}s{': ' + final['error'] if final and final.get('error') else ''}")
+    return final
+
+def _try_lock(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", (JOB_CONFIG['lock_key'],))
+        return cursor.fetchone()[0]
+
+def _unlock(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (JOB_CONFIG['lock_key'],))
+
+def drain_queue(conn, config=None):
+    """Run queued jobs until the queue is empty; returns how many ran (None if another runner holds the lock)"""
+    config = config or WORKER_CONFIG
+    if not _try_lock(conn):
+        return None
+    try:
+        orphaned = fail_orphaned_jobs()
+        if orphaned:
+            print(f"⚠️  Marked jobs {orphaned} failed (their runner stopped)")
+        ran = 0
+        while not _stopping:
+            job = claim_next_job(worker_name())
+            if job is None:
+                break
+            run_job(job, config)
+            ran += 1
+        return ran
+    finally:
+        _unlock(conn)
+
+def _listen_connection():
+    """
+    Dedicated session holding the runner lock, LISTEN and the job lock (never
+    returned to a pool). None if another runner holds the runner lock.
+    """
+    conn = psycopg2.connect(**db.config)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", (JOB_CONFIG['runner_lock_key'],))
+        if not cursor.fetchone()[0]:
+            conn.close()
+            return None
+        cursor.execute(f"LISTEN {JOB_CONFIG['channel']}")
+    return conn
+
+def _wait_for_notify(conn, timeout):
+    if select.select([conn], [], [], timeout) != ([], [], []):
+        conn.poll()
+        conn.notifies.clear()
+
+def run(once=False, config=None):
+    config = config or WORKER_CONFIG
+    os.environ.update({var: str(config['max_threads']) for var in THREAD_ENV_VARS})
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, _handle_stop)
+
+    if not init_database():
+        print("❌ Retraining worker needs the database (DATABASE_URL)")
+        return 1
+    ensure_job_table()
+
+    print(f"\n🏭 Retraining worker {worker_name()}: {config['max_threads']} threads, nice {config['nice']}, "
+          f"memory {config['max_memory_mb'] or 'unlimited'} MB, timeout {config['job_timeout']}s")
+
+    conn = None
+    while not _stopping:
+        try:
+            if conn is None or conn.closed:
+                conn = _listen_connection()
+                if conn is None:
+                    print("⏭️  Another retraining worker is already running for this database")
+                    return 0
+            ran = drain_queue(conn, config)
+            if once:
+                if ran is None:
+                    print("⏭️  Another runner holds the job lock")
+                break
+        except psycopg2.Error as e:
+            print(f"❌ Retraining worker database error: {e}")
+            if conn is not None:
+                conn.close()
+            conn = None
+            if once:
+                return 1
+            time.sleep(config['poll_interval'])
+            continue
+        _wait_for_notify(conn, config['poll_interval'])
+
+    if conn is not None:
+        conn.close()
+    print("👋 Retraining worker stopped")
+    return 0
+
+# ============================================
+# AUTOSTART (next to the web server)
+# ============================================
+def database_reachable(timeout=5):
+    """One short connection attempt with the app's DB config"""
+    try:
+        psycopg2.connect(**db.config, connect_timeout=timeout).close()
+        return True
+    except psycopg2.Error:
+        return False
+
+def start_background_runner():
+    """
+    Start `python -m retraining.worker` as a subprocess, once per process.
+
+    None if RETRAIN_WORKER_AUTOSTART=false or the database isn't reachable;
+    the already started process if it's still running.
+    """
+    global _runner
+    if not WORKER_CONFIG['autostart']:
+        return None
+    if _runner is not None and _runner.poll() is None:
+        return _runner
+    if not database_reachable():
+        print("⏭️  Retraining worker not started: database unavailable")
+        return None
+    try:
+        _runner = subprocess.Popen([sys.executable, '-m', 'retraining.worker'], cwd=REPO_ROOT)
+        print(f"✅ Retraining worker started (pid {_runner.pid})")
+        return _runner
+    except OSError as e:
+        print(f"⚠️  Could not start retraining worker: {e}")
+        return None
+
+def stop_background_runner(process, timeout=15):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', action='store_true', help="drain the queue and exit")
+    args = parser.parse_args()
+    sys.exit(run(once=args.once))
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from flask import request, jsonify
 import os
 from datetime import datetime, timedelta
 import hashlib
+import ipaddress
 import secrets
 from logging_config import log_security_event, security_logger
 
@@ -21,6 +22,8 @@ RATE_LIMIT = {
 # In-memory rate limiting (use Redis in production)
 request_history = {}
 
+_api_keys_loaded = False
+
 # ============================================
 # API KEY MANAGEMENT
 # ============================================
@@ -90,6 +93,45 @@ def require_api_key(f):
     
     return decorated_function
 
+def _is_loopback(address):
+    try:
+        return ipaddress.ip_address(address).is_loopback
+    except ValueError:
+        return False
+
+def require_admin(f):
+    """
+    Decorator for operational endpoints (model reload, retraining triggers):
+    the API key when FRAUD_DETECTION_API_KEY is set, otherwise loopback
+    clients only
+    """
+    api_key_required = require_api_key(f)
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        global _api_keys_loaded
+        if not _api_keys_loaded:
+            _api_keys_loaded = True
+            if not API_KEYS:
+                load_api_keys()
+        if API_KEYS:
+            return api_key_required(*args, **kwargs)
+
+        if not _is_loopback(request.remote_addr or ''):
+            log_security_event(
+                'AUTH_FAILURE',
+                'HIGH',
+                f'Admin endpoint {request.path} called remotely with auth disabled',
+                request.remote_addr
+            )
+            return jsonify({
+                'status': 'error',
+                'message': 'Admin endpoint: local requests only (set FRAUD_DETECTION_API_KEY to call it remotely)'
+            }), 403
+        return f(*args, **kwargs)
+
+    return decorated_function
+
 # ============================================
 # RATE LIMITING
 # ============================================
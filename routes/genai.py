@@ -1,22 +1,61 @@
 # genai_dual.py - Enhanced GenAI explainer for Credit Card and Banking fraud
-from groq import Groq
 from dotenv import load_dotenv
-import hashlib, json, os
+from types import SimpleNamespace
+import hashlib, json, os, time
+
+from serving.explanation_cache import ExplanationCache
+from serving.single_flight import SingleFlight
 
 # Load environment
 load_dotenv(".env")
 API_KEY = os.getenv("GROQ_API_KEY")
 
-if API_KEY:
+# GENAI_PROVIDER: "groq" (default) or "mock" (local stand-in for tests/benchmarks)
+GENAI_PROVIDER = os.getenv("GENAI_PROVIDER", "groq").lower()
+MOCK_LATENCY = float(os.getenv("GENAI_MOCK_LATENCY", 1.0))
+
+# ============================================
+# MOCK LLM (same call shape as the Groq client)
+# ============================================
+class MockLLMClient:
+    """Local LLM stand-in: sleeps `latency` seconds and returns a canned analysis"""
+
+    def __init__(self, latency=MOCK_LATENCY):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        risk_line = next((l for l in prompt.splitlines() if "Fraud Risk:" in l), "• Fraud Risk: n/a")
+        content = (f"[mock:{model}] Analysis for transaction with {risk_line.strip('• ').lower()}. "
+                   f"Prompt had {len(prompt.split())} words.")
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+if GENAI_PROVIDER == "mock":
+    client = MockLLMClient()
+    GROQ_AVAILABLE = True
+    print(f"🧪 GenAI: using mock LLM ({MOCK_LATENCY}s latency)")
+elif API_KEY:
+    from groq import Groq
     client = Groq(api_key=API_KEY)
     GROQ_AVAILABLE = True
 else:
     print("⚠️  GROQ_API_KEY not found - using fallback explanations")
     GROQ_AVAILABLE = False
 
+# Stored in predictions.ai_provider
+AI_PROVIDER = GENAI_PROVIDER if GROQ_AVAILABLE else "fallback"
+
 MODEL_NAME = "llama-3.3-70b-versatile"
-CACHE_FILE = "genai_cache.json"
-CACHE = json.load(open(CACHE_FILE)) if os.path.exists(CACHE_FILE) else {}
+
+# LRU + TTL in memory, backed by a SQLite file shared by all workers
+CACHE = ExplanationCache()
+# In-flight LLM calls by cache key
+INFLIGHT = SingleFlight()
 
 # ============================================
 # FEATURE MEANINGS - BANKING
@@ -142,8 +181,9 @@ def explain_transaction(top_features, fraud_prob, amount, model_type="banking"):
     key_raw = json.dumps(top_features, sort_keys=True) + str(round(fraud_prob, 2)) + model_type
     cache_key = hashlib.md5(key_raw.encode()).hexdigest()
     
-    if cache_key in CACHE:
-        return CACHE[cache_key]
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
     
     # Build feature analysis
     feature_text = ""
@@ -206,19 +246,8 @@ Write as a professional fraud analyst. Be specific and detailed.
 EXPLANATION:"""
 
     try:
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=150
-        )
-        
-        explanation = response.choices[0].message.content.strip()
-        
-        # Cache it
-        CACHE[cache_key] = explanation
-        json.dump(CACHE, open(CACHE_FILE, "w"), indent=2)
-        
+        # Concurrent identical prompts (same cache key) share one LLM call
+        explanation, _ = INFLIGHT.do(cache_key, lambda: _complete_and_cache(prompt, cache_key))
         return explanation
         
     except Exception as e:
@@ -226,6 +255,27 @@ EXPLANATION:"""
         return _fallback_explanation(fraud_prob, amount, risk_factors, model_type)
 
 
+def _complete_and_cache(prompt, cache_key):
+    """One LLM completion for a cache miss (re-checks the cache: a previous flight may have just filled it)"""
+    cached = CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    response = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3,
+        max_tokens=150
+    )
+    
+    explanation = response.choices[0].message.content.strip()
+    
+    # Cache it
+    CACHE.set(cache_key, explanation)
+    
+    return explanation
+
+
 def _fallback_explanation(fraud_prob, amount, risk_factors, model_type):
     """Fallback explanation when API unavailable - 100 words"""
     
@@ -4,97 +4,57 @@ Retraining routes with flexible threshold for demo/production
 """
 
 from flask import Blueprint, jsonify, request
-from database.db_dual import db
-import threading
+from database.db_dual import get_retrain_watermarks
+from retraining.jobs import enqueue_job, get_job, list_jobs, active_jobs
+from routes.auth_security import require_admin
+import importlib.util
 
-# Import retraining functions
-try:
-    from retraining.auto_retrain_dual import (
-        retrain_banking_with_dataset,
-        retrain_credit_card_with_dataset
-    )
-    RETRAINING_AVAILABLE = True
-except ImportError:
-    RETRAINING_AVAILABLE = False
+# Training runs in retraining.worker (its own process, CPU/memory-limited);
+# these routes only queue jobs in retrain_jobs and report on them
+RETRAINING_AVAILABLE = all(importlib.util.find_spec(m) is not None for m in ('pandas', 'sklearn', 'xgboost'))
+if not RETRAINING_AVAILABLE:
     print("⚠️  Auto-retraining not available")
 
 # Configuration
 RETRAIN_THRESHOLD = 50  # Lower threshold for demo (was 20)
 
-# Global lock and tracking
-_retraining_lock = threading.Lock()
-_last_retrain_count = {'banking': 0, 'credit_card': 0}
-
-def get_feedback_count(model_type=None):
-    """Get count of predictions with feedback"""
-    try:
-        with db.get_cursor() as cursor:
-            if model_type:
-                cursor.execute("""
-                    SELECT COUNT(*) as count 
-                    FROM predictions 
-                    WHERE actual_class IS NOT NULL AND model_type = %s
-                """, (model_type,))
-            else:
-                cursor.execute("""
-                    SELECT COUNT(*) as count 
-                    FROM predictions 
-                    WHERE actual_class IS NOT NULL
-                """)
-            
-            result = cursor.fetchone()
-            return result['count'] if result else 0
-    except Exception as e:
-        print(f"❌ Error getting feedback count: {e}")
-        return 0
-
 def auto_trigger_retraining():
-    """Auto-trigger retraining when threshold reached"""
-    global _last_retrain_count
-    
+    """
+    Queue a retrain for every model with RETRAIN_THRESHOLD+ labels since its
+    watermark (active version's training count, or the last succeeded
+    auto-retrain). The watermark only moves when that job succeeds, so a
+    failed job is retried on the next feedback; while one is queued or
+    running, enqueue_job() returns it instead of adding another.
+    Reads the maintained counters, so it's cheap enough for every feedback.
+    """
     try:
         if not RETRAINING_AVAILABLE:
             return
         
-        banking_count = get_feedback_count(model_type='banking')
-        cc_count = get_feedback_count(model_type='credit_card')
-        
-        models_to_retrain = []
-        
-        # Check if threshold reached and not already retrained at this count
-        if banking_count >= RETRAIN_THRESHOLD and _last_retrain_count['banking'] < RETRAIN_THRESHOLD:
-            models_to_retrain.append('banking')
-            _last_retrain_count['banking'] = banking_count
-        
-        if cc_count >= RETRAIN_THRESHOLD and _last_retrain_count['credit_card'] < RETRAIN_THRESHOLD:
-            models_to_retrain.append('credit_card')
-            _last_retrain_count['credit_card'] = cc_count
-        
-        if models_to_retrain and not _retraining_lock.locked():
-            def background_retrain():
-                with _retraining_lock:
-                    for model in models_to_retrain:
-                        try:
-                            print(f"\n🎯 AUTO-RETRAINING {model.upper()} ({banking_count if model == 'banking' else cc_count} feedbacks)")
-                            
-                            if model == 'banking':
-                                retrain_banking_with_dataset()
-                            elif model == 'credit_card':
-                                retrain_credit_card_with_dataset()
-                                
-                            print(f"✅ {model.upper()} retraining complete")
-                        except Exception as e:
-                            print(f"❌ {model} retraining error: {e}")
-                            import traceback
-                            traceback.print_exc()
+        for model, counts in get_retrain_watermarks().items():
+            if counts['new_feedback'] < RETRAIN_THRESHOLD:
+                continue
             
-            thread = threading.Thread(target=background_retrain, daemon=True, name=f"Retrain-{'-'.join(models_to_retrain)}")
-            thread.start()
-            print(f"✅ Started background retraining for: {', '.join(models_to_retrain)}")
+            job, created = enqueue_job(model, trigger='auto', feedback_count=counts['feedback_count'])
+            if created:
+                print(f"🎯 AUTO-RETRAINING {model.upper()} queued as job {job['id']} "
+                      f"({counts['new_feedback']} new feedbacks)")
     
     except Exception as e:
         print(f"❌ Auto-retraining check error: {e}")
 
+def _threshold_progress(counts):
+    new_feedback = counts['new_feedback'] if counts else 0
+    return {
+        'feedback_count': counts['feedback_count'] if counts else 0,
+        'new_feedback': new_feedback,
+        'watermark': counts['watermark'] if counts else 0,
+        'active_version': counts['active_version'] if counts else None,
+        'progress': f"{new_feedback}/{RETRAIN_THRESHOLD}",
+        'ready': new_feedback >= RETRAIN_THRESHOLD,
+        'percentage': round((new_feedback / RETRAIN_THRESHOLD * 100) if RETRAIN_THRESHOLD > 0 else 0, 1)
+    }
+
 def register_retraining_routes(app):
     """Register retraining routes"""
     
@@ -102,26 +62,17 @@ def register_retraining_routes(app):
     def retrain_status():
         """Get retraining status"""
         try:
-            banking_count = get_feedback_count(model_type='banking')
-            cc_count = get_feedback_count(model_type='credit_card')
+            watermarks = get_retrain_watermarks()
+            jobs = active_jobs()
             
             return jsonify({
                 'status': 'success',
                 'threshold': RETRAIN_THRESHOLD,
-                'banking': {
-                    'feedback_count': banking_count,
-                    'progress': f"{banking_count}/{RETRAIN_THRESHOLD}",
-                    'ready': banking_count >= RETRAIN_THRESHOLD,
-                    'percentage': round((banking_count / RETRAIN_THRESHOLD * 100) if RETRAIN_THRESHOLD > 0 else 0, 1)
-                },
-                'credit_card': {
-                    'feedback_count': cc_count,
-                    'progress': f"{cc_count}/{RETRAIN_THRESHOLD}",
-                    'ready': cc_count >= RETRAIN_THRESHOLD,
-                    'percentage': round((cc_count / RETRAIN_THRESHOLD * 100) if RETRAIN_THRESHOLD > 0 else 0, 1)
-                },
+                'banking': _threshold_progress(watermarks.get('banking')),
+                'credit_card': _threshold_progress(watermarks.get('credit_card')),
                 'retraining_available': RETRAINING_AVAILABLE,
-                'currently_retraining': _retraining_lock.locked()
+                'currently_retraining': any(job['status'] == 'running' for job in jobs.values()),
+                'active_jobs': jobs
             })
         except Exception as e:
             return jsonify({
@@ -130,6 +81,7 @@ def register_retraining_routes(app):
             }), 500
     
     @app.route("/api/retrain/trigger", methods=["POST"])
+    @require_admin
     def trigger_retrain():
         """Manually trigger retraining"""
         try:
@@ -139,38 +91,41 @@ def register_retraining_routes(app):
                     'message': 'Retraining not available'
                 }), 503
             
-            if _retraining_lock.locked():
-                return jsonify({
-                    'status': 'error',
-                    'message': 'Retraining already in progress'
-                }), 409
-            
             data = request.get_json() or {}
             model_type = data.get('model_type', 'both')
+            if model_type not in ('banking', 'credit_card', 'both'):
+                return jsonify({
+                    'status': 'error',
+                    'message': "model_type must be 'banking', 'credit_card' or 'both'"
+                }), 400
+            mode = data.get('mode')  # credit card: "incremental" | "full" (default RETRAIN_MODE)
+            if mode not in (None, 'incremental', 'full'):
+                return jsonify({
+                    'status': 'error',
+                    'message': "mode must be 'incremental' or 'full'"
+                }), 400
             
-            def background_retrain():
-                with _retraining_lock:
-                    if model_type in ['banking', 'both']:
-                        try:
-                            print("\n🎯 MANUAL RETRAINING: BANKING")
-                            retrain_banking_with_dataset()
-                        except Exception as e:
-                            print(f"❌ Banking retraining error: {e}")
-                    
-                    if model_type in ['credit_card', 'both']:
-                        try:
-                            print("\n🎯 MANUAL RETRAINING: CREDIT CARD")
-                            retrain_credit_card_with_dataset()
-                        except Exception as e:
-                            print(f"❌ Credit card retraining error: {e}")
+            models = ['banking', 'credit_card'] if model_type == 'both' else [model_type]
+            queued, running = [], []
+            for model in models:
+                job, created = enqueue_job(model, mode=mode if model == 'credit_card' else None)
+                (queued if created else running).append(job)
+                if created:
+                    print(f"\n🎯 MANUAL RETRAINING: {model.upper()} queued as job {job['id']}")
             
-            thread = threading.Thread(target=background_retrain, daemon=True)
-            thread.start()
+            if not queued:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'Retraining already in progress',
+                    'jobs': running
+                }), 409
             
             return jsonify({
                 'status': 'success',
-                'message': f'Retraining started for {model_type}'
-            })
+                'message': f'Retraining queued for {model_type}',
+                'jobs': queued,
+                'already_active': running
+            }), 202
         
         except Exception as e:
             return jsonify({
@@ -178,4 +133,40 @@ def register_retraining_routes(app):
                 'message': str(e)
             }), 500
     
+    @app.route("/api/retrain/jobs", methods=["GET"])
+    def retrain_jobs():
+        """Recent retraining jobs (newest first)"""
+        try:
+            limit = min(request.args.get('limit', 20, type=int), 200)
+            model_type = request.args.get('model_type')
+            return jsonify({
+                'status': 'success',
+                'jobs': list_jobs(limit=limit, model_type=model_type)
+            })
+        except Exception as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 500
+    
+    @app.route("/api/retrain/jobs/<int:job_id>", methods=["GET"])
+    def retrain_job(job_id):
+        """One retraining job: status, stage, progress, result"""
+        try:
+            job = get_job(job_id)
+            if job is None:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Job {job_id} not found'
+                }), 404
+            return jsonify({
+                'status': 'success',
+                'job': job
+            })
+        except Exception as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 500
+    
     print("✅ Retraining routes registered")
\ No newline at end of file
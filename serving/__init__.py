@@ -0,0 +1,2 @@
+# serving/__init__.py
+# Model serving infrastructure (registry, inference helpers)
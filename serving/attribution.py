@@ -0,0 +1,139 @@
+# serving/attribution.py - Compact per-row feature attributions
+"""
+Shared by the explainers: top-k selection over an N x F contribution matrix
+with argpartition (O(F) per row instead of a full argsort) and a compact
+array container that only becomes lists of dicts when a response needs them.
+"""
+
+import numpy as np
+
+def top_k_by_magnitude(scores, k):
+    """
+    Column indices of the k largest |scores| per row, largest first.
+
+    Args:
+        scores: (n, F) array
+        k: number of columns to keep (clipped to F)
+
+    Returns:
+        (n, k) int array
+    """
+    scores = np.asarray(scores)
+    n_features = scores.shape[1]
+    k = min(k, n_features)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+
+    magnitude = np.abs(scores)
+    if k < n_features:
+        idx = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(n_features), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(magnitude, idx, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(idx, order, axis=1)
+
+class AttributionBatch:
+    """
+    Top-k attributions for a batch of rows as parallel (n, k) arrays.
+
+    indices: feature column indices, contributions: signed attribution,
+    values: the row's feature values at those columns
+    """
+
+    __slots__ = ('feature_names', 'indices', 'contributions', 'values', 'method')
+
+    def __init__(self, feature_names, indices, contributions, values, method):
+        self.feature_names = feature_names
+        self.indices = indices
+        self.contributions = contributions
+        self.values = values
+        self.method = method
+
+    @classmethod
+    def from_matrix(cls, feature_names, X, contributions, top_n, method):
+        """Select the top_n columns of an (n, F) contribution matrix"""
+        X = np.asarray(X)
+        contributions = np.asarray(contributions)
+        idx = top_k_by_magnitude(contributions, top_n)
+        return cls(
+            feature_names,
+            idx.astype(np.int32),
+            np.take_along_axis(contributions, idx, axis=1).astype(np.float32),
+            np.take_along_axis(X, idx, axis=1).astype(np.float32),
+            method
+        )
+
+    def __len__(self):
+        return self.indices.shape[0]
+
+    def names(self):
+        """(n, k) array of feature names"""
+        return np.asarray(self.feature_names, dtype=object)[self.indices]
+
+    def records(self, row, impacts=None, with_method=None):
+        """
+        The explainer's list-of-dicts shape for one row.
+
+        impacts: per-feature direction strings (default: sign of the contribution)
+        with_method: add a "method" key (default: for anything but SHAP)
+        """
+        if with_method is None:
+            with_method = self.method != "shap"
+        out = []
+        for k, (idx, contribution, value) in enumerate(zip(self.indices[row].tolist(),
+                                                          self.contributions[row].tolist(),
+                                                          self.values[row].tolist())):
+            record = {
+                "feature": self.feature_names[idx],
+                "value": round(value, 4),
+                "shap_value": round(contribution, 4),
+                "impact": impacts[k] if impacts is not None else
+                          ("increases" if contribution > 0 else "decreases")
+            }
+            if with_method:
+                record["method"] = self.method
+            out.append(record)
+        return out
+
+    def to_records(self, impacts=None, with_method=None):
+        """records() for every row; impacts is an optional (n, k) array"""
+        if impacts is not None and hasattr(impacts, 'tolist'):
+            impacts = impacts.tolist()
+        return [self.records(i, impacts[i] if impacts is not None else None, with_method)
+                for i in range(len(self))]
+
+class ContributionExplainer:
+    """
+    Per-request / batch explainer over a contribution function.
+
+    Subclasses set feature_names and method and implement contributions(values)
+    -> (n, F) matrix; impacts() may use the fraud probabilities the caller
+    already computed. explain() is the one-row form used by /api/check-fraud.
+    """
+
+    method = None
+    with_method = True   # tag every feature with "method"
+
+    def contributions(self, values):
+        raise NotImplementedError
+
+    def impacts(self, batch, probas):
+        """(n, k) direction strings, or None for the sign of each contribution"""
+        return None
+
+    def explain_many(self, X, probas=None, top_n=5):
+        """Top features for every row of X (probas: each row's fraud probability, if known)"""
+        values = np.asarray(X.values if hasattr(X, 'values') else X, dtype=np.float32)
+        if values.ndim == 1:
+            values = values.reshape(1, -1)
+        batch = AttributionBatch.from_matrix(
+            self.feature_names, values, self.contributions(values), top_n, self.method
+        )
+        return batch.to_records(self.impacts(batch, probas), self.with_method)
+
+    def explain(self, X, top_n=5, proba=None):
+        try:
+            return self.explain_many(X[:1], None if proba is None else [proba], top_n)[0]
+        except Exception as e:
+            print(f"⚠️  {self.method} explanation failed: {e}")
+            return []
@@ -0,0 +1,346 @@
+# serving/bulk_scoring.py - Offline bulk scoring over a process pool
+"""
+Scores large CSV / Parquet transaction files with the serving artifacts
+(the same registry, feature pipeline and explainer as the API):
+
+    reader (chunks of --chunk-size rows) -> process pool (featurize, predict,
+    top features) -> writer (Parquet or CSV, in input order)
+
+The registry is loaded once in the parent and the pool is forked from it, so
+workers share the models copy-on-write (like gunicorn preload). At most
+2 x workers chunks are in flight, so memory stays bounded for any file size.
+Each worker's XGBoost runs single-threaded by default: one process per core.
+
+    python -m serving.bulk_scoring transactions.csv -o scores.parquet --mode banking --workers 4
+    python -m serving.bulk_scoring transactions.parquet --scaling 1,2,4 --limit 200000
+
+Parquet input/output needs pyarrow (pip install pyarrow); CSV works without it.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+
+import pandas as pd
+
+from serving.stream_scoring import EXPLAINERS, STREAM_CONFIG, load_registry, score_chunk
+
+BULK_CONFIG = {
+    'chunk_size': int(os.getenv('BULK_CHUNK_SIZE', 20000)),
+    'workers': int(os.getenv('BULK_WORKERS', os.cpu_count() or 1)),
+    'threads_per_worker': int(os.getenv('BULK_THREADS_PER_WORKER', 1)),
+    'top_n': int(os.getenv('BULK_TOP_FEATURES', 5))
+}
+
+OUTPUT_COLUMNS = [
+    'row', 'id', 'mode', 'prediction', 'fraud_probability', 'risk_level', 'threshold',
+    'model_version', 'transaction_amount', 'top_features', 'top_contributions', 'error'
+]
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        raise SystemExit("❌ Parquet support needs pyarrow: pip install pyarrow")
+
+# ============================================
+# READING
+# ============================================
+def read_chunks(path, chunk_size, limit=None):
+    """Yield (first_row, DataFrame) chunks of a CSV or Parquet file"""
+    if path.lower().endswith(('.parquet', '.pq')):
+        parquet = _require_pyarrow().parquet
+        frames = (batch.to_pandas() for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_size))
+    else:
+        frames = pd.read_csv(path, chunksize=chunk_size)
+
+    first_row = 0
+    for frame in frames:
+        if limit is not None and first_row + len(frame) > limit:
+            frame = frame.iloc[:limit - first_row]
+        if len(frame):
+            yield first_row, frame
+        first_row += len(frame)
+        if limit is not None and first_row >= limit:
+            return
+
+def frame_records(frame):
+    """DataFrame -> raw transaction dicts (missing cells dropped so defaults apply)"""
+    records = frame.to_dict('records')
+    return [{k: v for k, v in record.items() if v is not None and v == v} for record in records]
+
+# ============================================
+# WORKERS
+# ============================================
+_registry = None   # set in the parent before forking, or by _init_worker
+
+def _init_worker(explain, threads, explainer=None):
+    global _registry
+    if _registry is None:
+        _registry = load_registry(explain, explainer)
+    for model_type in ('banking', 'credit_card'):
+        bundle = _registry.get(model_type)
+        if bundle is None:
+            continue
+        try:
+            bundle.model.set_params(n_jobs=threads)
+            bundle.model.get_booster().set_param({'nthread': threads})
+        except Exception as e:
+            print(f"⚠️  Could not set XGBoost threads for {model_type}: {e}", file=sys.stderr)
+
+def score_frame(task):
+    """
+    Score one chunk (runs in a pool worker).
+
+    Returns:
+        (columns, stats) - columns is {name: list} in OUTPUT_COLUMNS order,
+        stats has the worker pid, row/error/fraud counts and CPU seconds
+    """
+    first_row, frame, default_mode, explain, id_field, top_n = task
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+
+    records = frame_records(frame)
+    rows = [(first_row + i, record, None) for i, record in enumerate(records)]
+    _, results = score_chunk(_registry.get, rows, default_mode, explain, id_field)
+
+    columns = {name: [] for name in OUTPUT_COLUMNS}
+    errors = fraud = 0
+    for result in results:
+        top = result.get('top_contributing_features') or []
+        columns['row'].append(result['line'])
+        columns['id'].append(str(result['id']) if 'id' in result else None)
+        columns['mode'].append(result.get('mode'))
+        columns['prediction'].append(result.get('prediction'))
+        columns['fraud_probability'].append(result.get('fraud_probability'))
+        columns['risk_level'].append(result.get('risk_level'))
+        columns['threshold'].append(result.get('threshold'))
+        columns['model_version'].append(result.get('model_version'))
+        columns['transaction_amount'].append(result.get('transaction_amount'))
+        columns['top_features'].append([f['feature'] for f in top[:top_n]])
+        columns['top_contributions'].append([f['shap_value'] for f in top[:top_n]])
+        columns['error'].append(result.get('error'))
+        if 'error' in result:
+            errors += 1
+        else:
+            fraud += result['prediction']
+
+    stats = {
+        'pid': os.getpid(),
+        'rows': len(results),
+        'errors': errors,
+        'fraud_count': fraud,
+        'cpu_s': time.process_time() - cpu_start,
+        'wall_s': time.perf_counter() - wall_start
+    }
+    return columns, stats
+
+# ============================================
+# WRITING
+# ============================================
+class ParquetSink:
+    """Appends scored chunks to one Parquet file as row groups"""
+
+    def __init__(self, path):
+        pa = _require_pyarrow()
+        self.pa = pa
+        self.schema = pa.schema([
+            ('row', pa.int64()), ('id', pa.string()), ('mode', pa.string()),
+            ('prediction', pa.int8()), ('fraud_probability', pa.float64()),
+            ('risk_level', pa.string()), ('threshold', pa.float64()),
+            ('model_version', pa.string()), ('transaction_amount', pa.float64()),
+            ('top_features', pa.list_(pa.string())), ('top_contributions', pa.list_(pa.float32())),
+            ('error', pa.string())
+        ])
+        self.writer = pa.parquet.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, columns):
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+class CsvSink:
+    """CSV output; top features as 'name;name;...'"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, columns):
+        frame = pd.DataFrame(columns, columns=OUTPUT_COLUMNS)
+        frame['prediction'] = frame['prediction'].astype('Int8')
+        frame['top_features'] = [';'.join(names) for names in frame['top_features']]
+        frame['top_contributions'] = [';'.join(f"{c:.4f}" for c in values) for values in frame['top_contributions']]
+        frame.to_csv(self.file, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+class NullSink:
+    """Discards results (--scaling runs)"""
+
+    def write(self, columns):
+        pass
+
+    def close(self):
+        pass
+
+def open_sink(path):
+    if path is None:
+        return NullSink()
+    if path.lower().endswith(('.parquet', '.pq')):
+        return ParquetSink(path)
+    return CsvSink(path)
+
+# ============================================
+# RUNNING
+# ============================================
+def _pool_context():
+    # fork shares the parent's loaded models; spawn reloads them per worker
+    methods = mp.get_all_start_methods()
+    return mp.get_context('fork' if 'fork' in methods else 'spawn')
+
+def run(path, output=None, workers=None, chunk_size=None, default_mode='banking', explain=False,
+        id_field=None, limit=None, threads_per_worker=None, explainer=None):
+    """
+    Score path into output with a pool of workers.
+
+    Returns:
+        Report dict: rows, errors, fraud_count, wall time, rows/sec overall,
+        per worker and per CPU-second, plus per-worker breakdown
+    """
+    workers = max(1, workers or BULK_CONFIG['workers'])
+    chunk_size = chunk_size or BULK_CONFIG['chunk_size']
+    threads = threads_per_worker or BULK_CONFIG['threads_per_worker']
+    task_args = (default_mode, explain, id_field, BULK_CONFIG['top_n'])
+
+    sink = open_sink(output)
+    per_worker = {}
+    totals = {'rows': 0, 'errors': 0, 'fraud_count': 0, 'chunks': 0}
+
+    def collect(columns, stats):
+        sink.write(columns)
+        worker = per_worker.setdefault(stats['pid'], {'rows': 0, 'chunks': 0, 'cpu_s': 0.0, 'busy_s': 0.0})
+        worker['rows'] += stats['rows']
+        worker['chunks'] += 1
+        worker['cpu_s'] += stats['cpu_s']
+        worker['busy_s'] += stats['wall_s']
+        totals['chunks'] += 1
+        for key in ('rows', 'errors', 'fraud_count'):
+            totals[key] += stats[key]
+
+    start = time.perf_counter()
+    try:
+        chunks = read_chunks(path, chunk_size, limit)
+        if workers == 1:
+            _init_worker(explain, threads, explainer)
+            for first_row, frame in chunks:
+                collect(*score_frame((first_row, frame) + task_args))
+        else:
+            with _pool_context().Pool(workers, initializer=_init_worker, initargs=(explain, threads, explainer)) as pool:
+                # Bounded submission (Pool.imap would read the whole file ahead)
+                pending = deque()
+                for first_row, frame in chunks:
+                    pending.append(pool.apply_async(score_frame, ((first_row, frame) + task_args,)))
+                    if len(pending) >= 2 * workers:
+                        collect(*pending.popleft().get())
+                while pending:
+                    collect(*pending.popleft().get())
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - start
+
+    cpu_s = sum(w['cpu_s'] for w in per_worker.values())
+    rows_per_sec = totals['rows'] / elapsed if elapsed > 0 else 0.0
+    return {
+        **totals,
+        'workers': workers,
+        'cores': os.cpu_count(),
+        'threads_per_worker': threads,
+        'chunk_size': chunk_size,
+        'elapsed_s': round(elapsed, 2),
+        'rows_per_sec': round(rows_per_sec, 1),
+        'rows_per_sec_per_worker': round(rows_per_sec / workers, 1),
+        'rows_per_cpu_sec': round(totals['rows'] / cpu_s, 1) if cpu_s > 0 else None,
+        'per_worker': {str(pid): {**w, 'cpu_s': round(w['cpu_s'], 2), 'busy_s': round(w['busy_s'], 2)}
+                       for pid, w in per_worker.items()}
+    }
+
+def print_report(report, output=None):
+    print(f"\n📊 Bulk scoring: {report['rows']:,} rows ({report['errors']:,} errors, "
+          f"{report['fraud_count']:,} flagged) in {report['elapsed_s']:.1f}s"
+          + (f" -> {output}" if output else ""), file=sys.stderr)
+    print(f"   {report['workers']} workers x {report['threads_per_worker']} thread(s) on "
+          f"{report['cores']} cores | {report['rows_per_sec']:,.0f} rows/s | "
+          f"{report['rows_per_sec_per_worker']:,.0f} rows/s per worker | "
+          f"{report['rows_per_cpu_sec'] or 0:,.0f} rows per CPU-second", file=sys.stderr)
+    for pid, worker in report['per_worker'].items():
+        print(f"     pid {pid:<8}{worker['rows']:>10,} rows{worker['chunks']:>6} chunks"
+              f"{worker['cpu_s']:>9.1f}s CPU", file=sys.stderr)
+
+def print_scaling(reports):
+    """rows/s and rows/s per core for each worker count, vs the first run"""
+    base = reports[0]['rows_per_sec'] / reports[0]['workers']
+    print("\n📈 Scaling", file=sys.stderr)
+    print(f"   {'workers':>8}{'rows/s':>12}{'per core':>12}{'speedup':>9}{'efficiency':>12}", file=sys.stderr)
+    for report in reports:
+        cores_used = min(report['workers'], report['cores'] or report['workers'])
+        speedup = report['rows_per_sec'] / base if base else 0.0
+        print(f"   {report['workers']:>8}{report['rows_per_sec']:>12,.0f}"
+              f"{report['rows_per_sec'] / cores_used:>12,.0f}{speedup:>8.2f}x"
+              f"{speedup / report['workers']:>11.0%}", file=sys.stderr)
+
+# ============================================
+# CLI
+# ============================================
+def main():
+    global _registry
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="CSV or Parquet transactions file")
+    parser.add_argument('-o', '--output', help="scores file (.parquet or .csv)")
+    parser.add_argument('--mode', default='banking', help="model for rows without a 'mode' column")
+    parser.add_argument('--workers', type=int, default=BULK_CONFIG['workers'])
+    parser.add_argument('--threads-per-worker', type=int, default=BULK_CONFIG['threads_per_worker'])
+    parser.add_argument('--chunk-size', type=int, default=BULK_CONFIG['chunk_size'])
+    parser.add_argument('--no-explain', action='store_true', help="skip top features (scores only)")
+    parser.add_argument('--explainer', choices=EXPLAINERS, default=STREAM_CONFIG['explainer'],
+                        help="top features from the Saabas path index or batched TreeSHAP")
+    parser.add_argument('--id-field', help="copy this input column into the output 'id' column")
+    parser.add_argument('--limit', type=int, help="score only the first N rows")
+    parser.add_argument('--scaling', help="comma-separated worker counts to benchmark (no output written)")
+    parser.add_argument('--report', help="write the throughput report(s) as JSON here")
+    args = parser.parse_args()
+
+    if not args.output and not args.scaling:
+        parser.error("-o/--output is required (or use --scaling)")
+
+    explain = not args.no_explain
+    _registry = load_registry(explain, args.explainer)
+    _registry.load_models()
+
+    common = dict(chunk_size=args.chunk_size, default_mode=args.mode.lower(), explain=explain,
+                  id_field=args.id_field, limit=args.limit, threads_per_worker=args.threads_per_worker,
+                  explainer=args.explainer)
+    if args.scaling:
+        reports = []
+        for workers in [int(w) for w in args.scaling.split(',')]:
+            reports.append(run(args.input, None, workers, **common))
+            print_report(reports[-1])
+        print_scaling(reports)
+    else:
+        reports = [run(args.input, args.output, args.workers, **common)]
+        print_report(reports[0], args.output)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(reports if args.scaling else reports[0], f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# serving/explanation_cache.py - Bounded GenAI explanation cache
+"""
+Two-level cache for LLM explanations.
+
+- L1: in-process LRU (OrderedDict) bounded by max_entries, entries expire after ttl
+- L2: SQLite file in WAL mode shared by every gunicorn worker on the host;
+  one indexed row per key, so lookups and inserts are O(1) and nothing is
+  ever rewritten wholesale. Expired / surplus rows are pruned every
+  prune_every inserts.
+
+The old genai_cache.json (whole-file JSON rewrite) is imported once on first use.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+EXPLANATION_CACHE_CONFIG = {
+    'path': os.getenv('GENAI_CACHE_PATH', 'genai_cache.sqlite3'),
+    'max_entries': int(os.getenv('GENAI_CACHE_MAX_ENTRIES', 10000)),
+    'ttl': float(os.getenv('GENAI_CACHE_TTL', 7 * 24 * 3600)),
+    'max_rows': int(os.getenv('GENAI_CACHE_MAX_ROWS', 200000)),
+    'prune_every': int(os.getenv('GENAI_CACHE_PRUNE_EVERY', 500))
+}
+
+LEGACY_JSON_CACHE = "genai_cache.json"
+
+class ExplanationCache:
+    """In-memory LRU + TTL in front of a shared SQLite store"""
+
+    def __init__(self, path=None, max_entries=None, ttl=None, max_rows=None, prune_every=None):
+        self.path = path or EXPLANATION_CACHE_CONFIG['path']
+        self.max_entries = max_entries or EXPLANATION_CACHE_CONFIG['max_entries']
+        self.ttl = ttl or EXPLANATION_CACHE_CONFIG['ttl']
+        self.max_rows = max_rows or EXPLANATION_CACHE_CONFIG['max_rows']
+        self.prune_every = prune_every or EXPLANATION_CACHE_CONFIG['prune_every']
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()    # key -> (value, expires_at), least recently used first
+        self._local = threading.local()
+        self._inserts = 0
+        self._store_ok = True
+
+        self.stats = {'memory_hits': 0, 'shared_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+        self._init_store()
+
+    # ---------- shared store ----------
+    def _conn(self):
+        # sqlite3 connections are per thread, and must not cross fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_store(self):
+        try:
+            conn = self._conn()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS explanations (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_explanations_created ON explanations(created_at)")
+            self._import_legacy_json(conn)
+        except Exception as e:
+            self._store_ok = False
+            print(f"⚠️  Explanation cache store unavailable, memory only ({e})")
+
+    def _import_legacy_json(self, conn):
+        if not os.path.exists(LEGACY_JSON_CACHE):
+            return
+        try:
+            with open(LEGACY_JSON_CACHE) as f:
+                legacy = json.load(f)
+            now = time.time()
+            conn.executemany(
+                "INSERT OR IGNORE INTO explanations (key, value, created_at) VALUES (?, ?, ?)",
+                [(k, v, now) for k, v in legacy.items() if isinstance(v, str)]
+            )
+            os.replace(LEGACY_JSON_CACHE, LEGACY_JSON_CACHE + ".imported")
+            print(f"✅ Imported {len(legacy)} cached explanations from {LEGACY_JSON_CACHE}")
+        except Exception as e:
+            print(f"⚠️  Could not import {LEGACY_JSON_CACHE}: {e}")
+
+    def _prune_store(self, conn):
+        """Drop expired rows, then all but the newest max_rows rows"""
+        conn.execute("DELETE FROM explanations WHERE created_at < ?", (time.time() - self.ttl,))
+        conn.execute("""
+            DELETE FROM explanations WHERE created_at <= (
+                SELECT created_at FROM explanations ORDER BY created_at DESC LIMIT 1 OFFSET ?
+            )
+        """, (self.max_rows,))
+
+    # ---------- memory LRU ----------
+    def _remember(self, key, value, expires_at):
+        """Caller holds self._lock"""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    # ---------- public API ----------
+    def get(self, key):
+        """Cached explanation for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return entry[0]
+                del self._memory[key]
+
+        if self._store_ok:
+            try:
+                row = self._conn().execute(
+                    "SELECT value, created_at FROM explanations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] + self.ttl > now:
+                    with self._lock:
+                        self._remember(key, row[0], row[1] + self.ttl)
+                        self.stats['shared_hits'] += 1
+                    return row[0]
+            except sqlite3.Error as e:
+                print(f"⚠️  Explanation cache read failed: {e}")
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now + self.ttl)
+            self.stats['sets'] += 1
+            self._inserts += 1
+            prune = self._inserts % self.prune_every == 0
+
+        if self._store_ok:
+            try:
+                conn = self._conn()
+                conn.execute(
+                    "INSERT OR REPLACE INTO explanations (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, now)
+                )
+                if prune:
+                    self._prune_store(conn)
+            except sqlite3.Error as e:
+                print(f"⚠️  Explanation cache write failed: {e}")
+
+    def metrics(self):
+        with self._lock:
+            size = len(self._memory)
+        return {**self.stats, 'memory_entries': size, 'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl, 'shared_store': self.path if self._store_ok else None}
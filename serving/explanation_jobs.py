@@ -0,0 +1,166 @@
+# serving/explanation_jobs.py - Background GenAI explanation jobs
+"""
+Runs LLM explanations off the request path.
+
+/api/check-fraud (async mode) submits a job and returns a token at once; a small
+thread pool generates the explanation and clients fetch it later by token or
+prediction id (polling, long-polling or server-sent events). Finished jobs are
+kept for job_ttl seconds / max_jobs entries so memory stays bounded.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+EXPLANATION_CONFIG = {
+    'workers': int(os.getenv('GENAI_WORKERS', 4)),
+    'max_jobs': int(os.getenv('GENAI_MAX_JOBS', 5000)),
+    'job_ttl': float(os.getenv('GENAI_JOB_TTL', 600))
+}
+
+class ExplanationJob:
+    """One pending / finished explanation"""
+
+    def __init__(self, prediction_id=None, provider=None):
+        self.token = uuid.uuid4().hex
+        self.prediction_id = prediction_id
+        self.provider = provider
+        self.status = 'pending'
+        self.explanation = None
+        self.error = None
+        self.created_at = time.time()
+        self.completed_at = None
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until finished (or timeout). Returns True if finished."""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        return {
+            'token': self.token,
+            'prediction_id': self.prediction_id,
+            'explanation_status': self.status,
+            'ai_explanation': self.explanation,
+            'ai_provider': self.provider,
+            'error': self.error,
+            'latency_ms': round((self.completed_at - self.created_at) * 1000, 1) if self.completed_at else None
+        }
+
+class ExplanationJobs:
+    """Per-process job table plus the worker pool that fills it"""
+
+    def __init__(self, workers=None, max_jobs=None, job_ttl=None, on_complete=None):
+        self.workers = workers or EXPLANATION_CONFIG['workers']
+        self.max_jobs = max_jobs or EXPLANATION_CONFIG['max_jobs']
+        self.job_ttl = job_ttl or EXPLANATION_CONFIG['job_ttl']
+        self.on_complete = on_complete
+
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()      # token -> job, oldest first
+        self._by_prediction = {}        # prediction_id -> token
+        self._executor = None
+        self._pid = None
+
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0}
+
+    def _pool(self):
+        # Worker threads don't survive fork: one executor per process
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    if self._pid != os.getpid():
+                        self._jobs.clear()
+                        self._by_prediction.clear()
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="GenAIWorker"
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn, *args, prediction_id=None, provider=None, fallback=None):
+        """
+        Queue fn(*args) and return its job immediately.
+
+        fallback: optional zero-arg callable whose result is used if fn raises
+        """
+        executor = self._pool()
+        job = ExplanationJob(prediction_id=prediction_id, provider=provider)
+        with self._lock:
+            self._evict()
+            self._jobs[job.token] = job
+            if prediction_id is not None:
+                self._by_prediction[prediction_id] = job.token
+            self.stats['submitted'] += 1
+        executor.submit(self._run, job, fn, args, fallback)
+        return job
+
+    def _run(self, job, fn, args, fallback):
+        try:
+            job.explanation = fn(*args)
+            job.status = 'done'
+            with self._lock:
+                self.stats['completed'] += 1
+        except Exception as e:
+            job.error = str(e)
+            with self._lock:
+                self.stats['failed'] += 1
+            print(f"⚠️  Explanation job {job.token} failed: {e}")
+            status = 'error'
+            if fallback is not None:
+                try:
+                    job.explanation = fallback()
+                    job.provider = 'fallback'
+                    status = 'done'
+                except Exception as fe:
+                    job.error = f"{e}; fallback failed: {fe}"
+                    print(f"⚠️  Explanation fallback for {job.token} failed: {fe}")
+            job.status = status
+        finally:
+            job.completed_at = time.time()
+            job._done.set()
+
+        if self.on_complete is not None and job.status == 'done':
+            try:
+                self.on_complete(job)
+            except Exception as e:
+                print(f"⚠️  Explanation completion hook failed: {e}")
+
+    def get(self, token):
+        with self._lock:
+            return self._jobs.get(token)
+
+    def for_prediction(self, prediction_id):
+        with self._lock:
+            token = self._by_prediction.get(prediction_id)
+            return self._jobs.get(token) if token else None
+
+    def _evict(self):
+        """Drop finished jobs past their TTL, then oldest finished ones over max_jobs (caller holds lock)"""
+        now = time.time()
+        over = len(self._jobs) - self.max_jobs + 1  # leave room for the job being added
+        stale = []
+        for token, job in self._jobs.items():
+            if over <= 0 and now - job.created_at <= self.job_ttl:
+                break  # ordered by creation: everything after this is newer
+            if job.done and (over > 0 or now - job.completed_at > self.job_ttl):
+                stale.append(token)
+                over -= 1
+        for token in stale:
+            job = self._jobs.pop(token)
+            if self._by_prediction.get(job.prediction_id) == token:
+                del self._by_prediction[job.prediction_id]
+
+    def metrics(self):
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if not job.done)
+            tracked = len(self._jobs)
+            stats = dict(self.stats)
+        return {**stats, 'pending': pending, 'tracked': tracked, 'workers': self.workers}
@@ -0,0 +1,195 @@
+# serving/micro_batcher.py - Micro-batching in front of model inference
+"""
+Coalesces concurrent single-transaction predictions into one predict_proba call.
+
+Request threads hand their feature rows to predict() and block; a dispatcher
+thread collects rows per model until max_rows are waiting or the oldest
+request has waited max_wait_ms, scores them with one vectorized call and
+hands each request its slice of the result. Rows are only batched with rows
+for the same ModelBundle, so a hot swap never mixes model versions.
+
+Only useful with threaded workers (gunicorn --threads / gthread); with one
+thread per worker every batch has a single row.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+MICRO_BATCH_CONFIG = {
+    'max_rows': int(os.getenv('MICRO_BATCH_MAX_ROWS', 8)),
+    'max_wait_ms': float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', 1.0)),
+    'result_timeout': float(os.getenv('MICRO_BATCH_RESULT_TIMEOUT', 5.0))
+}
+
+# Upper bounds of the batch-size histogram buckets (rows)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+class _Pending:
+    __slots__ = ('bundle', 'X', 'arrived', 'done', 'result', 'error')
+
+    def __init__(self, bundle, X):
+        self.bundle = bundle
+        self.X = X
+        self.arrived = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class MicroBatcher:
+    """Per-process batching dispatcher for ModelBundle.predict_proba"""
+
+    def __init__(self, max_rows=None, max_wait_ms=None, result_timeout=None):
+        self.max_rows = max_rows or MICRO_BATCH_CONFIG['max_rows']
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else MICRO_BATCH_CONFIG['max_wait_ms']) / 1000.0
+        self.result_timeout = result_timeout or MICRO_BATCH_CONFIG['result_timeout']
+
+        self._cond = threading.Condition()
+        self._queues = {}           # model_type -> deque of _Pending
+        self._rows = {}             # model_type -> rows waiting
+        self._thread = None
+        self._pid = None
+
+        self.stats = {
+            'requests': 0,
+            'rows': 0,
+            'batches': 0,
+            'flush_full': 0,
+            'flush_timeout': 0,
+            'errors': 0,
+            'direct_fallbacks': 0,
+            'queue_wait_ms_total': 0.0
+        }
+        self._size_histogram = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    # ---------- lifecycle ----------
+    def _ensure_started(self):
+        # Dispatcher thread doesn't survive fork: one per process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queues.clear()
+                self._rows.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="MicroBatcher")
+            self._thread.start()
+
+    # ---------- request side ----------
+    def predict(self, bundle, X):
+        """Fraud probabilities for the rows of X, scored together with concurrent requests"""
+        self._ensure_started()
+        pending = _Pending(bundle, X)
+        with self._cond:
+            self._queues.setdefault(bundle.model_type, deque()).append(pending)
+            self._rows[bundle.model_type] = self._rows.get(bundle.model_type, 0) + len(X)
+            self.stats['requests'] += 1
+            self._cond.notify_all()
+
+        if not pending.done.wait(self.result_timeout):
+            # Dispatcher stuck or dead: don't fail the request
+            with self._cond:
+                queue = self._queues.get(bundle.model_type)
+                if queue and pending in queue:
+                    queue.remove(pending)
+                    self._rows[bundle.model_type] -= len(X)
+                self.stats['direct_fallbacks'] += 1
+            return bundle.predict_proba(X)
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    # ---------- dispatcher ----------
+    def _oldest_queue(self):
+        """Model type whose head request has waited longest (caller holds lock)"""
+        waiting = [(q[0].arrived, model_type) for model_type, q in self._queues.items() if q]
+        return min(waiting)[1] if waiting else None
+
+    def _take(self, model_type):
+        """Pop up to max_rows rows for the head request's bundle (caller holds lock)"""
+        queue = self._queues[model_type]
+        bundle = queue[0].bundle
+        batch, rows = [], 0
+        while queue and queue[0].bundle is bundle and (not batch or rows + len(queue[0].X) <= self.max_rows):
+            pending = queue.popleft()
+            batch.append(pending)
+            rows += len(pending.X)
+        self._rows[model_type] -= rows
+        return bundle, batch, rows
+
+    def _run(self):
+        while True:
+            with self._cond:
+                model_type = self._oldest_queue()
+                while model_type is None:
+                    self._cond.wait()
+                    model_type = self._oldest_queue()
+
+                deadline = self._queues[model_type][0].arrived + self.max_wait
+                while self._rows[model_type] < self.max_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._queues[model_type]:
+                    continue    # every waiting request gave up and scored directly
+                full = self._rows[model_type] >= self.max_rows
+                bundle, batch, rows = self._take(model_type)
+
+            self._score(bundle, batch, rows, full)
+
+    def _score(self, bundle, batch, rows, full):
+        now = time.monotonic()
+        try:
+            X = batch[0].X if len(batch) == 1 else np.vstack([p.X for p in batch])
+            probas = bundle.predict_proba(X)
+            offset = 0
+            for pending in batch:
+                n = len(pending.X)
+                pending.result = probas[offset:offset + n]
+                offset += n
+        except Exception as e:
+            with self._cond:
+                self.stats['errors'] += 1
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+        with self._cond:
+            self.stats['batches'] += 1
+            self.stats['rows'] += rows
+            self.stats['flush_full' if full else 'flush_timeout'] += 1
+            self.stats['queue_wait_ms_total'] += sum((now - p.arrived) * 1000 for p in batch)
+            for i, bound in enumerate(BATCH_SIZE_BUCKETS):
+                if rows <= bound:
+                    self._size_histogram[i] += 1
+                    break
+            else:
+                self._size_histogram[-1] += 1
+
+    # ---------- metrics ----------
+    def metrics(self):
+        with self._cond:
+            stats = dict(self.stats)
+            histogram = {f"le_{bound}": count for bound, count in zip(BATCH_SIZE_BUCKETS, self._size_histogram)}
+            histogram[f"gt_{BATCH_SIZE_BUCKETS[-1]}"] = self._size_histogram[-1]
+            waiting = sum(self._rows.values())
+        batches = stats['batches']
+        return {
+            **stats,
+            'queue_wait_ms_total': round(stats['queue_wait_ms_total'], 3),
+            'max_rows': self.max_rows,
+            'max_wait_ms': self.max_wait * 1000,
+            'rows_waiting': waiting,
+            'avg_batch_rows': round(stats['rows'] / batches, 2) if batches else 0.0,
+            'fill_rate': round(stats['rows'] / (batches * self.max_rows), 4) if batches else 0.0,
+            'avg_queue_wait_ms': round(stats['queue_wait_ms_total'] / stats['requests'], 3) if stats['requests'] else 0.0,
+            'batch_size_histogram': histogram
+        }
@@ -0,0 +1,532 @@
+# serving/model_registry.py - Hot-swappable model registry
+"""
+In-process model registry for the prediction service.
+
+- Loads the banking / credit card model, feature list, threshold and scaler
+  into an immutable ModelBundle
+- At startup the NumPy tree index is read straight from the booster JSON and
+  XGBoost itself loads on first use (or in a background warmup)
+- A background watcher polls the active model_versions row (and the local
+  manifest models/active_models.json) and loads new versions off the
+  request path
+- Swaps are a single reference assignment: requests grab a bundle once and
+  keep using it, so in-flight requests finish on the model they started with
+
+Every gunicorn worker runs its own watcher against the same source of truth
+(DB row / manifest), so all workers converge on a new version within one
+poll interval without a restart.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from features.batch_features import (
+    BANKING_FEATURES,
+    BankingFeatureLayout,
+    build_credit_card_matrix
+)
+from serving.tree_paths import TreeEnsemble, ensemble_for
+
+MODEL_TYPES = ('banking', 'credit_card')
+
+# Startup artifacts (same files app.py has always loaded)
+DEFAULT_ARTIFACTS = {
+    'banking': {
+        'model_path': 'models/fraud_model_banking.json',
+        'features_path': 'models/features_banking.json',
+        'config_path': 'models/model_config_banking.json',
+        'scaler_path': 'models/scaler_banking.pkl',
+        'threshold': 0.55
+    },
+    'credit_card': {
+        'model_path': 'models/fraud_model_final.json',
+        'features_path': 'models/features.json',
+        'config_path': 'models/model_config.json',
+        'scaler_path': None,
+        'threshold': 0.4
+    }
+}
+
+MANIFEST_PATH = os.getenv('MODEL_MANIFEST_PATH', 'models/active_models.json')
+POLL_SECONDS = float(os.getenv('MODEL_REGISTRY_POLL_SECONDS', 15))
+
+# Batches up to this many rows are scored by the NumPy tree engine instead of
+# XGBoost (same probabilities, no DMatrix / thread-pool overhead); 0 disables
+TREE_INFERENCE_MAX_ROWS = int(os.getenv('TREE_INFERENCE_MAX_ROWS', 8))
+
+# Features the serving feature builders can produce for each model type
+CREDIT_CARD_FEATURES = [f'V{i}' for i in range(1, 29)] + [
+    'Amount', 'Time', 'Hour', 'time_gap', 'txn_last_1hr',
+    'Amount_log', 'amount_roll_mean_3', 'amount_roll_std_3'
+]
+SERVABLE_FEATURES = {
+    'banking': set(BANKING_FEATURES),
+    'credit_card': set(CREDIT_CARD_FEATURES)
+}
+
+# ============================================
+# MODEL BUNDLE
+# ============================================
+class ModelBundle:
+    """Everything needed to score one model type. Model state is never mutated after publish."""
+
+    def __init__(self, model_type, model, features, threshold, version=None,
+                 model_path=None, scaler=None, explainer=None, tree_index=None, model_loader=None):
+        self.model_type = model_type
+        self._model = model
+        self._model_loader = model_loader
+        self._model_lock = threading.Lock()
+        self.features = list(features)
+        self.threshold = float(threshold)
+        self.version = version
+        self.model_path = model_path
+        self.scaler = scaler
+        self.explainer = explainer
+        self.loaded_at = datetime.now()
+
+        if model_type == 'banking':
+            self.layout = BankingFeatureLayout(self.features, scaler)
+        else:
+            self.layout = None
+
+        # Flat NumPy copy of the trees (XGBoost models only): path explanations,
+        # plus small-batch scoring when TREE_INFERENCE_MAX_ROWS > 0
+        self.tree_index = tree_index
+        if tree_index is None and hasattr(model, 'get_booster'):
+            try:
+                self.tree_index = ensemble_for(model, self.features)
+            except Exception as e:
+                print(f"⚠️  {model_type.upper()} Model: NumPy tree engine unavailable ({e})")
+        self.tree_engine = self.tree_index if TREE_INFERENCE_MAX_ROWS > 0 else None
+
+    @property
+    def model(self):
+        """The XGBoost / sklearn model; bundles built with a model_loader load it on first use"""
+        if self._model is None and self._model_loader is not None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._model_loader()
+        return self._model
+
+    @property
+    def model_loaded(self):
+        return self._model is not None
+
+    def with_version(self, version):
+        """New bundle labelled version, sharing this one's model, scaler and tree index"""
+        bundle = copy.copy(self)
+        bundle.version = version
+        if self._model is None:
+            # Deferred model: load it once, through the original bundle
+            bundle._model_loader = lambda: self.model
+            bundle._model_lock = threading.Lock()
+        return bundle
+
+    def prepare_one(self, data):
+        """Single raw transaction -> float32 row (1, n_features)"""
+        if self.layout is not None:
+            return self.layout.row(data)
+        return build_credit_card_matrix([data], self.features)
+
+    def prepare_many(self, records):
+        """Many raw transactions -> float32 matrix (n, n_features)"""
+        if self.layout is not None:
+            return self.layout.matrix(records)
+        return build_credit_card_matrix(records, self.features)
+
+    def predict_proba(self, X):
+        """Fraud probability (class 1) for each row of X"""
+        if self.tree_engine is not None and len(X) <= TREE_INFERENCE_MAX_ROWS:
+            return self.tree_engine.predict_proba(X)
+        return self.model.predict_proba(X)[:, 1]
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'model_path': self.model_path,
+            'features': len(self.features),
+            'threshold': self.threshold,
+            'tree_engine': self.tree_engine is not None,
+            'model_loaded': self.model_loaded,
+            'loaded_at': self.loaded_at.isoformat()
+        }
+
+# ============================================
+# LOADING
+# ============================================
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+def _load_model(model_path):
+    """Load an XGBoost .json booster or a joblib-pickled sklearn model"""
+    # Imported here: xgboost pulls in scikit-learn/SciPy, the bulk of startup time
+    if model_path.endswith('.json'):
+        from xgboost import XGBClassifier
+        model = XGBClassifier()
+        model.load_model(model_path)
+        return model
+    import joblib
+    return joblib.load(model_path)
+
+def _load_scaler(scaler_path):
+    """
+    Fitted StandardScaler for the banking layout.
+
+    Unpickling it imports scikit-learn, so its statistics are also cached in
+    <scaler>.params.json keyed by the pickle's sha256; when that matches, the
+    layout gets a plain namespace with the same attributes instead.
+    """
+    with open(scaler_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    params_path = os.path.splitext(scaler_path)[0] + '.params.json'
+    try:
+        params = _read_json(params_path)
+        if params.get('sha256') == digest:
+            return SimpleNamespace(**params['scaler'])
+    except Exception:
+        pass
+
+    import joblib
+    scaler = joblib.load(scaler_path)
+    stats = {
+        name: getattr(scaler, name).tolist() if hasattr(getattr(scaler, name), 'tolist') else getattr(scaler, name)
+        for name in ('feature_names_in_', 'mean_', 'scale_', 'with_mean', 'with_std')
+        if hasattr(scaler, name)
+    }
+    try:
+        directory = os.path.dirname(params_path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.scaler_params_')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'sha256': digest, 'source': os.path.basename(scaler_path), 'scaler': stats}, f, indent=2)
+        os.replace(tmp_path, params_path)
+    except Exception as e:
+        print(f"⚠️  Could not cache scaler statistics ({e})")
+    return scaler
+
+def _model_feature_names(model):
+    """Feature names stored inside the model artifact, if any"""
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None:
+        return list(names)
+    try:
+        return list(model.get_booster().feature_names or [])
+    except Exception:
+        return []
+
+def unservable_features(model_type, features):
+    """Features the model_type serving pipeline can't build (empty: a registry can load the model)"""
+    return [f for f in features if f not in SERVABLE_FEATURES[model_type]]
+
+def load_bundle(model_type, model_path, features_path=None, threshold=None,
+                version=None, scaler_path=None, config_path=None, explainer_factory=None,
+                lazy_model=False):
+    """
+    Load a ModelBundle from artifacts on disk.
+
+    Feature list comes from features_path, else from the model itself.
+    Threshold comes from the argument, else config_path's default_threshold,
+    else DEFAULT_ARTIFACTS. explainer_factory(bundle) builds the explainer.
+
+    lazy_model: for .json boosters, build the tree index straight from the
+    file and defer importing/loading XGBoost to the first bundle.model access
+
+    Raises:
+        ValueError: If the model needs features the serving pipeline cannot build
+    """
+    defaults = DEFAULT_ARTIFACTS[model_type]
+    features = None
+    if features_path and os.path.exists(features_path):
+        features = _read_json(features_path)
+
+    model, tree_index = None, None
+    if lazy_model and model_path.endswith('.json'):
+        try:
+            tree_index = TreeEnsemble.from_file(model_path, features)
+        except Exception as e:
+            print(f"⚠️  {model_type.upper()} Model: no tree index, loading XGBoost now ({e})")
+    if tree_index is None:
+        model = _load_model(model_path)
+
+    if not features:
+        features = tree_index.feature_names if tree_index is not None else _model_feature_names(model)
+    if not features:
+        raise ValueError(f"No feature list for {model_path}")
+
+    unknown = unservable_features(model_type, features)
+    if unknown:
+        raise ValueError(f"{model_path} expects features the {model_type} pipeline cannot build: {unknown[:5]}")
+
+    if threshold is None:
+        threshold = defaults['threshold']
+        if config_path and os.path.exists(config_path):
+            threshold = _read_json(config_path).get('default_threshold', threshold)
+
+    scaler = None
+    if scaler_path:
+        try:
+            scaler = _load_scaler(scaler_path)
+        except Exception:
+            print(f"⚠️  {model_type.upper()} Model: Scaler not found (using unscaled values)")
+
+    bundle = ModelBundle(
+        model_type, model, features, threshold,
+        version=version, model_path=model_path, scaler=scaler, tree_index=tree_index,
+        model_loader=(lambda: _load_model(model_path)) if model is None else None
+    )
+    if explainer_factory:
+        bundle.explainer = explainer_factory(bundle)
+    return bundle
+
+# ============================================
+# MANIFEST
+# ============================================
+def read_manifest(path=MANIFEST_PATH):
+    """Read the local manifest of active models ({} if missing/unreadable)"""
+    try:
+        return _read_json(path)
+    except Exception:
+        return {}
+
+def write_manifest_entry(model_type, version, model_path, threshold, features_path=None, path=MANIFEST_PATH):
+    """
+    Record the active model for model_type in the manifest.
+    Written to a temp file and renamed so readers never see a partial file.
+    """
+    manifest = read_manifest(path)
+    manifest[model_type] = {
+        'version': version,
+        'model_path': model_path,
+        'threshold': float(threshold),
+        'features_path': features_path,
+        'activated_at': datetime.now().isoformat()
+    }
+
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.active_models_')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+# ============================================
+# REGISTRY
+# ============================================
+class ModelRegistry:
+    """Holds the active ModelBundle per model type and hot-swaps new versions"""
+
+    def __init__(self, explainer_factory=None, manifest_path=MANIFEST_PATH, poll_seconds=POLL_SECONDS):
+        self.explainer_factory = explainer_factory
+        self.manifest_path = manifest_path
+        self.poll_seconds = poll_seconds
+        self._bundles = {}
+        self._swap_lock = threading.Lock()
+        self._manifest_mtime = None
+        self._failed = {}  # model_type -> version that failed to load (don't retry every poll)
+        self._db = None
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+        self._wake = threading.Event()
+        self._swap_listeners = []
+        self.last_error = {}
+
+    # ---------- reads (request path) ----------
+    def get(self, model_type):
+        """Current bundle for model_type (None if unavailable)"""
+        return self._bundles.get(model_type)
+
+    def status(self):
+        return {
+            model_type: (self._bundles[model_type].describe() if model_type in self._bundles else None)
+            for model_type in MODEL_TYPES
+        }
+
+    # ---------- loading ----------
+    def add_swap_listener(self, callback):
+        """Call callback(model_type) whenever this registry sees a new active version"""
+        self._swap_listeners.append(callback)
+
+    def _notify_swap(self, model_type):
+        for callback in self._swap_listeners:
+            try:
+                callback(model_type)
+            except Exception as e:
+                print(f"⚠️  Model swap listener failed: {e}")
+
+    def publish(self, bundle):
+        """Atomically make bundle the active model for its type"""
+        with self._swap_lock:
+            previous = self._bundles.get(bundle.model_type)
+            self._bundles[bundle.model_type] = bundle
+        old = previous.version if previous else None
+        print(f"🔁 {bundle.model_type.upper()} model swapped: {old} → {bundle.version}")
+        self._notify_swap(bundle.model_type)
+
+    def load_initial(self):
+        """Load startup artifacts (manifest entries take precedence)"""
+        manifest = read_manifest(self.manifest_path)
+        if os.path.exists(self.manifest_path):
+            self._manifest_mtime = os.path.getmtime(self.manifest_path)
+
+        for model_type in MODEL_TYPES:
+            entry = manifest.get(model_type)
+            try:
+                bundle = None
+                if entry:
+                    try:
+                        bundle = self._load_entry(model_type, entry, lazy_model=True)
+                    except Exception as e:
+                        self._failed[model_type] = entry.get('version')
+                        print(f"⚠️  {model_type.upper()} manifest entry {entry.get('version')} not loadable, using defaults ({e})")
+                if bundle is None:
+                    artifacts = DEFAULT_ARTIFACTS[model_type]
+                    if not os.path.exists(artifacts['features_path']):
+                        print(f"⚠️  {model_type.upper()} Model: Features file missing")
+                        continue
+                    bundle = load_bundle(
+                        model_type, artifacts['model_path'],
+                        features_path=artifacts['features_path'],
+                        config_path=artifacts['config_path'],
+                        scaler_path=artifacts['scaler_path'],
+                        explainer_factory=self.explainer_factory,
+                        lazy_model=True
+                    )
+                self._bundles[model_type] = bundle
+                kind = type(bundle.model).__name__ if bundle.model_loaded else "tree index (XGBoost deferred)"
+                print(f"✅ {model_type.upper()} Model: {kind} ({len(bundle.features)} features)")
+                print(f"   Threshold: {bundle.threshold}")
+            except Exception as e:
+                self.last_error[model_type] = str(e)
+                print(f"⚠️  {model_type.upper()} Model: Not available ({e})")
+
+    def _load_entry(self, model_type, entry, lazy_model=False):
+        return load_bundle(
+            model_type, entry['model_path'],
+            features_path=entry.get('features_path'),
+            threshold=entry.get('threshold'),
+            version=entry.get('version'),
+            scaler_path=DEFAULT_ARTIFACTS[model_type]['scaler_path'],
+            explainer_factory=self.explainer_factory,
+            lazy_model=lazy_model
+        )
+
+    def load_models(self):
+        """Load any deferred XGBoost models now (background warmup, before forking workers)"""
+        for bundle in list(self._bundles.values()):
+            bundle.model
+
+    def _maybe_swap(self, model_type, entry):
+        """Load and publish entry unless it is already active or known-bad"""
+        current = self._bundles.get(model_type)
+        version = entry.get('version')
+
+        if current and version and current.version == version:
+            return False
+        if self._failed.get(model_type) == version:
+            return False
+
+        # Same artifact as what we already serve: adopt the version label only
+        # (published as a new bundle: in-flight requests may hold the current one)
+        if current and current.version is None and \
+                os.path.normpath(entry['model_path']) == os.path.normpath(current.model_path or ''):
+            self.publish(current.with_version(version))
+            return False
+
+        # Listeners (the cached model_version_id) only hear about versions we
+        # actually serve: publish() notifies them, a failed load doesn't
+        try:
+            started = time.time()
+            bundle = self._load_entry(model_type, entry)
+            self.publish(bundle)
+            print(f"   Loaded in {time.time() - started:.2f}s")
+            self.last_error.pop(model_type, None)
+            return True
+        except Exception as e:
+            self._failed[model_type] = version
+            self.last_error[model_type] = str(e)
+            print(f"⚠️  {model_type.upper()} model {version} not loaded, keeping current: {e}")
+            return False
+
+    # ---------- watching ----------
+    def _active_rows_from_db(self):
+        with self._db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT model_type, version, model_path, threshold
+                FROM model_versions
+                WHERE is_active = TRUE
+            """)
+            rows = cursor.fetchall()
+        return {
+            r['model_type']: {
+                'version': r['version'],
+                'model_path': r['model_path'],
+                'threshold': float(r['threshold'])
+            }
+            for r in rows
+        }
+
+    def refresh(self):
+        """Check manifest and DB once; swap anything that changed"""
+        swapped = []
+
+        if os.path.exists(self.manifest_path):
+            mtime = os.path.getmtime(self.manifest_path)
+            if mtime != self._manifest_mtime:
+                self._manifest_mtime = mtime
+                for model_type, entry in read_manifest(self.manifest_path).items():
+                    if model_type in MODEL_TYPES and entry and self._maybe_swap(model_type, entry):
+                        swapped.append(model_type)
+
+        if self._db is not None:
+            try:
+                for model_type, entry in self._active_rows_from_db().items():
+                    if model_type in MODEL_TYPES and self._maybe_swap(model_type, entry):
+                        swapped.append(model_type)
+            except Exception as e:
+                print(f"⚠️  Model registry DB check failed: {e}")
+
+        return swapped
+
+    def notify(self):
+        """Wake the watcher now (e.g. right after a retrain activates a version)"""
+        self._wake.set()
+
+    def start_watcher(self, db=None):
+        """Start the background watcher thread (once per process)"""
+        self._db = db
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        stop = self._watcher_stop = threading.Event()
+
+        def watch():
+            while not stop.is_set():
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                if stop.is_set():
+                    break
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"⚠️  Model registry watcher error: {e}")
+
+        self._watcher = threading.Thread(target=watch, daemon=True, name="ModelRegistryWatcher")
+        self._watcher.start()
+        print(f"✅ Model registry watcher started (every {self.poll_seconds:g}s)")
+
+    def stop_watcher(self):
+        """Stop the watcher thread (e.g. in a preloading master before it forks workers)"""
+        if self._watcher is None:
+            return
+        self._watcher_stop.set()
+        self._wake.set()
+        if self._watcher.is_alive():
+            self._watcher.join(timeout=5)
+        self._watcher = None
+        self._wake.clear()
@@ -0,0 +1,69 @@
+# serving/scoring.py - Scoring many raw transactions with a ModelBundle
+"""
+Shared by /api/check-fraud/batch, the streaming endpoint and the offline
+scoring tools: risk bands, grouping mixed-mode records and turning one
+model's records into result dicts in a single vectorized pass.
+"""
+
+import numpy as np
+
+RISK_BANDS = [(0.7, "CRITICAL"), (0.5, "HIGH"), (0.4, "MEDIUM"), (0.2, "LOW")]
+
+def risk_level_for(proba):
+    """Map a fraud probability to its risk band"""
+    for cutoff, level in RISK_BANDS:
+        if proba >= cutoff:
+            return level
+    return "MINIMAL"
+
+def risk_levels_for(probas):
+    """Vectorized risk_level_for over an array of probabilities"""
+    return np.select(
+        [probas >= cutoff for cutoff, _ in RISK_BANDS],
+        [level for _, level in RISK_BANDS],
+        default="MINIMAL"
+    )
+
+def normalize_mode(mode):
+    return 'credit_card' if str(mode).lower() == 'credit_card' else 'banking'
+
+def group_by_mode(records, default_mode='banking'):
+    """{model_type: [indices]} from each record's "mode" (else default_mode)"""
+    groups = {}
+    for i, record in enumerate(records):
+        groups.setdefault(normalize_mode(record.get('mode', default_mode)), []).append(i)
+    return groups
+
+def score_records(bundle, records, explain=False, top_n=5):
+    """
+    Score records that all belong to bundle's model type.
+
+    Returns:
+        List of result dicts (mode, prediction, fraud_probability, risk_level,
+        threshold, model_version, transaction_amount[, top_contributing_features])
+
+    Raises:
+        ValueError: If a record can't be turned into features
+    """
+    X = bundle.prepare_many(records)
+    probas = bundle.predict_proba(X)
+    preds = (probas >= bundle.threshold).astype(int)
+    risks = risk_levels_for(probas)
+    top_features = bundle.explainer.explain_many(X, probas, top_n) if explain and bundle.explainer else None
+
+    amount_key = 'Amount' if bundle.model_type == 'credit_card' else 'Transaction_Amount'
+    results = []
+    for k, record in enumerate(records):
+        result = {
+            "mode": bundle.model_type,
+            "prediction": int(preds[k]),
+            "fraud_probability": float(probas[k]),
+            "risk_level": str(risks[k]),
+            "threshold": bundle.threshold,
+            "model_version": bundle.version,
+            "transaction_amount": float(record.get(amount_key, 0))
+        }
+        if top_features is not None:
+            result["top_contributing_features"] = top_features[k]
+        results.append(result)
+    return results
@@ -0,0 +1,65 @@
+# serving/single_flight.py - Coalesce identical in-flight calls
+"""
+Single-flight: while a call for a key is running, concurrent callers with the
+same key wait for it and share its result (or exception) instead of issuing
+their own. Used to collapse bursts of identical GenAI prompts into one LLM call.
+"""
+
+import threading
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Per-process duplicate call suppression keyed by string"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'calls': 0, 'coalesced': 0}
+
+    def do(self, key, fn):
+        """
+        Run fn() once per key at a time.
+
+        Returns:
+            (result, shared) - shared is True if this caller reused another caller's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats['coalesced'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats['calls'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def metrics(self):
+        return {**self.stats, 'in_flight': self.in_flight()}
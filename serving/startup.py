@@ -0,0 +1,157 @@
+# serving/startup.py - Startup timing: per-module import cost, init phases, background init
+"""
+Shows where the time before the first request goes.
+
+- track_imports() wraps builtins.__import__ and records the first import of
+  every module: wall time including everything it pulls in (like
+  python -X importtime's cumulative column) and how deeply it was nested.
+  Off unless STARTUP_IMPORT_REPORT=true (diagnostics, benchmarks/bench_startup.py):
+  the wrapper would otherwise sit in front of every import in production
+- phase(name) times a block of initialization
+- background(name, fn) runs deferred initialization on a daemon thread and
+  records its duration; wait_background() joins those threads
+
+app.py prints report() when startup finishes and serves it under /api/metrics.
+"""
+
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+STARTUP_CONFIG = {
+    'track_imports': os.getenv('STARTUP_IMPORT_REPORT', 'false').lower() == 'true',
+    'top_modules': int(os.getenv('STARTUP_REPORT_TOP', 12))
+}
+
+class StartupReport:
+    """Timings collected while the service starts"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.startup_ms = None
+        self.imports = {}           # module -> (cumulative ms, nesting depth)
+        self.phases = {}            # phase -> ms
+        self.background_tasks = {}  # name -> {'status', 'ms', 'error'}
+        self._threads = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_import = None
+        self._timed_import = None
+
+    # ---------- imports ----------
+    def track_imports(self):
+        """Start recording first-time imports (no-op if disabled or already tracking)"""
+        if not STARTUP_CONFIG['track_imports'] or self._timed_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+        local = self._local
+        imports = self.imports
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            depth = getattr(local, 'depth', 0)
+            local.depth = depth + 1
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                local.depth = depth
+                imports.setdefault(name, ((time.perf_counter() - start) * 1000, depth))
+
+        self._timed_import = builtins.__import__ = timed_import
+
+    def stop_tracking(self):
+        if self._timed_import is not None and builtins.__import__ is self._timed_import:
+            builtins.__import__ = self._original_import
+        self._timed_import = None
+
+    def _maybe_stop_tracking(self):
+        # Keep counting while deferred init is still importing things
+        with self._lock:
+            running = any(t['status'] == 'running' for t in self.background_tasks.values())
+        if self.startup_ms is not None and not running:
+            self.stop_tracking()
+
+    # ---------- phases ----------
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def background(self, name, fn):
+        """Run fn() on a daemon thread, recording how long it took"""
+        task = {'status': 'running', 'ms': None, 'error': None}
+        with self._lock:
+            self.background_tasks[name] = task
+
+        def run():
+            start = time.perf_counter()
+            try:
+                fn()
+                task['status'] = 'done'
+            except Exception as e:
+                task['status'] = 'failed'
+                task['error'] = str(e)
+                print(f"⚠️  Background init '{name}' failed: {e}")
+            finally:
+                task['ms'] = round((time.perf_counter() - start) * 1000, 1)
+                self._maybe_stop_tracking()
+
+        thread = threading.Thread(target=run, daemon=True, name=f"Startup-{name}")
+        self._threads.append(thread)
+        thread.start()
+        return thread
+
+    def wait_background(self, timeout=None):
+        """Join this process's background init threads"""
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(timeout)
+
+    def finish(self):
+        """Mark the app as importable / ready to accept requests"""
+        self.startup_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        self._maybe_stop_tracking()
+
+    # ---------- reporting ----------
+    def slowest_imports(self, top=None, top_level_only=True):
+        """[(module, cumulative ms)] slowest first"""
+        top = top or STARTUP_CONFIG['top_modules']
+        items = [(name, ms) for name, (ms, depth) in self.imports.items()
+                 if depth == 0 or not top_level_only]
+        items.sort(key=lambda item: -item[1])
+        return [(name, round(ms, 1)) for name, ms in items[:top]]
+
+    def report(self):
+        with self._lock:
+            background = {name: dict(task) for name, task in self.background_tasks.items()}
+        return {
+            'startup_ms': self.startup_ms,
+            'phases_ms': dict(self.phases),
+            'background': background,
+            'modules_imported': len(self.imports),
+            'import_ms': dict(self.slowest_imports()),
+            'slowest_modules_ms': dict(self.slowest_imports(top_level_only=False))
+        }
+
+    def print_report(self):
+        modules = f" ({len(self.imports)} modules imported)" if self.imports else ""
+        print(f"⏱️  Startup: {self.startup_ms:.0f} ms{modules}")
+        if self.phases:
+            print("   Phases: " + " | ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases.items()))
+        if self.imports:
+            print("   Import cost (cumulative, as imported by the app):")
+            for name, ms in self.slowest_imports():
+                print(f"     {name:<36}{ms:>9.1f} ms")
+        for name, task in self.background_tasks.items():
+            print(f"   Background: {name} ({task['status']})")
+
+# One report per process (the master's, when gunicorn preloads)
+startup_report = StartupReport()
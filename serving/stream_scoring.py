@@ -0,0 +1,340 @@
+# serving/stream_scoring.py - Streaming NDJSON / CSV scoring
+"""
+Scores an unbounded stream of raw transactions in fixed-size chunks, so
+memory stays flat whatever the input size:
+
+    lines -> records (NDJSON or CSV) -> chunks of STREAM_CHUNK_SIZE
+          -> score_records per model -> result lines, in input order
+
+A row that can't be parsed or featurized becomes an error result for that
+line instead of failing its chunk.
+
+Used by POST /api/check-fraud/stream and, for files on disk, by the CLI:
+
+    python -m serving.stream_scoring transactions.csv -o scores.ndjson --mode banking
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from serving.scoring import group_by_mode, score_records
+
+STREAM_CONFIG = {
+    'chunk_size': int(os.getenv('STREAM_CHUNK_SIZE', 1000)),
+    'max_line_bytes': int(os.getenv('STREAM_MAX_LINE_BYTES', 1 << 20)),
+    # Offline top features: "path" (Saabas, like the API) or "shap" (batched TreeSHAP)
+    'explainer': os.getenv('EXPLAINER_METHOD', 'path').lower()
+}
+
+EXPLAINERS = ('path', 'shap')
+
+RESULT_COLUMNS = [
+    'line', 'id', 'mode', 'prediction', 'fraud_probability', 'risk_level',
+    'threshold', 'model_version', 'transaction_amount', 'top_features', 'error'
+]
+
+# ============================================
+# PARSING
+# ============================================
+# Yielded by iter_lines in place of a line over max_line_bytes
+LINE_TOO_LONG = object()
+
+def iter_lines(stream, max_line_bytes=None):
+    """
+    Decoded lines from a binary stream (request body, file), one at a time.
+
+    A line longer than max_line_bytes is read to its end and discarded; it
+    yields LINE_TOO_LONG, so the following lines keep their line numbers
+    """
+    limit = max_line_bytes or STREAM_CONFIG['max_line_bytes']
+    first = True
+    while True:
+        raw = stream.readline(limit)
+        if not raw:
+            return
+        first, was_first = False, first
+        if len(raw) >= limit and not raw.endswith(b'\n'):
+            rest = stream.readline(limit)
+            if rest:
+                while rest and not rest.endswith(b'\n'):
+                    rest = stream.readline(limit)
+                yield LINE_TOO_LONG
+                continue
+        yield raw.decode('utf-8-sig' if was_first else 'utf-8', errors='replace')
+
+def _too_long_error():
+    return f"Line exceeds {STREAM_CONFIG['max_line_bytes']} bytes"
+
+def _coerce(value):
+    """CSV cell -> int / float / str (None for empty cells, so defaults apply)"""
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def parse_ndjson(lines):
+    """Yield (line_no, record, error) for every non-blank line"""
+    for line_no, line in enumerate(lines, 1):
+        if line is LINE_TOO_LONG:
+            yield line_no, None, _too_long_error()
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(record, dict):
+            yield line_no, record, None
+        else:
+            yield line_no, None, "Expected a JSON object"
+
+def parse_csv(lines, delimiter=','):
+    """Yield (line_no, record, error) for every data row; the first row is the header"""
+    too_long = set()
+
+    def physical_lines():
+        # Overlong lines reach the reader as blank lines, so line_num stays right
+        for line_no, line in enumerate(lines, 1):
+            if line is LINE_TOO_LONG:
+                too_long.add(line_no)
+                line = '\n'
+            yield line
+
+    reader = csv.reader(physical_lines(), delimiter=delimiter)
+    header = None
+    for row in reader:
+        if reader.line_num in too_long:
+            yield reader.line_num, None, _too_long_error()
+            continue
+        if not row:
+            continue
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+        if len(row) != len(header):
+            yield reader.line_num, None, f"Expected {len(header)} fields, got {len(row)}"
+            continue
+        record = {name: _coerce(cell) for name, cell in zip(header, row)}
+        yield reader.line_num, {k: v for k, v in record.items() if v is not None}, None
+
+def parse_tsv(lines):
+    return parse_csv(lines, delimiter='\t')
+
+PARSERS = {'ndjson': parse_ndjson, 'csv': parse_csv, 'tsv': parse_tsv}
+
+def format_for_path(path, default='ndjson'):
+    """'csv' / 'tsv' / 'ndjson' from a file extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return 'csv'
+    if ext == '.tsv':
+        return 'tsv'
+    if ext in ('.ndjson', '.jsonl', '.json'):
+        return 'ndjson'
+    return default
+
+# ============================================
+# SCORING
+# ============================================
+def chunked(items, size):
+    """Lists of up to size items from any iterable"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def score_chunk(get_bundle, rows, default_mode='banking', explain=False, id_field=None):
+    """
+    Score one chunk of parsed (line_no, record, error) rows.
+
+    Returns:
+        (records, results) in input order; results carry "line" (and "id" when
+        id_field is present in the record) and "error" for rows that failed
+    """
+    records = [record for _, record, _ in rows]
+    scored = [{"error": error} if error else None for _, _, error in rows]
+    valid = [i for i, (_, _, error) in enumerate(rows) if error is None]
+
+    for mode, positions in group_by_mode([records[i] for i in valid], default_mode).items():
+        indices = [valid[p] for p in positions]
+        bundle = get_bundle(mode)
+        if bundle is None:
+            for i in indices:
+                scored[i] = {"mode": mode, "error": f"{mode} model unavailable"}
+            continue
+        try:
+            results = score_records(bundle, [records[i] for i in indices], explain)
+        except Exception:
+            # Isolate the bad row(s) instead of failing the whole chunk
+            results = []
+            for i in indices:
+                try:
+                    results.append(score_records(bundle, [records[i]], explain)[0])
+                except Exception as e:
+                    results.append({"mode": mode, "error": str(e)})
+        for i, result in zip(indices, results):
+            scored[i] = result
+
+    out = []
+    for (line_no, record, _), result in zip(rows, scored):
+        row = {"line": line_no}
+        if id_field and record is not None and id_field in record:
+            row["id"] = record[id_field]
+        row.update(result)
+        out.append(row)
+    return records, out
+
+class StreamStats:
+    """Running totals for one scoring stream"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.errors = 0
+        self.fraud_count = 0
+        self.chunks = 0
+
+    def add(self, results):
+        self.chunks += 1
+        self.rows += len(results)
+        for result in results:
+            if 'error' in result:
+                self.errors += 1
+            else:
+                self.fraud_count += result['prediction']
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'rows': self.rows,
+            'scored': self.rows - self.errors,
+            'errors': self.errors,
+            'fraud_count': self.fraud_count,
+            'chunks': self.chunks,
+            'elapsed_ms': round(elapsed * 1000, 1),
+            'rows_per_sec': round(self.rows / elapsed, 1) if elapsed > 0 else None
+        }
+
+def score_stream(get_bundle, rows, default_mode='banking', chunk_size=None,
+                 explain=False, id_field=None, stats=None):
+    """Yield (records, results) for each chunk of parsed rows"""
+    for chunk in chunked(rows, chunk_size or STREAM_CONFIG['chunk_size']):
+        records, results = score_chunk(get_bundle, chunk, default_mode, explain, id_field)
+        if stats is not None:
+            stats.add(results)
+        yield records, results
+
+# ============================================
+# OUTPUT
+# ============================================
+def ndjson_text(results):
+    return ''.join(json.dumps(result) + "\n" for result in results)
+
+def csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(RESULT_COLUMNS)
+    return buffer.getvalue()
+
+def csv_text(results):
+    """CSV rows in RESULT_COLUMNS order; top features as 'name;name;...'"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for result in results:
+        top = result.get('top_contributing_features')
+        row = dict(result, top_features=';'.join(f['feature'] for f in top) if top else '')
+        writer.writerow([row.get(column, '') for column in RESULT_COLUMNS])
+    return buffer.getvalue()
+
+FORMATTERS = {'ndjson': ndjson_text, 'csv': csv_text}
+
+# ============================================
+# CLI
+# ============================================
+def load_registry(explain=False, explainer=None):
+    """
+    Serving artifacts as the API loads them (log output goes to stderr).
+
+    explainer: "path" (TreePathExplainer) or "shap" (DualShapExplainer, one
+    TreeSHAP call per chunk); default STREAM_CONFIG['explainer']
+    """
+    from serving.model_registry import ModelRegistry
+    from serving.tree_paths import TreePathExplainer
+
+    explainer = (explainer or STREAM_CONFIG['explainer']).lower()
+    if explainer not in EXPLAINERS:
+        raise ValueError(f"explainer must be one of {', '.join(EXPLAINERS)}, got {explainer!r}")
+
+    def make_explainer(bundle):
+        if bundle.tree_index is None:
+            return None
+        if explainer == 'path':
+            return TreePathExplainer(bundle.tree_index)
+        from shap_explainer import DualShapExplainer
+        return DualShapExplainer(bundle.model, bundle.features, bundle.model_type)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        registry = ModelRegistry(explainer_factory=make_explainer if explain else None)
+        registry.load_initial()
+    return registry
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="NDJSON (.ndjson/.jsonl) or CSV file, '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="results file (.ndjson or .csv), '-' for stdout")
+    parser.add_argument('--format', choices=sorted(PARSERS), help="input format (default: from extension)")
+    parser.add_argument('--output-format', choices=sorted(FORMATTERS), help="default: from extension")
+    parser.add_argument('--mode', default='banking', help="model for rows without a 'mode' field")
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CONFIG['chunk_size'])
+    parser.add_argument('--explain', action='store_true', help="add top contributing features")
+    parser.add_argument('--explainer', choices=EXPLAINERS, default=STREAM_CONFIG['explainer'],
+                        help="top features from the Saabas path index or batched TreeSHAP")
+    parser.add_argument('--id-field', help="echo this input field as 'id' in every result")
+    args = parser.parse_args()
+
+    in_format = args.format or format_for_path(args.input)
+    out_format = args.output_format or format_for_path(args.output)
+    if out_format not in FORMATTERS:
+        parser.error(f"can't write {out_format} results; use a .csv or .ndjson output file")
+    registry = load_registry(args.explain, args.explainer)
+
+    stats = StreamStats()
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        if out_format == 'csv':
+            sink.write(csv_header())
+        rows = PARSERS[in_format](iter_lines(source))
+        for _, results in score_stream(registry.get, rows, args.mode, args.chunk_size,
+                                       args.explain, args.id_field, stats):
+            sink.write(FORMATTERS[out_format](results))
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    summary = stats.summary()
+    print(f"✅ Scored {summary['scored']:,} rows ({summary['errors']:,} errors, "
+          f"{summary['fraud_count']:,} flagged) in {summary['elapsed_ms'] / 1000:.1f}s "
+          f"- {summary['rows_per_sec']:,.0f} rows/s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# serving/warmup.py - Per-worker warmup and readiness state
+"""
+Runs synthetic work through the prediction pipeline before a worker reports
+ready, so the first real request doesn't pay for lazy model loading, the
+XGBoost thread pool, explainer setup or the DB pool.
+
+Warmup is a list of named steps run once per process on a background thread.
+Required steps must succeed for the worker to become ready; optional steps
+(e.g. the database, which the service can run without) only record their
+outcome. Timings per step are kept for /ready.
+"""
+
+import os
+import threading
+import time
+
+WARMUP_CONFIG = {
+    'enabled': os.getenv('WARMUP_ENABLED', 'true').lower() == 'true',
+    'batch_rows': int(os.getenv('WARMUP_BATCH_ROWS', 64)),
+    'rounds': int(os.getenv('WARMUP_ROUNDS', 3))
+}
+
+# Realistic-looking raw payloads (same shape as /api/check-fraud bodies)
+SYNTHETIC_TRANSACTIONS = {
+    'banking': {
+        "Transaction_Amount": 2450.75,
+        "Account_Balance": 5300.20,
+        "Timestamp": "2023-10-15 02:37:00",
+        "Transaction_Type": "Online",
+        "Daily_Transaction_Count": 7,
+        "Avg_Transaction_Amount_7d": 310.40,
+        "Failed_Transaction_Count_7d": 2,
+        "Card_Age": 45,
+        "Transaction_Distance": 1830.5,
+        "IP_Address_Flag": 1
+    },
+    'credit_card': {
+        "Time": 40612.0,
+        "Amount": 149.62,
+        **{f"V{i}": round(((i * 37) % 17 - 8) / 5.0, 2) for i in range(1, 29)}
+    }
+}
+
+def synthetic_batch(model_type, n):
+    """n copies of the synthetic transaction with varied amounts"""
+    base = SYNTHETIC_TRANSACTIONS[model_type]
+    amount_key = 'Transaction_Amount' if model_type == 'banking' else 'Amount'
+    return [{**base, amount_key: base[amount_key] * (0.25 + 1.5 * i / max(n - 1, 1))} for i in range(n)]
+
+class Warmup:
+    """Readiness state for this worker process"""
+
+    def __init__(self, enabled=None):
+        self.enabled = WARMUP_CONFIG['enabled'] if enabled is None else enabled
+        self._steps = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self.status = 'pending' if self.enabled else 'ready'
+        self.started_at = None
+        self.total_ms = None
+        self.results = {}
+
+    def add_step(self, name, fn, required=True):
+        """Register fn() as a warmup step (run in registration order)"""
+        self._steps.append((name, fn, required))
+
+    # ---------- running ----------
+    def start(self):
+        """Run warmup on a background thread, once per process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return self._thread
+            self._pid = os.getpid()
+            self._reset()
+            if not self.enabled:
+                self._thread = None
+                return None
+            self.status = 'running'
+            self._thread = threading.Thread(target=self._run, daemon=True, name="Warmup")
+            self._thread.start()
+            return self._thread
+
+    def wait(self, timeout=None):
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            thread.join(timeout)
+        return self.ready
+
+    def _run(self):
+        self.started_at = time.time()
+        start = time.perf_counter()
+        failed = False
+        for name, fn, required in self._steps:
+            step_start = time.perf_counter()
+            result = {'required': required}
+            try:
+                outcome = fn()
+                result['status'] = 'skipped' if outcome is False else 'ok'
+            except Exception as e:
+                result['status'] = 'failed'
+                result['error'] = str(e)
+                failed = failed or required
+                print(f"⚠️  Warmup step '{name}' failed: {e}")
+            result['ms'] = round((time.perf_counter() - step_start) * 1000, 1)
+            with self._lock:
+                self.results[name] = result
+
+        self.total_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.status = 'failed' if failed else 'ready'
+        print(f"{'✅' if not failed else '❌'} Warmup {self.status} in {self.total_ms:.0f} ms (pid {os.getpid()})")
+
+    # ---------- reporting ----------
+    @property
+    def ready(self):
+        return self.status == 'ready'
+
+    def describe(self):
+        with self._lock:
+            steps = {name: dict(result) for name, result in self.results.items()}
+        return {
+            'status': self.status,
+            'enabled': self.enabled,
+            'started_at': self.started_at,
+            'total_ms': self.total_ms,
+            'steps': steps
+        }
@@ -262,8 +262,13 @@ import shap
 import pandas as pd
 import numpy as np
 import warnings
+from serving.attribution import AttributionBatch
+from serving.tree_paths import TreeEnsemble
 warnings.filterwarnings('ignore')
 
+# Rows per TreeSHAP call in explain_batch (bounds the N x F intermediate)
+DEFAULT_CHUNK_SIZE = 10000
+
 class DualShapExplainer:
     """Unified SHAP explainer for Credit Card and Banking fraud detection"""
     
@@ -282,6 +287,12 @@ class DualShapExplainer:
         self.explainer = None
         self.is_working = False
         
+        # Saabas path index: faithful fallback for XGBoost models when SHAP fails
+        try:
+            self.path_index = TreeEnsemble.from_booster(model, feature_names)
+        except Exception:
+            self.path_index = None
+        
         try:
             print(f"   Initializing SHAP for {model_type} model...")
             
@@ -315,130 +326,124 @@ class DualShapExplainer:
             except:
                 self.feature_importances = np.ones(len(feature_names)) / len(feature_names)
     
-    def explain(self, X, top_n=5):
+    def explain(self, X, top_n=5, proba=None):
         """
         Get top features - GUARANTEED to return features
         
         Returns:
             List of dicts with feature contributions
         """
-        # Try SHAP first
+        try:
+            batch = self.explain_batch(X[:1] if not hasattr(X, 'iloc') else X.iloc[:1], top_n)
+            if batch.indices.shape[1] > 0:
+                return batch.records(0)
+            print(f"   ⚠️  Explanation returned empty")
+        except Exception as e:
+            print(f"   ❌ Fallback FAILED: {e}")
+        
+        # Absolute last resort: return top features with zero contribution
+        return [
+            {
+                "feature": self.feature_names[i],
+                "value": 0.0,
+                "shap_value": 0.0,
+                "impact": "unknown",
+                "method": "error"
+            }
+            for i in range(min(top_n, len(self.feature_names)))
+        ]
+    
+    def explain_many(self, X, probas=None, top_n=5):
+        """Top features for every row of X (the registry explainer interface)"""
+        return self.explain_batch(X, top_n).to_records()
+    
+    def explain_batch(self, X, top_n=5, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Top-k attributions for every row of an N x F matrix.
+        
+        TreeSHAP runs once per chunk of chunk_size rows (bounds the N x F
+        intermediate), top-k is picked per row with argpartition.
+        
+        Returns:
+            AttributionBatch of (N, top_n) arrays (method "shap" or "importance")
+        """
+        values = X.values if hasattr(X, 'values') else np.asarray(X)
+        if values.ndim == 1:
+            values = values.reshape(1, -1)
+        
         if self.is_working and self.explainer is not None:
             try:
-                shap_values = self.explainer.shap_values(X)
-                
-                # Handle different formats
-                if isinstance(shap_values, list):
-                    shap_vals = shap_values[1] if len(shap_values) > 1 else shap_values[0]
-                else:
-                    shap_vals = shap_values
-                
-                # Convert to numpy array if needed
-                if not isinstance(shap_vals, np.ndarray):
-                    shap_vals = np.array(shap_vals)
-                
-                # Flatten if needed
-                if len(shap_vals.shape) > 1:
-                    shap_vals = shap_vals.flatten()
-                
-                # Ensure correct length
-                if len(shap_vals) != len(self.feature_names):
-                    print(f"   ⚠️  SHAP length mismatch: {len(shap_vals)} vs {len(self.feature_names)}")
-                    raise ValueError("Length mismatch")
-                
-                # Get top features
-                shap_abs = np.abs(shap_vals)
-                top_indices = np.argsort(shap_abs)[-top_n:][::-1]
-                
-                top_features = []
-                for idx in top_indices:
-                    feature_name = self.feature_names[idx]
-                    shap_value = float(shap_vals[idx])
-                    
-                    # Get feature value safely
-                    if hasattr(X, 'iloc'):
-                        feature_value = float(X.iloc[0, idx])
-                    elif hasattr(X, '__getitem__'):
-                        feature_value = float(X[0][idx])
-                    else:
-                        feature_value = 0.0
-                    
-                    impact = "increases" if shap_value > 0 else "decreases"
-                    
-                    top_features.append({
-                        "feature": feature_name,
-                        "value": round(feature_value, 4),
-                        "shap_value": round(shap_value, 4),
-                        "impact": impact
-                    })
-                
-                if len(top_features) > 0:
-                    return top_features
-                else:
-                    print(f"   ⚠️  SHAP returned empty, using fallback")
-                    
+                parts = []
+                for start in range(0, len(values), chunk_size):
+                    chunk = X.iloc[start:start + chunk_size] if hasattr(X, 'iloc') else values[start:start + chunk_size]
+                    contributions = self._shap_matrix(chunk)
+                    parts.append(AttributionBatch.from_matrix(
+                        self.feature_names, values[start:start + chunk_size], contributions, top_n, "shap"
+                    ))
+                return _concat_batches(self.feature_names, parts, "shap", top_n)
             except Exception as e:
                 print(f"   ⚠️  SHAP error: {e}, using fallback")
         
+        if self.path_index is not None:
+            try:
+                return AttributionBatch.from_matrix(
+                    self.feature_names, values, self.path_index.contributions(values), top_n, "saabas"
+                )
+            except Exception as e:
+                print(f"   ⚠️  Path index error: {e}, using importance fallback")
+        
         # ALWAYS use fallback if SHAP failed
-        return self._explain_with_importance(X, top_n)
+        return self._explain_with_importance(values, top_n)
     
-    def _explain_with_importance(self, X, top_n=5):
-        """Fallback using feature importance - GUARANTEED to work"""
-        try:
-            # Get feature values
-            if hasattr(X, 'iloc'):
-                feature_values = X.iloc[0].values
-            elif hasattr(X, 'values'):
-                feature_values = X.values[0]
-            else:
-                feature_values = np.array(X[0])
-            
-            # Ensure we have importance values
-            if not hasattr(self, 'feature_importances') or self.feature_importances is None:
-                try:
-                    self.feature_importances = self.model.feature_importances_
-                except:
-                    # Last resort: equal importance
-                    self.feature_importances = np.ones(len(self.feature_names)) / len(self.feature_names)
-            
-            # Calculate contributions
-            contributions = feature_values * self.feature_importances
-            
-            # Get top features
-            top_indices = np.argsort(np.abs(contributions))[-top_n:][::-1]
-            
-            top_features = []
-            for idx in top_indices:
-                feature_name = self.feature_names[idx]
-                feature_value = float(feature_values[idx])
-                contribution = float(contributions[idx])
-                
-                impact = "increases" if contribution > 0 else "decreases"
-                
-                top_features.append({
-                    "feature": feature_name,
-                    "value": round(feature_value, 4),
-                    "shap_value": round(contribution, 4),
-                    "impact": impact,
-                    "method": "importance"
-                })
-            
-            return top_features
-            
-        except Exception as e:
-            print(f"   ❌ Fallback FAILED: {e}")
-            # Absolute last resort: return top features with zero contribution
-            return [
-                {
-                    "feature": self.feature_names[i],
-                    "value": 0.0,
-                    "shap_value": 0.0,
-                    "impact": "unknown",
-                    "method": "error"
-                }
-                for i in range(min(top_n, len(self.feature_names)))
-            ]
+    def _shap_matrix(self, X):
+        """(n, F) positive-class SHAP values whatever shape the explainer returns"""
+        shap_values = self.explainer.shap_values(X)
+        
+        # Handle different formats
+        if isinstance(shap_values, list):
+            shap_values = shap_values[1] if len(shap_values) > 1 else shap_values[0]
+        shap_values = np.asarray(shap_values)
+        if shap_values.ndim == 3:
+            shap_values = shap_values[..., -1]  # (n, F, classes)
+        if shap_values.ndim == 1:
+            shap_values = shap_values.reshape(1, -1)
+        
+        # Ensure correct length
+        if shap_values.shape[1] != len(self.feature_names):
+            print(f"   ⚠️  SHAP length mismatch: {shap_values.shape[1]} vs {len(self.feature_names)}")
+            raise ValueError("Length mismatch")
+        return shap_values
+    
+    def _explain_with_importance(self, values, top_n=5):
+        """Fallback using feature importance (value x importance), vectorized over rows"""
+        # Ensure we have importance values
+        if not hasattr(self, 'feature_importances') or self.feature_importances is None:
+            try:
+                self.feature_importances = self.model.feature_importances_
+            except:
+                # Last resort: equal importance
+                self.feature_importances = np.ones(len(self.feature_names)) / len(self.feature_names)
+        
+        values = np.asarray(values, dtype=np.float64)
+        contributions = values * np.asarray(self.feature_importances, dtype=np.float64)
+        return AttributionBatch.from_matrix(self.feature_names, values, contributions, top_n, "importance")
+
+
+def _concat_batches(feature_names, parts, method, top_n):
+    """Stack per-chunk AttributionBatches"""
+    if not parts:
+        empty = np.empty((0, min(top_n, len(feature_names))))
+        return AttributionBatch(feature_names, empty.astype(np.int32), empty.astype(np.float32),
+                                empty.astype(np.float32), method)
+    if len(parts) == 1:
+        return parts[0]
+    return AttributionBatch(
+        feature_names,
+        np.concatenate([p.indices for p in parts]),
+        np.concatenate([p.contributions for p in parts]),
+        np.concatenate([p.values for p in parts]),
+        method
+    )
 
 
 if __name__ == "__main__":
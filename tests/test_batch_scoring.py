@@ -0,0 +1,66 @@
+# tests/test_batch_scoring.py - /api/check-fraud/batch
+import pytest
+
+BANKING = {
+    'Transaction_Amount': 5000, 'Account_Balance': 1000, 'Timestamp': '2023-10-27 23:30:00',
+    'Transaction_Type': 'Online', 'Daily_Transaction_Count': 15, 'Avg_Transaction_Amount_7d': 500,
+    'Failed_Transaction_Count_7d': 3, 'Card_Age': 10, 'Transaction_Distance': 5000, 'IP_Address_Flag': 1
+}
+CREDIT_CARD = {'mode': 'credit_card', 'Time': 3600, 'Amount': 120.5, **{f'V{i}': 0.1 for i in range(1, 29)}}
+
+def post_batch(client, body, **kwargs):
+    response = client.post("/api/check-fraud/batch", json=body, **kwargs)
+    return response.status_code, response.get_json()
+
+def test_mixed_batch_matches_single_requests(client):
+    status, body = post_batch(client, {'transactions': [BANKING, CREDIT_CARD], 'explain': True})
+
+    assert status == 200, body
+    assert [r['index'] for r in body['results']] == [0, 1]
+    assert [r['mode'] for r in body['results']] == ['banking', 'credit_card']
+    for transaction, result in zip([BANKING, CREDIT_CARD], body['results']):
+        single = client.post("/api/check-fraud", json={'mode': result['mode'], **transaction}).get_json()
+        assert result['fraud_probability'] == pytest.approx(single['fraud_probability'], abs=1e-6)
+        assert result['top_contributing_features']
+
+@pytest.mark.parametrize('body', [
+    [BANKING],
+    {'transactions': []},
+    {'transactions': BANKING},
+    {'mode': 'banking'}
+])
+def test_malformed_body_is_400(client, body):
+    status, result = post_batch(client, body)
+    assert status == 400 and result['status'] == 'error'
+
+def test_non_json_body_is_400(client):
+    response = client.post("/api/check-fraud/batch", data="Transaction_Amount=5", content_type='text/plain')
+    assert response.status_code == 400
+
+@pytest.mark.parametrize('item', [5, 'text', None, [BANKING]])
+def test_non_object_transaction_names_its_index(client, item):
+    status, body = post_batch(client, {'transactions': [BANKING, BANKING, item]})
+    assert status == 400
+    assert body['index'] == 2 and 'transactions[2]' in body['message']
+
+@pytest.mark.parametrize('field, value', [
+    ('Transaction_Amount', 'abc'),
+    ('Transaction_Amount', None),
+    ('Card_Age', [1]),
+    ('Account_Balance', {})
+])
+def test_bad_field_value_names_the_request_index(client, field, value):
+    # The bad banking row is the second banking row but index 2 of the request
+    status, body = post_batch(client, {'transactions': [BANKING, CREDIT_CARD, {**BANKING, field: value}]})
+    assert status == 400
+    assert body['index'] == 2
+    assert field in body['message'] and 'transactions[2]' in body['message']
+
+def test_credit_card_row_missing_v_columns_is_400(client):
+    status, body = post_batch(client, {'transactions': [BANKING, {'mode': 'credit_card', 'Amount': 1}]})
+    assert status == 400 and body['index'] == 1
+
+def test_oversized_batch_is_413(client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'MAX_BATCH_SIZE', 2)
+    status, _ = post_batch(client, {'transactions': [BANKING] * 3})
+    assert status == 413
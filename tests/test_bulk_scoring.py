@@ -0,0 +1,90 @@
+# tests/test_bulk_scoring.py - Offline bulk scoring over a process pool
+import pandas as pd
+import pytest
+
+from tests.test_batch_scoring import BANKING
+from serving import bulk_scoring
+from serving.bulk_scoring import OUTPUT_COLUMNS, read_chunks, run
+
+ROWS = 3000
+CHUNK_SIZE = 700
+BAD_ROWS = {5, 1399, 2100}      # unparseable Card_Age -> per-row errors
+
+@pytest.fixture(scope='module')
+def loaded_registry():
+    registry = bulk_scoring.load_registry(explain=True)
+    registry.load_models()
+    return registry
+
+@pytest.fixture
+def registry(loaded_registry, monkeypatch):
+    # Loaded in the parent so forked workers share it, as in main()
+    monkeypatch.setattr(bulk_scoring, '_registry', loaded_registry)
+    return loaded_registry
+
+@pytest.fixture(scope='module')
+def transactions():
+    rows = [{**BANKING, 'txn_id': f"t{i}", 'Transaction_Amount': 50 + (i * 37) % 5000} for i in range(ROWS)]
+    for i in BAD_ROWS:
+        rows[i]['Card_Age'] = 'old'
+    return pd.DataFrame(rows)
+
+@pytest.fixture
+def csv_input(transactions, tmp_path):
+    path = str(tmp_path / 'transactions.csv')
+    transactions.to_csv(path, index=False)
+    return path
+
+def test_output_is_in_input_order_across_workers(registry, csv_input, tmp_path):
+    single, pooled = str(tmp_path / 'single.csv'), str(tmp_path / 'pooled.csv')
+    run(csv_input, single, workers=1, chunk_size=CHUNK_SIZE, explain=True, id_field='txn_id')
+    report = run(csv_input, pooled, workers=2, chunk_size=CHUNK_SIZE, explain=True, id_field='txn_id')
+
+    assert report['rows'] == ROWS and report['errors'] == len(BAD_ROWS)
+    assert report['chunks'] == 5 and report['workers'] == 2
+
+    out = pd.read_csv(pooled)
+    assert list(out.columns) == OUTPUT_COLUMNS
+    assert out['row'].tolist() == list(range(ROWS))
+    assert out['id'].tolist() == [f"t{i}" for i in range(ROWS)]
+    assert set(out.index[out['error'].notna()]) == BAD_ROWS
+    pd.testing.assert_frame_equal(out, pd.read_csv(single))
+
+def test_limit_truncates_the_last_chunk(csv_input):
+    chunks = [(first, len(frame)) for first, frame in read_chunks(csv_input, CHUNK_SIZE, limit=1500)]
+    assert chunks == [(0, 700), (700, 700), (1400, 100)]
+    assert [first for first, _ in read_chunks(csv_input, CHUNK_SIZE, limit=1400)] == [0, 700]
+    assert sum(len(frame) for _, frame in read_chunks(csv_input, CHUNK_SIZE)) == ROWS
+
+def test_limit_through_run(registry, csv_input, tmp_path):
+    output = str(tmp_path / 'limited.csv')
+    report = run(csv_input, output, workers=1, chunk_size=CHUNK_SIZE, limit=1000)
+    assert report['rows'] == 1000 and report['chunks'] == 2
+    assert pd.read_csv(output)['row'].tolist() == list(range(1000))
+
+def test_csv_sink_joins_top_features(registry, csv_input, tmp_path):
+    output = str(tmp_path / 'scores.csv')
+    run(csv_input, output, workers=1, chunk_size=CHUNK_SIZE, explain=True, limit=10)
+
+    out = pd.read_csv(output)
+    first = out.iloc[0]
+    assert first['mode'] == 'banking' and first['prediction'] in (0, 1)
+    assert 0.0 <= first['fraud_probability'] <= 1.0
+    assert len(first['top_features'].split(';')) == 5
+    assert len(first['top_contributions'].split(';')) == 5
+    assert out.loc[5, 'error'] and pd.isna(out.loc[5, 'prediction']) and pd.isna(out.loc[5, 'top_features'])
+
+def test_parquet_in_and_out(registry, transactions, tmp_path):
+    pytest.importorskip('pyarrow')
+    source, output = str(tmp_path / 'transactions.parquet'), str(tmp_path / 'scores.parquet')
+    transactions.astype({'Card_Age': str}).to_parquet(source, index=False)   # mixed column, as read from CSV
+
+    assert [len(frame) for _, frame in read_chunks(source, CHUNK_SIZE, limit=800)] == [700, 100]
+    report = run(source, output, workers=2, chunk_size=CHUNK_SIZE, explain=True, id_field='txn_id')
+
+    out = pd.read_parquet(output)
+    assert report['rows'] == ROWS and list(out.columns) == OUTPUT_COLUMNS
+    assert out['row'].tolist() == list(range(ROWS))
+    assert out['id'].tolist() == [f"t{i}" for i in range(ROWS)]
+    assert len(out.loc[0, 'top_features']) == 5 and isinstance(out.loc[0, 'top_features'][0], str)
+    assert out.loc[5, 'error'] and len(out.loc[5, 'top_features']) == 0
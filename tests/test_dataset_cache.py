@@ -0,0 +1,53 @@
+# tests/test_dataset_cache.py - Columnar dataset cache
+import os
+
+import pandas as pd
+import pytest
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    from retraining import dataset_cache
+    monkeypatch.setitem(dataset_cache.DATASET_CACHE_CONFIG, 'enabled', True)
+    monkeypatch.setitem(dataset_cache.DATASET_CACHE_CONFIG, 'cache_dir', str(tmp_path / 'cache'))
+    return dataset_cache
+
+def assert_same_frame(cached, expected):
+    # Cached numeric columns are np.memmap views; compare values and dtypes
+    pd.testing.assert_frame_equal(cached.copy(), expected, check_exact=True)
+
+def write_csv(path, amounts):
+    pd.DataFrame({
+        'Time': range(len(amounts)),
+        'Amount': amounts,                                    # not exactly representable in float32
+        'Balance': [1e9 + i / 3 for i in range(len(amounts))],
+        'Count': [i * 1000003 for i in range(len(amounts))],
+        'Class': [i % 2 for i in range(len(amounts))],
+        'Type': ['Online', None, 'POS', 'ATM'][:len(amounts)] + ['POS'] * (len(amounts) - 4)
+    }).to_csv(path, index=False)
+
+def test_cached_frame_matches_read_csv(cache, tmp_path):
+    path = str(tmp_path / 'transactions.csv')
+    write_csv(path, [0.1, 123.456789, 2.5e-7, 98765.4321, 7.77])
+
+    built = cache.load_dataset(path)            # first load builds the cache
+    mapped = cache.load_dataset(path)           # second load memory-maps it
+
+    expected = pd.read_csv(path)
+    assert_same_frame(built, expected)
+    assert_same_frame(mapped, expected)
+    assert cache.cache_info(path)['format'] == cache.CACHE_FORMAT
+    assert_same_frame(cache.load_dataset(path, columns=['Amount', 'Type']),
+                      pd.read_csv(path, usecols=['Amount', 'Type']))
+
+def test_changed_csv_is_recached(cache, tmp_path):
+    path = str(tmp_path / 'transactions.csv')
+    write_csv(path, [1.1, 2.2, 3.3, 4.4])
+    first = cache.cache_info(path) or cache.build_cache(path)
+
+    write_csv(path, [1.1, 2.2, 3.3, 4.4, 5.5, 6.6])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert_same_frame(cache.load_dataset(path), pd.read_csv(path))
+    assert cache.cache_info(path)['sha256'] != first['sha256']
+    assert cache.cache_info(path)['rows'] == 6
@@ -0,0 +1,178 @@
+# tests/test_explainers.py - Per-request explainers
+import os
+
+import numpy as np
+import pytest
+
+from serving.tree_paths import TreePathExplainer
+from test_batch_scoring import BANKING
+from test_tree_engine import feature_rows
+
+def shap_top(bundle, X, top_n=5):
+    import shap
+    values = np.asarray(shap.TreeExplainer(bundle.model).shap_values(X)).reshape(len(X), -1)
+    top = np.argsort(-np.abs(values[0]))[:top_n]
+    return [bundle.features[i] for i in top], values[0][top]
+
+def test_default_explanations_are_path_contributions(client, app_module):
+    # TreeSHAP costs 5-11 ms per request; the path index keeps it off the request path
+    assert app_module.EXPLAINER_METHOD == 'path'
+    bundle = app_module.registry.get('banking')
+    assert isinstance(bundle.explainer, TreePathExplainer)
+
+    body = client.post("/api/check-fraud", json=BANKING).get_json()
+    features = body['top_contributing_features']
+    contributions = bundle.tree_index.contributions(bundle.prepare_one(BANKING))[0]
+    top = np.argsort(-np.abs(contributions))[:5]
+
+    assert [f['feature'] for f in features] == [bundle.features[i] for i in top]
+    assert [f['shap_value'] for f in features] == pytest.approx(contributions[top], abs=1e-3)
+    assert all(f['method'] == 'saabas' for f in features)
+
+def spy_explain_many(monkeypatch, cls):
+    """Record the probas every explain_many call gets"""
+    calls = []
+    explain_many = cls.explain_many
+
+    def spy(self, X, probas=None, top_n=5):
+        calls.append(None if probas is None else [float(p) for p in probas])
+        return explain_many(self, X, probas, top_n)
+
+    monkeypatch.setattr(cls, 'explain_many', spy)
+    return calls
+
+def test_default_explanations_reuse_the_request_probability(client, app_module, monkeypatch):
+    calls = spy_explain_many(monkeypatch, TreePathExplainer)
+
+    body = client.post("/api/check-fraud", json=BANKING).get_json()
+
+    assert calls == [[pytest.approx(body['fraud_probability'], abs=1e-4)]]
+
+def test_importance_explanations_through_the_api(client, app_module, monkeypatch):
+    bundle = app_module.registry.get('banking')
+    explainer = app_module.SimpleExplainer(bundle.model, bundle.features)
+    served = bundle.with_version(bundle.version)
+    served.explainer = explainer
+    monkeypatch.setitem(app_module.registry._bundles, 'banking', served)
+    calls = spy_explain_many(monkeypatch, app_module.SimpleExplainer)
+    model_calls = []
+    predict_proba = type(bundle.model).predict_proba
+    monkeypatch.setattr(type(bundle.model), 'predict_proba',
+                        lambda self, X, *a, **kw: model_calls.append(len(X)) or predict_proba(self, X, *a, **kw))
+
+    body = client.post("/api/check-fraud", json=BANKING).get_json()
+
+    proba = body['fraud_probability']
+    assert calls == [[pytest.approx(proba, abs=1e-4)]]
+    assert len(model_calls) <= 1   # the prediction itself; the explanation reuses its probability
+    values = bundle.prepare_one(BANKING)[0].astype(np.float64)
+    contributions = values * explainer.importances
+    top = np.argsort(-np.abs(contributions), kind='stable')[:5]
+    features = body['top_contributing_features']
+    assert [f['feature'] for f in features] == [bundle.features[i] for i in top]
+    assert [f['shap_value'] for f in features] == pytest.approx(contributions[top], abs=1e-3)
+    for f, c in zip(features, contributions[top]):
+        assert f['impact'] == ('increases' if (c > 0) == (proba > 0.5) else 'decreases')
+        assert 'method' not in f
+
+def test_importance_batch_matches_single_rows(app_module):
+    bundle = app_module.registry.get('credit_card')
+    explainer = app_module.SimpleExplainer(bundle.model, bundle.features)
+    X = feature_rows(bundle, n=20)
+    probas = bundle.predict_proba(X)
+
+    batch = explainer.explain_many(X, probas, 5)
+
+    assert batch == [explainer.explain(X[i:i + 1], 5, proba=probas[i]) for i in range(len(X))]
+    assert explainer.explain_many(X, None, 5) == batch
+
+def test_shap_explanations_are_opt_in(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'EXPLAINER_METHOD', 'shap')
+    bundle = app_module.registry.get('banking')
+    explainer = app_module.make_explainer(bundle)
+    assert isinstance(explainer, app_module.ShapExplainer)
+
+    features = explainer.explain(bundle.prepare_one(BANKING), 5)
+    names, values = shap_top(bundle, bundle.prepare_one(BANKING))
+
+    assert [f['feature'] for f in features] == names
+    assert [f['shap_value'] for f in features] == pytest.approx(values, abs=1e-3)
+    assert all('method' not in f for f in features)
+
+def test_batch_explanations_match_single_rows(app_module):
+    bundle = app_module.registry.get('banking')
+    rows = [{**BANKING, 'Transaction_Amount': amount} for amount in (10, 5000, 90000)]
+    X = bundle.prepare_many(rows)
+
+    batch = bundle.explainer.explain_many(X, None, 5)
+
+    assert batch == [bundle.explainer.explain(bundle.prepare_one(row), 5) for row in rows]
+
+def test_path_explanations_are_flagged(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'EXPLAINER_METHOD', 'path')
+    bundle = app_module.registry.get('banking')
+
+    features = app_module.make_explainer(bundle).explain(bundle.prepare_one(BANKING), 5)
+
+    assert features and all(f['method'] == 'saabas' for f in features)
+
+# ============================================
+# OFFLINE BATCH PATHS
+# ============================================
+def test_bulk_scoring_explains_each_chunk_in_one_shap_call(tmp_path, monkeypatch):
+    import pandas as pd
+    from serving import bulk_scoring
+    from shap_explainer import DualShapExplainer
+    monkeypatch.setattr(bulk_scoring, '_registry', bulk_scoring.load_registry(explain=True, explainer='shap'))
+    bundle = bulk_scoring._registry.get('banking')
+    calls = []
+    explain_batch = DualShapExplainer.explain_batch
+
+    def counting(self, X, *args, **kwargs):
+        if self is bundle.explainer:
+            calls.append(len(X))
+        return explain_batch(self, X, *args, **kwargs)
+
+    monkeypatch.setattr(DualShapExplainer, 'explain_batch', counting)
+    rows = [{**BANKING, 'Transaction_Amount': 100 + 50 * i} for i in range(12)]
+    pd.DataFrame(rows).to_csv(tmp_path / 'in.csv', index=False)
+
+    report = bulk_scoring.run(str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'), workers=1,
+                              chunk_size=5, explain=True, explainer='shap')
+
+    assert report['rows'] == 12 and report['errors'] == 0
+    assert calls == [5, 5, 2]
+    names, values = shap_top(bundle, bundle.prepare_one(rows[0]))
+    first = pd.read_csv(tmp_path / 'out.csv').iloc[0]
+    assert first['top_features'].split(';') == names
+    assert [float(v) for v in first['top_contributions'].split(';')] == pytest.approx(values, abs=1e-3)
+
+def test_offline_explainer_defaults_to_path():
+    from serving.stream_scoring import STREAM_CONFIG, load_registry
+    if 'EXPLAINER_METHOD' in os.environ:
+        pytest.skip("EXPLAINER_METHOD set in the environment")
+    assert STREAM_CONFIG['explainer'] == 'path'
+    assert isinstance(load_registry(explain=True).get('credit_card').explainer, TreePathExplainer)
+
+def test_offline_explainer_choice_is_validated():
+    from serving.stream_scoring import load_registry
+    with pytest.raises(ValueError):
+        load_registry(explain=True, explainer='lime')
+
+# ============================================
+# SAABAS PATH INDEX
+# ============================================
+@pytest.mark.parametrize('model_type', ['banking', 'credit_card'])
+def test_path_contributions_match_xgboost_saabas(app_module, model_type):
+    import xgboost as xgb
+    bundle = app_module.registry.get(model_type)
+    booster = bundle.model.get_booster()
+    X = feature_rows(bundle, n=500)
+
+    contributions = bundle.tree_index.contributions(X)
+
+    dmatrix = xgb.DMatrix(X, feature_names=booster.feature_names)
+    reference = booster.predict(dmatrix, pred_contribs=True, approx_contribs=True)
+    np.testing.assert_allclose(contributions, reference[:, :-1], atol=1e-5)
+    margin = booster.predict(dmatrix, output_margin=True)
+    np.testing.assert_allclose(contributions.sum(axis=1) + bundle.tree_index.bias, margin, atol=1e-4)
@@ -0,0 +1,80 @@
+# tests/test_explanation_cache.py - LRU + TTL explanation cache over SQLite
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import serving.explanation_cache as explanation_cache
+from serving.explanation_cache import ExplanationCache
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for the cache module"""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(explanation_cache, 'time', SimpleNamespace(time=lambda: now.value))
+    return now
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch):
+    # Keep the legacy import away from any genai_cache.json in the repo
+    monkeypatch.setattr(explanation_cache, 'LEGACY_JSON_CACHE', str(tmp_path / 'genai_cache.json'))
+    return str(tmp_path / 'cache.sqlite3')
+
+def test_lru_evicts_the_least_recently_used(cache_path):
+    cache = ExplanationCache(path=cache_path, max_entries=2)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    assert cache.get('a') == 'A'        # 'b' is now least recently used
+    cache.set('c', 'C')
+
+    assert list(cache._memory) == ['a', 'c']
+    assert cache.metrics()['evictions'] == 1 and cache.metrics()['memory_entries'] == 2
+
+    # Evicted from memory only: the shared store still has it
+    assert cache.get('b') == 'B'
+    assert cache.stats['shared_hits'] == 1 and list(cache._memory) == ['c', 'b']
+
+def test_entries_expire_after_the_ttl(cache_path, clock):
+    cache = ExplanationCache(path=cache_path, ttl=60)
+    cache.set('a', 'A')
+
+    clock.value += 59
+    assert cache.get('a') == 'A'
+    clock.value += 2
+    assert cache.get('a') is None
+    assert 'a' not in cache._memory
+    assert ExplanationCache(path=cache_path, ttl=60).get('a') is None
+    assert cache.stats['misses'] == 1
+
+def test_a_second_instance_reads_the_first_ones_inserts(cache_path):
+    writer = ExplanationCache(path=cache_path)
+    reader = ExplanationCache(path=cache_path)
+    assert reader.get('k') is None
+
+    writer.set('k', 'shared explanation')
+    assert reader.get('k') == 'shared explanation'
+    assert reader.stats['shared_hits'] == 1
+    assert reader.get('k') == 'shared explanation'
+    assert reader.stats['memory_hits'] == 1
+
+def test_store_is_pruned_to_max_rows(cache_path, clock):
+    cache = ExplanationCache(path=cache_path, max_rows=3, prune_every=5)
+    for i in range(5):
+        clock.value += 1
+        cache.set(f'k{i}', str(i))
+
+    keys = [row[0] for row in cache._conn().execute("SELECT key FROM explanations ORDER BY created_at")]
+    assert keys == ['k2', 'k3', 'k4']
+
+def test_legacy_json_cache_is_imported_once(cache_path):
+    legacy = explanation_cache.LEGACY_JSON_CACHE
+    with open(legacy, 'w') as f:
+        json.dump({'old': 'old explanation', 'bad': 42}, f)
+
+    cache = ExplanationCache(path=cache_path)
+    assert cache.get('old') == 'old explanation'
+    assert cache.get('bad') is None
+
+    assert not os.path.exists(legacy) and os.path.exists(legacy + '.imported')
+    assert ExplanationCache(path=cache_path).get('old') == 'old explanation'
@@ -0,0 +1,93 @@
+# tests/test_explanation_jobs.py - Async explanations: token, poll and SSE
+import json
+
+import pytest
+
+from tests.test_batch_scoring import BANKING
+from serving.explanation_cache import ExplanationCache
+from serving.explanation_jobs import ExplanationJobs
+
+def boom(message):
+    def fail(*args):
+        raise RuntimeError(message)
+    return fail
+
+def test_fallback_is_used_when_the_explanation_fails():
+    completed = []
+    jobs = ExplanationJobs(workers=1, on_complete=completed.append)
+    job = jobs.submit(boom("llm down"), fallback=lambda: "fallback text")
+
+    assert job.wait(5)
+    assert job.status == 'done' and job.provider == 'fallback' and job.explanation == "fallback text"
+    assert completed == [job]
+    assert jobs.metrics()['failed'] == 1
+
+def test_failing_fallback_marks_the_job_as_an_error():
+    completed = []
+    jobs = ExplanationJobs(workers=1, on_complete=completed.append)
+    job = jobs.submit(boom("llm down"), fallback=boom("fallback down"))
+
+    assert job.wait(5)
+    assert job.status == 'error' and job.explanation is None
+    assert 'llm down' in job.error and 'fallback down' in job.error
+    assert completed == []
+    assert jobs.metrics()['pending'] == 0
+
+@pytest.fixture
+def genai(app_module, monkeypatch, tmp_path):
+    """Mock LLM with a short latency and an empty cache"""
+    if not app_module.GENAI_ENABLED:
+        pytest.skip("GenAI disabled")
+    import routes.genai as genai
+    monkeypatch.setattr(genai, 'CACHE', ExplanationCache(path=str(tmp_path / 'cache.sqlite3')))
+    monkeypatch.setattr(genai.client, 'latency', 0.3)
+    return genai
+
+def check_async(client, amount):
+    response = client.post("/api/check-fraud?explanation=async",
+                           json={**BANKING, 'Transaction_Amount': amount})
+    body = response.get_json()
+    assert response.status_code == 200 and body['explanation_status'] == 'pending'
+    assert body['ai_explanation'] is None
+    return body
+
+def sse_events(response):
+    text = response.get_data(as_text=True)
+    events = []
+    for block in text.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if 'event' in lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+def test_token_poll_and_stream(client, genai):
+    calls = genai.client.calls
+    body = check_async(client, 1234.5)
+    url = body['explanation_url']
+
+    pending = client.get(url)
+    assert pending.status_code == 202 and pending.get_json()['explanation_status'] == 'pending'
+
+    done = client.get(url, query_string={'wait': 5})
+    result = done.get_json()
+    assert done.status_code == 200 and result['explanation_status'] == 'done'
+    assert result['ai_explanation'].startswith('[mock:') and result['ai_provider'] == 'mock'
+    assert genai.client.calls == calls + 1
+
+    streamed = client.get(check_async(client, 4321.0)['explanation_stream_url'])
+    assert streamed.mimetype == 'text/event-stream'
+    [(event, payload)] = sse_events(streamed)
+    assert event == 'explanation' and payload['ai_explanation'].startswith('[mock:')
+
+def test_stream_reports_an_error_when_the_fallback_fails(client, app_module, genai, monkeypatch):
+    monkeypatch.setattr(app_module, 'explain_transaction', boom("llm down"))
+    monkeypatch.setattr(app_module, 'generate_fallback', boom("fallback down"))
+
+    [(event, payload)] = sse_events(client.get(check_async(client, 99.0)['explanation_stream_url']))
+    assert event == 'error'
+    assert payload['explanation_status'] == 'error' and 'fallback down' in payload['error']
+
+def test_unknown_token_is_404(client, genai):
+    assert client.get("/api/explanations/nope").status_code == 404
+    [(event, _)] = sse_events(client.get("/api/explanations/nope/stream"))
+    assert event == 'error'
@@ -0,0 +1,171 @@
+# tests/test_feedback.py - Feedback routes and labelling
+import threading
+
+import pytest
+
+from conftest import banking_prediction, insert_predictions
+
+def labelled(db, prediction_id):
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT actual_class FROM predictions WHERE id = %s", (prediction_id,))
+        prediction = cursor.fetchone()
+        cursor.execute("SELECT feedback_type, feedback_source FROM feedback WHERE prediction_id = %s",
+                       (prediction_id,))
+        return prediction, cursor.fetchall()
+
+@pytest.fixture
+def other_worker(database):
+    """A second write-behind writer that never flushes by itself (another gunicorn worker)"""
+    from database.write_behind import PredictionWriter
+    writer = PredictionWriter(database, batch_size=10000, flush_interval=3600)
+    yield writer
+    writer.stop()
+
+# ============================================
+# UNKNOWN / NOT YET PERSISTED PREDICTIONS
+# ============================================
+def test_feedback_for_unknown_prediction_is_404(database, db_client):
+    response = db_client.post("/api/predictions/999999/feedback", json={'actual_class': 1})
+    assert response.status_code == 404
+
+def test_feedback_waits_for_other_workers_buffer(database, db_client, other_worker):
+    prediction_id = other_worker.submit(banking_prediction(prediction=1))
+    threading.Timer(0.2, other_worker.flush).start()
+
+    response = db_client.post(f"/api/predictions/{prediction_id}/feedback", json={'actual_class': 0})
+
+    assert response.status_code == 200, response.get_json()
+    prediction, feedback = labelled(database, prediction_id)
+    assert prediction['actual_class'] == 0
+    assert [row['feedback_type'] for row in feedback] == ['false_positive']
+
+def test_feedback_for_unflushed_prediction_is_409_not_lost(database, db_client, other_worker, monkeypatch):
+    from database.write_behind import WRITE_BEHIND_CONFIG
+    monkeypatch.setitem(WRITE_BEHIND_CONFIG, 'settle_timeout', 0.2)
+    prediction_id = other_worker.submit(banking_prediction())
+
+    response = db_client.post(f"/api/predictions/{prediction_id}/feedback", json={'actual_class': 1})
+
+    assert response.status_code == 409
+    other_worker.flush()
+    prediction, feedback = labelled(database, prediction_id)
+    assert prediction['actual_class'] is None and feedback == []
+
+def test_bulk_feedback_retries_buffered_ids(database, db_client, other_worker):
+    stored = insert_predictions(database, [banking_prediction()])[0]
+    buffered = other_worker.submit(banking_prediction(prediction=1))
+    threading.Timer(0.2, other_worker.flush).start()
+
+    response = db_client.post("/api/feedback/bulk", json={'labels': [
+        {'prediction_id': stored, 'actual_class': 0},
+        {'prediction_id': buffered, 'actual_class': 1},
+        {'prediction_id': 999999, 'actual_class': 1}
+    ]})
+
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body['recorded'] == 2
+    assert body['not_found'] == [999999]
+    assert body['by_type'] == {'true_negative': 1, 'true_positive': 1}
+    assert labelled(database, buffered)[0]['actual_class'] == 1
+
+# ============================================
+# SINGLE-STATEMENT UPDATE
+# ============================================
+@pytest.mark.parametrize('prediction, actual_class, feedback_type', [
+    (1, 1, 'true_positive'),
+    (1, 0, 'false_positive'),
+    (0, 0, 'true_negative'),
+    (0, 1, 'false_negative')
+])
+def test_one_statement_labels_and_records_feedback(database, prediction, actual_class, feedback_type):
+    from database.db_dual import update_prediction_feedback
+    prediction_id = insert_predictions(database, [banking_prediction(prediction=prediction)])[0]
+
+    assert update_prediction_feedback(prediction_id, actual_class, 'chargeback', 4) is True
+
+    with database.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT p.actual_class, p.feedback_received_at IS NOT NULL AS stamped,
+                   f.actual_class AS feedback_class, f.feedback_type, f.feedback_note,
+                   f.confidence_level, f.feedback_source
+            FROM predictions p JOIN feedback f ON f.prediction_id = p.id
+            WHERE p.id = %s
+        """, (prediction_id,))
+        assert cursor.fetchall() == [{
+            'actual_class': actual_class, 'stamped': True, 'feedback_class': actual_class,
+            'feedback_type': feedback_type, 'feedback_note': 'chargeback',
+            'confidence_level': 4, 'feedback_source': 'api'
+        }]
+
+def test_relabel_keeps_both_feedback_rows(database):
+    from database.db_dual import update_prediction_feedback
+    prediction_id = insert_predictions(database, [banking_prediction(prediction=1)])[0]
+    update_prediction_feedback(prediction_id, 0)
+    update_prediction_feedback(prediction_id, 1)
+
+    prediction, feedback = labelled(database, prediction_id)
+    assert prediction['actual_class'] == 1
+    assert sorted(row['feedback_type'] for row in feedback) == ['false_positive', 'true_positive']
+
+@pytest.mark.parametrize('body', [{'actual_class': 2}, {'actual_class': '1'}, {}, [1], None])
+def test_invalid_single_feedback_is_400(database, db_client, body):
+    prediction_id = insert_predictions(database, [banking_prediction()])[0]
+    if body is None:
+        response = db_client.post(f"/api/predictions/{prediction_id}/feedback", data="actual_class=1")
+    else:
+        response = db_client.post(f"/api/predictions/{prediction_id}/feedback", json=body)
+    assert response.status_code == 400
+    assert labelled(database, prediction_id) == ({'actual_class': None}, [])
+
+# ============================================
+# BULK PATH
+# ============================================
+def test_bulk_dedupes_validates_and_pages(database):
+    from database.db_dual import bulk_update_prediction_feedback
+    ids = insert_predictions(database, [banking_prediction(prediction=i % 2) for i in range(5)])
+    labels = [{'prediction_id': i, 'actual_class': 1} for i in ids] + [
+        {'prediction_id': ids[0], 'actual_class': 0, 'feedback_note': 'corrected'},   # last label wins
+        {'prediction_id': 'abc', 'actual_class': 1},
+        {'prediction_id': ids[1], 'actual_class': 3},
+        {'prediction_id': ids[2], 'actual_class': 1, 'confidence_level': 9},
+        {'prediction_id': 424242, 'actual_class': 0},
+        'not-a-dict'
+    ]
+
+    result = bulk_update_prediction_feedback(labels, feedback_source='chargebacks', page_size=2)
+
+    assert result['received'] == 11
+    assert result['recorded'] == 5 and result['duplicates'] == 1
+    assert result['not_found'] == [424242]
+    assert [item['index'] for item in result['invalid']] == [6, 7, 8, 10]
+    assert result['by_type'] == {'true_negative': 1, 'true_positive': 2, 'false_negative': 2}
+    prediction, feedback = labelled(database, ids[0])
+    assert prediction['actual_class'] == 0
+    assert feedback == [{'feedback_type': 'true_negative', 'feedback_source': 'chargebacks'}]
+
+def test_bulk_csv_upload_reports_file_lines(database, db_client):
+    ids = insert_predictions(database, [banking_prediction(prediction=1)] * 2)
+    csv_body = (
+        "prediction_id,actual_class,feedback_note\n"
+        f"{ids[0]},1,confirmed\n"
+        f"{ids[1]},5,typo\n"
+        f"{ids[1]},0,\n"
+    )
+
+    response = db_client.post("/api/feedback/bulk?source=issuer", data=csv_body, content_type='text/csv')
+
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body['source'] == 'issuer' and body['recorded'] == 2
+    assert [item['line'] for item in body['invalid']] == [3]
+    assert body['by_type'] == {'true_positive': 1, 'false_positive': 1}
+
+@pytest.mark.parametrize('body', [{'labels': 'nope'}, {'items': []}, 5])
+def test_bulk_malformed_body_is_400(db_client, body):
+    assert db_client.post("/api/feedback/bulk", json=body).status_code == 400
+
+def test_bulk_too_many_labels_is_413(db_client, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'FEEDBACK_BULK_MAX_ROWS', 2)
+    labels = [{'prediction_id': i, 'actual_class': 0} for i in range(1, 4)]
+    assert db_client.post("/api/feedback/bulk", json={'labels': labels}).status_code == 413
@@ -0,0 +1,98 @@
+# tests/test_micro_batcher.py - Micro-batching dispatcher
+import threading
+import time
+
+import numpy as np
+
+from serving.micro_batcher import MicroBatcher
+
+class FakeBundle:
+    """predict_proba returns the first column; records every call"""
+
+    def __init__(self, model_type, block=None):
+        self.model_type = model_type
+        self.block = block
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append((threading.current_thread().name, X.copy()))
+        if self.block is not None and threading.current_thread().name == 'MicroBatcher':
+            self.block.wait(5)
+        return X[:, 0].astype(np.float64) / 100.0
+
+def rows(*values):
+    return np.array([[v, 0.0] for v in values], dtype=np.float64)
+
+def predict_concurrently(batcher, requests):
+    """requests: [(bundle, X)]; returns results in request order"""
+    results = [None] * len(requests)
+    start = threading.Barrier(len(requests))
+
+    def call(i, bundle, X):
+        start.wait(5)
+        results[i] = batcher.predict(bundle, X)
+
+    threads = [threading.Thread(target=call, args=(i, *req)) for i, req in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+def test_concurrent_requests_share_one_predict_call():
+    batcher = MicroBatcher(max_rows=4, max_wait_ms=2000)
+    bundle = FakeBundle('banking')
+    results = predict_concurrently(batcher, [(bundle, rows(v)) for v in (10, 20, 30, 40)])
+
+    assert [r.tolist() for r in results] == [[0.1], [0.2], [0.3], [0.4]]
+    [(thread, X)] = bundle.calls
+    assert thread == 'MicroBatcher' and sorted(X[:, 0]) == [10, 20, 30, 40]
+
+    metrics = batcher.metrics()
+    assert metrics['requests'] == 4 and metrics['batches'] == 1 and metrics['flush_full'] == 1
+    assert metrics['batch_size_histogram']['le_4'] == 1 and metrics['rows_waiting'] == 0
+
+def test_a_lone_request_is_flushed_after_max_wait():
+    batcher = MicroBatcher(max_rows=8, max_wait_ms=5)
+    bundle = FakeBundle('banking')
+    assert batcher.predict(bundle, rows(50, 60)).tolist() == [0.5, 0.6]
+    assert batcher.metrics()['flush_timeout'] == 1
+
+def test_rows_are_batched_per_model():
+    batcher = MicroBatcher(max_rows=3, max_wait_ms=2000)
+    banking, credit = FakeBundle('banking'), FakeBundle('credit_card')
+    results = predict_concurrently(batcher, [
+        (banking, rows(1)), (credit, rows(2)), (banking, rows(3)),
+        (credit, rows(4)), (banking, rows(5)), (credit, rows(6))
+    ])
+
+    assert [r.tolist() for r in results] == [[v / 100.0] for v in (1, 2, 3, 4, 5, 6)]
+    assert [sorted(X[:, 0]) for _, X in banking.calls] == [[1, 3, 5]]
+    assert [sorted(X[:, 0]) for _, X in credit.calls] == [[2, 4, 6]]
+    assert batcher.metrics()['batches'] == 2
+
+def test_stuck_dispatcher_falls_back_to_a_direct_call():
+    release = threading.Event()
+    batcher = MicroBatcher(max_rows=1, max_wait_ms=0, result_timeout=0.1)
+    stuck = FakeBundle('banking', block=release)
+    other = FakeBundle('banking')
+    try:
+        first = threading.Thread(target=batcher.predict, args=(stuck, rows(10)))
+        first.start()
+        deadline = time.monotonic() + 5
+        while not stuck.calls and time.monotonic() < deadline:
+            time.sleep(0.001)
+        # Dispatcher is busy with `stuck`: this one times out and scores itself
+        assert batcher.predict(other, rows(70)).tolist() == [0.7]
+        assert [thread for thread, _ in other.calls] == [threading.current_thread().name]
+        first.join(5)
+        assert [thread for thread, _ in stuck.calls] == ['MicroBatcher', first.name]
+    finally:
+        release.set()
+
+    metrics = batcher.metrics()
+    assert metrics['direct_fallbacks'] == 2 and metrics['rows_waiting'] == 0
+
+    # The abandoned request was dequeued, so the dispatcher never scores it
+    assert batcher.predict(other, rows(80)).tolist() == [0.8]
+    assert [thread for thread, _ in other.calls] == [threading.current_thread().name, 'MicroBatcher']
@@ -0,0 +1,92 @@
+# tests/test_pool.py - BlockingConnectionPool
+import threading
+import time
+
+import pytest
+
+from conftest import TEST_DATABASE_URL, requires_db
+
+pytestmark = requires_db
+
+@pytest.fixture
+def make_pool():
+    from database.pool import BlockingConnectionPool
+    pools = []
+
+    def make(**kwargs):
+        kwargs.setdefault('minconn', 0)
+        kwargs.setdefault('maxconn', 2)
+        pool = BlockingConnectionPool(dsn=TEST_DATABASE_URL, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.closeall()
+
+def test_getconn_waits_for_a_returned_connection(make_pool):
+    pool = make_pool(maxconn=1, timeout=5)
+    conn = pool.getconn()
+    threading.Timer(0.2, pool.putconn, args=(conn,)).start()
+
+    start = time.monotonic()
+    again = pool.getconn()
+
+    assert again is conn
+    assert time.monotonic() - start >= 0.15
+    assert pool.metrics()['wait_time_max_ms'] >= 150
+
+def test_getconn_times_out(make_pool):
+    from database.pool import PoolTimeout
+    pool = make_pool(maxconn=1)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn(timeout=0.1)
+    assert pool.metrics()['timeouts'] == 1
+
+def test_broken_idle_connection_is_replaced(make_pool):
+    pool = make_pool(health_check_after=0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.close()
+
+    fresh = pool.getconn()
+
+    assert fresh is not conn and not fresh.closed
+    assert pool.metrics()['health_check_failures'] == 1
+
+def test_expired_connection_is_recycled_on_return(make_pool):
+    pool = make_pool(max_lifetime=0.05)
+    conn = pool.getconn()
+    time.sleep(0.1)
+    pool.putconn(conn)
+
+    assert conn.closed
+    assert pool.metrics()['recycled'] == 1 and pool.metrics()['idle'] == 0
+
+def test_closeall_leaves_checked_out_connections_to_their_owner(make_pool):
+    from psycopg2.pool import PoolError
+    pool = make_pool()
+    idle, busy = pool.getconn(), pool.getconn()
+    pool.putconn(idle)
+
+    pool.closeall()
+
+    assert idle.closed
+    with busy.cursor() as cursor:            # still usable by the thread holding it
+        cursor.execute("SELECT 1")
+        assert cursor.fetchone() == (1,)
+    pool.putconn(busy)
+    assert busy.closed
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+def test_connection_goes_back_to_its_pool_after_reinitialize(database):
+    old_pool = database.connection_pool
+    with database.get_cursor() as cursor:
+        database.initialize_pool()
+        cursor.execute("SELECT 1 AS one")
+        assert cursor.fetchone()['one'] == 1
+
+    assert old_pool.metrics()['in_use'] == 0
+    assert database.connection_pool is not old_pool
@@ -0,0 +1,87 @@
+# tests/test_retrain_watermarks.py - Feedback counters and the auto-retrain watermark
+import pytest
+
+from conftest import banking_prediction, insert_predictions, requires_db
+
+pytestmark = requires_db
+
+@pytest.fixture
+def retraining(database, monkeypatch):
+    from routes import retraining_routes
+    monkeypatch.setattr(retraining_routes, 'RETRAINING_AVAILABLE', True)
+    monkeypatch.setattr(retraining_routes, 'RETRAIN_THRESHOLD', 5)
+    return retraining_routes
+
+def label(db, n):
+    """n new banking predictions, each labelled once"""
+    ids = insert_predictions(db, [banking_prediction()] * n)
+    with db.get_cursor() as cursor:
+        cursor.execute("UPDATE predictions SET actual_class = id %% 2 WHERE id = ANY(%s)", (ids,))
+    return ids
+
+def watermark():
+    from database.db_dual import get_retrain_watermarks
+    return get_retrain_watermarks()['banking']
+
+def run_auto_job(status):
+    from retraining.jobs import claim_next_job, finish_job
+    job = claim_next_job('test')
+    assert job is not None and job['trigger'] == 'auto'
+    finish_job(job['id'], status, error=None if status == 'succeeded' else 'boom')
+    return job
+
+def test_labels_are_counted_once_per_prediction(database):
+    ids = label(database, 3)
+    with database.get_cursor() as cursor:
+        cursor.execute("UPDATE predictions SET actual_class = 1 - actual_class WHERE id = %s", (ids[0],))
+
+    assert watermark() == {'feedback_count': 3, 'watermark': 0, 'new_feedback': 3, 'active_version': 'banking_v1.0'}
+
+def test_below_threshold_queues_nothing(database, retraining):
+    from retraining.jobs import active_jobs
+    label(database, 4)
+    retraining.auto_trigger_retraining()
+    assert active_jobs() == {}
+
+def test_watermark_moves_only_when_the_job_succeeds(database, retraining):
+    from retraining.jobs import active_jobs
+    label(database, 6)
+
+    retraining.auto_trigger_retraining()
+    retraining.auto_trigger_retraining()                   # still queued: no second job
+    assert [job['feedback_count'] for job in active_jobs().values()] == [6]
+    assert watermark()['watermark'] == 0
+
+    label(database, 2)                                     # arrives while the job runs
+    run_auto_job('succeeded')
+
+    assert watermark()['watermark'] == 6 and watermark()['new_feedback'] == 2
+    retraining.auto_trigger_retraining()
+    assert active_jobs() == {}
+
+def test_failed_job_keeps_the_watermark_and_is_retried(database, retraining):
+    from retraining.jobs import active_jobs
+    label(database, 6)
+    retraining.auto_trigger_retraining()
+
+    failed = run_auto_job('failed')
+
+    assert watermark()['watermark'] == 0 and watermark()['new_feedback'] == 6
+    retraining.auto_trigger_retraining()
+    retry = active_jobs()['banking']
+    assert retry['id'] != failed['id'] and retry['feedback_count'] == 6
+
+def test_active_version_registered_later_raises_the_watermark(database, retraining):
+    from retraining.jobs import active_jobs
+    label(database, 7)
+    with database.get_cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO model_versions (model_type, version, model_path, threshold)
+            VALUES ('banking', 'banking_v2', 'models/banking_v2.json', 0.5)
+        """)
+        cursor.execute("UPDATE model_versions SET is_active = (version = 'banking_v2') WHERE model_type = 'banking'")
+    label(database, 3)
+
+    assert watermark() == {'feedback_count': 10, 'watermark': 7, 'new_feedback': 3, 'active_version': 'banking_v2'}
+    retraining.auto_trigger_retraining()
+    assert active_jobs() == {}
@@ -0,0 +1,74 @@
+# tests/test_retrain_worker.py - Starting the retraining runner next to the web server
+import importlib.util
+import os
+
+import pytest
+
+from conftest import REPO_ROOT, requires_db
+
+@pytest.fixture
+def worker(monkeypatch):
+    from retraining import worker
+    monkeypatch.setitem(worker.WORKER_CONFIG, 'autostart', True)
+    monkeypatch.setattr(worker, '_runner', None)
+    return worker
+
+class FakeProcess:
+    pid = 4242
+
+    def __init__(self, *args, **kwargs):
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+def test_runner_not_started_without_a_database(worker, monkeypatch):
+    monkeypatch.setattr(worker.db, 'config', {'dsn': 'postgresql://nobody@/nowhere?host=/nonexistent'})
+    monkeypatch.setattr(worker.subprocess, 'Popen', pytest.fail)
+
+    assert worker.start_background_runner() is None
+
+def test_runner_started_once_per_process(worker, monkeypatch):
+    started = []
+    monkeypatch.setattr(worker, 'database_reachable', lambda timeout=5: True)
+    monkeypatch.setattr(worker.subprocess, 'Popen', lambda *a, **k: started.append(FakeProcess()) or started[-1])
+
+    first = worker.start_background_runner()
+    assert worker.start_background_runner() is first and len(started) == 1
+
+    first.returncode = 1                                   # died: the next call replaces it
+    assert worker.start_background_runner() is not first and len(started) == 2
+
+def load_gunicorn_conf():
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(REPO_ROOT, 'gunicorn.conf.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.mark.parametrize('db_enabled, expected', [(False, []), (True, ['started'])])
+def test_gunicorn_master_starts_runner_only_with_the_database(app_module, worker, monkeypatch,
+                                                             db_enabled, expected):
+    monkeypatch.setattr(app_module, 'DB_ENABLED', db_enabled)
+    calls = []
+    monkeypatch.setattr(worker, 'start_background_runner', lambda: calls.append('started'))
+
+    load_gunicorn_conf().when_ready(server=None)
+
+    assert calls == expected
+
+@requires_db
+def test_second_runner_backs_off(database, worker):
+    first = worker._listen_connection()
+    try:
+        assert first is not None
+        assert worker._listen_connection() is None
+    finally:
+        first.close()
+    second = worker._listen_connection()                   # lock released with the session
+    assert second is not None
+    second.close()
+
+def test_runner_lock_does_not_block_feedback_counter_install():
+    from database.db_dual import FEEDBACK_COUNTERS_LOCK_KEY
+    from retraining.jobs import JOB_CONFIG
+    assert len({JOB_CONFIG['lock_key'], JOB_CONFIG['runner_lock_key'], FEEDBACK_COUNTERS_LOCK_KEY}) == 3
@@ -0,0 +1,126 @@
+# tests/test_retraining.py - Retraining runs end to end
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import banking_prediction, insert_predictions
+
+def write_banking_dataset(path, rows=600, seed=7):
+    """Small synthetic_fraud.csv: fraud = large amount far from home"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Transaction_Amount': rng.gamma(2.0, 80.0, rows),
+        'Account_Balance': rng.uniform(100, 20000, rows),
+        'Daily_Transaction_Count': rng.integers(1, 15, rows),
+        'Failed_Transaction_Count_7d': rng.integers(0, 5, rows),
+        'Card_Age': rng.integers(10, 2000, rows),
+        'Transaction_Distance': rng.uniform(0, 3000, rows),
+        'IP_Address_Flag': rng.integers(0, 2, rows)
+    })
+    df['Fraud_Label'] = ((df['Transaction_Amount'] > 250) & (df['Transaction_Distance'] > 1500)).astype(int)
+    df.to_csv(path, index=False)
+
+@pytest.fixture
+def banking_workdir(database, tmp_path, monkeypatch):
+    """Retraining writes models/ and reads data/ relative to the working directory"""
+    from retraining.auto_retrain_dual import RETRAIN_CONFIG
+    from retraining.dataset_cache import DATASET_CACHE_CONFIG
+    (tmp_path / 'models').mkdir()
+    (tmp_path / 'data').mkdir()
+    write_banking_dataset(tmp_path / 'data' / 'synthetic_fraud.csv')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(RETRAIN_CONFIG, 'data_dir', str(tmp_path / 'data'))
+    monkeypatch.setitem(RETRAIN_CONFIG, 'n_jobs', 1)
+    monkeypatch.setitem(DATASET_CACHE_CONFIG, 'enabled', False)
+    return tmp_path
+
+def test_banking_full_retrain_registers_but_never_activates_an_unservable_model(database, banking_workdir):
+    from database.db_dual import bulk_update_prediction_feedback
+    from retraining.auto_retrain_dual import retrain_banking_with_dataset
+
+    payloads = [banking_prediction(amount=40.0 + i * 15, prediction=int(i % 3 == 0),
+                                   Transaction_Distance=100.0 + i * 90) for i in range(30)]
+    ids = insert_predictions(database, payloads)
+    labels = [{'prediction_id': pid, 'actual_class': int(p['Transaction_Amount'] > 250
+                                                          and p['Transaction_Distance'] > 1500)}
+              for pid, p in zip(ids, payloads)]
+    assert bulk_update_prediction_feedback(labels)['recorded'] == 30
+
+    result = retrain_banking_with_dataset()
+
+    assert result['status'] == 'success', result
+    assert result['feedback_samples'] == 30
+    assert (banking_workdir / result['model_path']).exists()
+    # A RandomForest on raw columns: the registry can't build its features
+    assert result['servable'] is False and result['deployed'] is False
+
+    with database.get_cursor() as cursor:
+        cursor.execute("SELECT * FROM model_versions WHERE model_type = 'banking' ORDER BY id")
+        versions = {row['version']: row for row in cursor.fetchall()}
+    assert versions['banking_v1.0']['is_active'] is True
+    new = versions[result['version']]
+    assert new['is_active'] is False
+    assert new['performance_metrics']['training_mode'] == 'full'
+    assert new['performance_metrics']['servable'] is False
+    assert new['performance_metrics']['wall_time_s'] >= 0
+    assert not (banking_workdir / 'models' / 'active_models.json').exists()
+
+def credit_card_rows(rows, seed):
+    """Raw creditcard.csv-style rows: fraud = strongly negative V14"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Time': rng.integers(0, 170000, rows), 'Amount': rng.gamma(2.0, 40.0, rows),
+                       **{f'V{i}': rng.normal(0, 1, rows) for i in range(1, 29)}})
+    df['Class'] = (df['V14'] < -1.3).astype(int)
+    return df
+
+@pytest.fixture
+def credit_card_workdir(banking_workdir, database):
+    """Active credit card version = the shipped booster, plus a small creditcard.csv"""
+    from serving.model_registry import DEFAULT_ARTIFACTS
+    from conftest import REPO_ROOT
+    credit_card_rows(400, seed=3).to_csv(banking_workdir / 'data' / 'creditcard.csv', index=False)
+    booster = os.path.join(REPO_ROOT, DEFAULT_ARTIFACTS['credit_card']['model_path'])
+    with database.get_cursor() as cursor:
+        cursor.execute("UPDATE model_versions SET model_path = %s, created_at = created_at - INTERVAL '1 day' "
+                       "WHERE version = 'credit_card_v1.0'", (booster,))
+    return banking_workdir
+
+def label_credit_card_feedback(database, df):
+    from database.db_dual import bulk_update_prediction_feedback
+    payloads = [{'mode': 'credit_card', **row, 'prediction': 0} for row in df.drop(columns=['Class']).to_dict('records')]
+    ids = insert_predictions(database, payloads)
+    labels = [{'prediction_id': pid, 'actual_class': int(c)} for pid, c in zip(ids, df['Class'])]
+    assert bulk_update_prediction_feedback(labels)['recorded'] == len(df)
+
+def test_incremental_update_tests_on_held_out_feedback_only(database, credit_card_workdir, monkeypatch):
+    from retraining.auto_retrain_dual import RETRAIN_CONFIG, retrain_credit_card_incremental
+    from retraining.incremental import INCREMENTAL_CONFIG
+    monkeypatch.setitem(INCREMENTAL_CONFIG, 'rounds', 5)
+    monkeypatch.setitem(INCREMENTAL_CONFIG, 'n_jobs', 1)
+    monkeypatch.setitem(RETRAIN_CONFIG, 'improvement_threshold', 2.0)   # unreachable
+    label_credit_card_feedback(database, credit_card_rows(40, seed=4))
+
+    result = retrain_credit_card_incremental()
+
+    assert result['status'] == 'success', result
+    assert result['feedback_samples'] == 40 and result['replay_samples'] == 400
+    with database.get_cursor() as cursor:
+        cursor.execute("SELECT performance_metrics FROM model_versions WHERE version = %s", (result['version'],))
+        metrics = cursor.fetchone()['performance_metrics']
+    # 20% of the feedback is held out; every replay row (seen by the active booster) trains
+    assert metrics['test_samples'] == 8
+    assert metrics['trained_samples'] == 32 + 400
+    # Not activated unless F1 improves by the full retrain's threshold
+    assert result['deployed'] is False
+    with database.get_cursor() as cursor:
+        cursor.execute("SELECT version FROM model_versions WHERE model_type = 'credit_card' AND is_active")
+        assert [row['version'] for row in cursor.fetchall()] == ['credit_card_v1.0']
+
+def test_full_retrain_is_the_default_mode():
+    from retraining.incremental import INCREMENTAL_CONFIG
+    if 'RETRAIN_MODE' in os.environ:
+        pytest.skip("RETRAIN_MODE set in the environment")
+    assert INCREMENTAL_CONFIG['mode'] == 'full'
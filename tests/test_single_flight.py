@@ -0,0 +1,95 @@
+# tests/test_single_flight.py - Coalescing concurrent identical calls
+import threading
+import time
+
+import pytest
+
+from serving.single_flight import SingleFlight
+
+FOLLOWERS = 7
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+def run_concurrently(flight, key, fn):
+    """One leader blocked inside fn plus FOLLOWERS callers of the same key; returns (results, errors)"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    wait_for(lambda: flight.in_flight() == 1)
+    threads += [threading.Thread(target=call) for _ in range(FOLLOWERS)]
+    for thread in threads[1:]:
+        thread.start()
+    wait_for(lambda: flight.stats['coalesced'] == FOLLOWERS)
+    return threads, results, errors
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return 'explanation'
+
+    threads, results, errors = run_concurrently(flight, 'k', fn)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1 and errors == []
+    assert sorted(results) == [('explanation', False)] + [('explanation', True)] * FOLLOWERS
+    assert flight.metrics() == {'calls': 1, 'coalesced': FOLLOWERS, 'in_flight': 0}
+
+def test_leader_error_reaches_every_follower_and_clears_the_key():
+    flight = SingleFlight()
+    release = threading.Event()
+    error = RuntimeError("llm down")
+
+    def fail():
+        release.wait(5)
+        raise error
+
+    threads, results, errors = run_concurrently(flight, 'k', fail)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [] and len(errors) == FOLLOWERS + 1
+    assert all(e is error for e in errors)
+    assert flight.in_flight() == 0
+
+    # The failure isn't cached: the next caller runs its own call
+    assert flight.do('k', lambda: 'retried') == ('retried', False)
+    assert flight.stats['calls'] == 2
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=('slow', lambda: release.wait(5)))
+    leader.start()
+    wait_for(lambda: flight.in_flight() == 1)
+
+    assert flight.do('fast', lambda: 42) == (42, False)
+    release.set()
+    leader.join(5)
+    assert flight.stats['coalesced'] == 0
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('k', lambda: int('x'))
+    assert flight.do('k', lambda: 1) == (1, False)
+    assert flight.do('k', lambda: 2) == (2, False)
+    assert flight.metrics() == {'calls': 3, 'coalesced': 0, 'in_flight': 0}
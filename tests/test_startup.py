@@ -0,0 +1,22 @@
+# tests/test_startup.py - Startup import report
+import os
+import subprocess
+import sys
+
+from conftest import REPO_ROOT
+
+CHECK = "import builtins, app; print(builtins.__import__ is app.startup_report._timed_import, len(app.startup_report.imports))"
+
+def import_app(**env):
+    environ = {k: v for k, v in os.environ.items() if k != 'STARTUP_IMPORT_REPORT'}
+    environ.update(DATABASE_URL='', WARMUP_ENABLED='false', RETRAIN_WORKER_AUTOSTART='false', **env)
+    out = subprocess.run([sys.executable, '-c', CHECK], cwd=REPO_ROOT, env=environ,
+                         capture_output=True, text=True, check=True).stdout
+    return out.strip().splitlines()[-1].split()
+
+def test_import_tracking_is_off_by_default():
+    assert import_app() == ['False', '0']
+
+def test_import_tracking_for_diagnostics():
+    _, modules = import_app(STARTUP_IMPORT_REPORT='true')
+    assert int(modules) > 0
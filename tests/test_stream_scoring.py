@@ -0,0 +1,119 @@
+# tests/test_stream_scoring.py - /api/check-fraud/stream
+import json
+
+import pytest
+
+from tests.test_batch_scoring import BANKING
+
+def post_stream(client, body, content_type='application/x-ndjson', **params):
+    response = client.post("/api/check-fraud/stream", data=body, content_type=content_type,
+                           query_string=params)
+    return response.status_code, response.get_data(as_text=True)
+
+def ndjson(*items):
+    return "".join((item if isinstance(item, str) else json.dumps(item)) + "\n" for item in items)
+
+def results_and_summary(text):
+    lines = [json.loads(line) for line in text.splitlines()]
+    assert 'summary' in lines[-1], lines[-1]
+    return {r['line']: r for r in lines[:-1]}, lines[-1]['summary']
+
+def test_malformed_lines_are_reported_and_the_rest_scored(client):
+    status, text = post_stream(client, ndjson(
+        BANKING,
+        '{bad json',
+        '[1, 2]',
+        '',
+        {**BANKING, 'Transaction_Amount': 'abc'},
+        {**BANKING, 'Card_Age': None},
+        {'mode': 'credit_card', 'Amount': 1},
+        BANKING
+    ), chunk_size=3)
+
+    assert status == 200
+    results, summary = results_and_summary(text)
+    assert sorted(results) == [1, 2, 3, 5, 6, 7, 8]   # the blank line 4 is skipped
+    assert results[2]['error'].startswith('Invalid JSON')
+    assert results[3]['error'] == 'Expected a JSON object'
+    assert 'Transaction_Amount' in results[5]['error']
+    assert 'Card_Age' in results[6]['error']
+    assert 'error' in results[7]
+    for line in (1, 8):
+        assert 'error' not in results[line] and results[line]['mode'] == 'banking'
+    assert summary['rows'] == 7 and summary['scored'] == 2 and summary['errors'] == 5
+
+@pytest.mark.parametrize('mode', [5, ['x'], None, 'crypto'])
+def test_odd_mode_values_do_not_abort_the_stream(client, mode):
+    status, text = post_stream(client, ndjson({**BANKING, 'mode': mode}, BANKING))
+    results, summary = results_and_summary(text)
+    assert status == 200 and summary['rows'] == 2
+    assert all(r['mode'] == 'banking' for r in results.values())
+
+def test_overlong_line_keeps_later_line_numbers(client, app_module, monkeypatch):
+    monkeypatch.setitem(app_module.STREAM_CONFIG, 'max_line_bytes', 1024)
+    status, text = post_stream(client, ndjson(BANKING, '"' + 'x' * 5000 + '"', {**BANKING, 'Card_Age': 'old'}, BANKING))
+
+    results, summary = results_and_summary(text)
+    assert status == 200 and sorted(results) == [1, 2, 3, 4]
+    assert 'exceeds 1024 bytes' in results[2]['error']
+    assert 'Card_Age' in results[3]['error']
+    assert 'error' not in results[4]
+    assert summary['rows'] == 4 and summary['errors'] == 2
+
+def test_invalid_utf8_is_a_line_error(client):
+    status, text = post_stream(client, b'\xff\xfe{"a": \xff}\n' + ndjson(BANKING).encode())
+    results, summary = results_and_summary(text)
+    assert status == 200 and 'error' in results[1] and 'error' not in results[2]
+
+def test_csv_rows_with_wrong_field_count(client, app_module, monkeypatch):
+    header = list(BANKING)
+    row = ','.join(str(BANKING[name]) for name in header)
+    monkeypatch.setitem(app_module.STREAM_CONFIG, 'max_line_bytes', 512)
+    body = "\n".join([','.join(header), row, '1,2,3', row + ',extra', ','.join(['9' * 60] * 10), row]) + "\n"
+
+    status, text = post_stream(client, body, content_type='text/csv')
+    results, summary = results_and_summary(text)
+    assert status == 200 and sorted(results) == [2, 3, 4, 5, 6]
+    assert results[3]['error'] == f"Expected {len(header)} fields, got 3"
+    assert results[4]['error'] == f"Expected {len(header)} fields, got {len(header) + 1}"
+    assert 'exceeds 512 bytes' in results[5]['error']
+    assert 'error' not in results[2] and 'error' not in results[6]
+
+def test_csv_output_carries_line_errors(client):
+    status, text = post_stream(client, ndjson(BANKING, '{bad json'), output='csv')
+    lines = text.splitlines()
+    assert status == 200 and lines[0].startswith('line,id,mode') and len(lines) == 3
+    assert lines[2].startswith('2,') and 'Invalid JSON' in lines[2]
+
+def test_empty_body_is_an_empty_summary(client):
+    status, text = post_stream(client, '')
+    results, summary = results_and_summary(text)
+    assert status == 200 and results == {} and summary['rows'] == 0
+
+@pytest.mark.parametrize('params', [
+    {'format': 'xml'},
+    {'output': 'parquet'},
+    {'chunk_size': 'ten'}
+])
+def test_bad_query_is_400(client, params):
+    status, text = post_stream(client, ndjson(BANKING), **params)
+    assert status == 400 and json.loads(text)['status'] == 'error'
+
+def test_tsv_rows_are_split_on_tabs(client):
+    header = list(BANKING)
+    row = '\t'.join(str(BANKING[name]) for name in header)
+    body = "\n".join(['\t'.join(header), row, '1\t2\t3', row]) + "\n"
+
+    status, text = post_stream(client, body, content_type='text/tab-separated-values', format='tsv')
+    results, summary = results_and_summary(text)
+    assert status == 200 and sorted(results) == [2, 3, 4]
+    assert results[3]['error'] == f"Expected {len(header)} fields, got 3"
+    for line in (2, 4):
+        assert 'error' not in results[line] and results[line]['mode'] == 'banking'
+    assert summary['scored'] == 2 and summary['errors'] == 1
+
+def test_tsv_files_are_read_as_tsv():
+    from serving.stream_scoring import format_for_path, PARSERS
+    assert format_for_path('batch.tsv') == 'tsv' and format_for_path('batch.CSV') == 'csv'
+    rows = list(PARSERS['tsv'](iter(['a\tb\n', '1,5\t2\n'])))
+    assert rows == [(2, {'a': '1,5', 'b': 2}, None)]
@@ -0,0 +1,62 @@
+# tests/test_tree_engine.py - NumPy tree engine vs XGBoost
+import os
+
+import numpy as np
+import pytest
+
+from conftest import REPO_ROOT
+
+MODEL_TYPES = ('banking', 'credit_card')
+
+@pytest.fixture(scope='module', params=MODEL_TYPES)
+def bundle(request):
+    from serving.model_registry import load_bundle, DEFAULT_ARTIFACTS
+    artifacts = {key: os.path.join(REPO_ROOT, path) if isinstance(path, str) else path
+                 for key, path in DEFAULT_ARTIFACTS[request.param].items()}
+    return load_bundle(request.param, **artifacts)
+
+def feature_rows(bundle, n=2000, seed=3):
+    """Synthetic rows over the model's features: wide ranges, exact split thresholds, NaNs"""
+    rng = np.random.default_rng(seed)
+    engine = bundle.tree_index
+    X = rng.normal(0, 3, size=(n, engine.n_features)).astype(np.float32)
+    X[:, rng.integers(0, engine.n_features, 3)] = rng.integers(0, 3, size=(n, 3))
+    splits = engine.feature[engine.left != np.arange(len(engine.left))]
+    thresholds = engine.threshold[engine.left != np.arange(len(engine.left))]
+    rows = rng.integers(0, n, len(splits))
+    X[rows, splits] = thresholds                            # ties go right, as in XGBoost
+    X[rng.random(X.shape) < 0.05] = np.nan                  # missing -> default direction
+    return X
+
+def dmatrix(bundle, X):
+    import xgboost as xgb
+    return xgb.DMatrix(X, feature_names=bundle.model.get_booster().feature_names)
+
+def test_probabilities_are_bit_identical(bundle):
+    X = feature_rows(bundle)
+    engine = bundle.tree_index
+
+    assert np.array_equal(engine.predict_proba(X), bundle.model.predict_proba(X)[:, 1])
+    for i in range(0, len(X), 97):                          # single rows: the request path
+        assert engine.predict_proba(X[i:i + 1])[0] == bundle.model.predict_proba(X[i:i + 1])[0, 1]
+
+def test_margin_matches_booster(bundle):
+    X = feature_rows(bundle, seed=4)
+    margin = bundle.model.get_booster().predict(dmatrix(bundle, X), output_margin=True)
+    assert np.array_equal(bundle.tree_index.margin(X), margin)
+
+def test_index_from_model_file_matches_booster(bundle):
+    from serving.tree_paths import TreeEnsemble
+    from_file = TreeEnsemble.from_file(bundle.model_path, bundle.features)
+    from_booster = TreeEnsemble.from_booster(bundle.model, bundle.features)
+    X = feature_rows(bundle, n=200, seed=5)
+    assert np.array_equal(from_file.leaves(X), from_booster.leaves(X))
+    assert np.array_equal(from_file.predict_proba(X), from_booster.predict_proba(X))
+
+def test_small_batches_use_the_engine_with_identical_results(bundle, monkeypatch):
+    from serving import model_registry
+    X = feature_rows(bundle, n=model_registry.TREE_INFERENCE_MAX_ROWS, seed=6)
+    assert bundle.tree_engine is not None
+    fast = bundle.predict_proba(X)
+    monkeypatch.setattr(bundle, 'tree_engine', None)
+    assert np.array_equal(fast, bundle.predict_proba(X))
@@ -0,0 +1,90 @@
+# tests/test_warmup.py - Worker warmup and /ready
+import threading
+
+import pytest
+
+from serving.warmup import Warmup
+
+def blocked_step(release):
+    def step():
+        assert release.wait(5), "step never released"
+    return step
+
+def fail(message):
+    def step():
+        raise RuntimeError(message)
+    return step
+
+@pytest.fixture
+def warmup(app_module, monkeypatch):
+    """A fresh enabled Warmup installed as the app's"""
+    warmup = Warmup(enabled=True)
+    monkeypatch.setattr(app_module, 'warmup', warmup)
+    return warmup
+
+def get_ready(client):
+    response = client.get("/ready")
+    return response.status_code, response.get_json()
+
+def test_not_ready_until_required_steps_finish(client, warmup):
+    release = threading.Event()
+    warmup.add_step("banking_model", blocked_step(release))
+    warmup.add_step("database", fail("connection refused"), required=False)
+    warmup.start()
+    try:
+        status, body = get_ready(client)
+        assert status == 503 and body['status'] == 'running'
+        assert body['warmup']['steps'] == {}
+    finally:
+        release.set()
+
+    assert warmup.wait(5)
+    status, body = get_ready(client)
+    steps = body['warmup']['steps']
+    assert status == 200 and body['status'] == 'ready'
+    assert steps['banking_model']['status'] == 'ok' and steps['banking_model']['required']
+    # The service runs without a database: a failed optional step doesn't block readiness
+    assert steps['database']['status'] == 'failed' and not steps['database']['required']
+    assert 'connection refused' in steps['database']['error']
+
+def test_failed_required_step_keeps_the_worker_unready(client, warmup):
+    warmup.add_step("banking_model", fail("model file missing"))
+    warmup.add_step("credit_card_model", lambda: None)
+    warmup.start()
+
+    assert not warmup.wait(5)
+    status, body = get_ready(client)
+    steps = body['warmup']['steps']
+    assert status == 503 and body['status'] == 'failed'
+    assert steps['banking_model']['status'] == 'failed' and steps['credit_card_model']['status'] == 'ok'
+
+def test_steps_returning_false_are_skipped():
+    warmup = Warmup(enabled=True)
+    warmup.add_step("database", lambda: False, required=False)
+    warmup.start()
+    assert warmup.wait(5)
+    assert warmup.describe()['steps']['database']['status'] == 'skipped'
+
+def test_disabled_warmup_is_ready_at_once(client, app_module, monkeypatch):
+    warmup = Warmup(enabled=False)
+    warmup.add_step("banking_model", fail("never run"))
+    monkeypatch.setattr(app_module, 'warmup', warmup)
+
+    status, body = get_ready(client)
+    assert status == 200 and body['status'] == 'ready' and body['warmup']['steps'] == {}
+
+def test_warmup_runs_once_per_process():
+    runs = []
+    warmup = Warmup(enabled=True)
+    warmup.add_step("banking_model", lambda: runs.append(1))
+    first = warmup.start()
+    assert warmup.wait(5)
+    assert warmup.start() is first and runs == [1]
+
+def test_app_warmup_scores_both_models(client, app_module):
+    assert app_module.warmup.wait(60)
+    status, body = get_ready(client)
+    steps = body['warmup']['steps']
+    assert status == 200
+    assert steps['banking_model']['status'] == 'ok' and steps['credit_card_model']['status'] == 'ok'
+    assert steps['database']['required'] is False
@@ -0,0 +1,180 @@
+# tests/test_write_behind.py - Write-behind prediction persistence
+import time
+
+import pytest
+
+from conftest import banking_prediction, requires_db
+
+pytestmark = requires_db
+
+@pytest.fixture
+def make_writer(database):
+    from database.write_behind import PredictionWriter
+    writers = []
+
+    def make(**kwargs):
+        kwargs.setdefault('batch_size', 10000)
+        kwargs.setdefault('flush_interval', 3600)
+        writer = PredictionWriter(database, **kwargs)
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        writer.stop()
+
+def stored_ids(db):
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT id FROM predictions ORDER BY id")
+        return [row['id'] for row in cursor.fetchall()]
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+def test_full_batch_is_flushed_in_one_insert(database, make_writer):
+    writer = make_writer(batch_size=3)
+    ids = [writer.submit(banking_prediction(amount=a)) for a in (10, 20, 30)]
+
+    assert wait_for(lambda: stored_ids(database) == ids)
+    assert writer.stats['flushes'] == 1 and writer.stats['flushed'] == 3
+    with database.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT p.amount, mv.version FROM predictions p
+            JOIN model_versions mv ON mv.id = p.model_version_id ORDER BY p.id
+        """)
+        assert [(float(r['amount']), r['version']) for r in cursor.fetchall()] == \
+            [(10.0, 'banking_v1.0'), (20.0, 'banking_v1.0'), (30.0, 'banking_v1.0')]
+
+def test_partial_batch_is_flushed_after_the_interval(database, make_writer):
+    writer = make_writer(flush_interval=0.1)
+    prediction_id = writer.submit(banking_prediction())
+
+    assert wait_for(lambda: stored_ids(database) == [prediction_id])
+    assert not writer.is_pending(prediction_id)
+
+def test_ids_come_from_reserved_sequence_blocks(database, make_writer):
+    first, second = make_writer(id_block_size=5), make_writer(id_block_size=5)
+    a = [first.submit(banking_prediction()) for _ in range(3)]
+    b = [second.submit(banking_prediction()) for _ in range(3)]
+
+    assert len(set(a + b)) == 6
+    first.flush()
+    second.flush()
+    assert stored_ids(database) == sorted(a + b)
+
+def test_full_buffer_falls_back_to_a_synchronous_insert(database, make_writer):
+    writer = make_writer(max_pending=2, put_timeout=0.05)
+    buffered = [writer.submit(banking_prediction()) for _ in range(2)]
+
+    overflow = writer.submit(banking_prediction())
+
+    assert stored_ids(database) == [overflow]             # written before submit() returned
+    assert writer.stats['sync_fallbacks'] == 1
+    assert all(writer.is_pending(i) for i in buffered)
+    writer.flush()
+    assert stored_ids(database) == sorted(buffered + [overflow])
+
+def test_bad_row_is_dropped_without_losing_its_batch(database, make_writer):
+    writer = make_writer()
+    good = [writer.submit(banking_prediction()) for _ in range(2)]
+    bad = writer.submit(banking_prediction(prediction='not-a-number'))
+    good.append(writer.submit(banking_prediction()))
+
+    assert writer.flush() == 3
+
+    assert stored_ids(database) == good
+    assert writer.stats['failed'] == 1 and not writer.is_pending(bad)
+
+def test_ensure_persisted_flushes_this_workers_buffer(database, make_writer):
+    writer = make_writer()
+    prediction_id = writer.submit(banking_prediction())
+
+    writer.ensure_persisted(prediction_id)
+
+    assert stored_ids(database) == [prediction_id]
+
+def test_stop_flushes_what_is_still_buffered(database, make_writer):
+    writer = make_writer()
+    ids = [writer.submit(banking_prediction()) for _ in range(4)]
+
+    writer.stop()
+
+    assert stored_ids(database) == ids
+    assert writer.metrics()['pending'] == 0 and writer.metrics()['inflight'] == 0
+
+# ============================================
+# DATABASE OUTAGES
+# ============================================
+class FlakyDatabase:
+    """Delegates to the test database; get_cursor() fails like a dropped connection while down"""
+
+    def __init__(self, database, fail_on=()):
+        self.database = database
+        self.down = False
+        self.fail_on = set(fail_on)   # get_cursor() call numbers that fail
+        self.calls = 0
+
+    def get_cursor(self):
+        self.calls += 1
+        if self.down or self.calls in self.fail_on:
+            import psycopg2
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        return self.database.get_cursor()
+
+def test_rows_stay_queued_through_an_outage(database):
+    from database.write_behind import PredictionWriter
+    flaky = FlakyDatabase(database)
+    writer = PredictionWriter(flaky, batch_size=10000, flush_interval=0.05, max_backoff=0.2)
+    try:
+        ids = [writer.submit(banking_prediction(amount=a)) for a in (10, 20, 30)]
+        flaky.down = True
+
+        assert writer.flush() == 0
+        assert all(writer.is_pending(i) for i in ids)
+        assert writer.stats['requeued'] >= 3 and writer.stats['failed'] == 0
+        time.sleep(0.3)                       # a few failed retries with backoff
+        assert stored_ids(database) == []
+
+        flaky.down = False
+        assert wait_for(lambda: stored_ids(database) == ids)
+        assert writer.stats['failed'] == 0 and writer.stats['flushed'] == 3
+    finally:
+        writer.stop()
+
+def test_connection_loss_during_the_per_row_fallback_requeues_the_rest(database):
+    from database.write_behind import PredictionWriter
+    writer = PredictionWriter(database, batch_size=10000, flush_interval=3600)
+    ids = [writer.submit(banking_prediction()) for _ in range(2)]      # id block: get_cursor call 1
+    bad = writer.submit(banking_prediction(prediction='not-a-number'))
+    rest = [writer.submit(banking_prediction()) for _ in range(2)]
+    # Calls: 2 = bulk insert (data error), 3-4 = first two rows, 5 = bad row, 6 = connection lost
+    writer.db = FlakyDatabase(database, fail_on={6})
+    writer.db.calls = 1
+
+    assert writer.flush() == 2
+
+    assert stored_ids(database) == ids
+    assert writer.stats['failed'] == 1 and not writer.is_pending(bad)
+    assert all(writer.is_pending(i) for i in rest) and writer.stats['requeued'] == 2
+    writer._retry_at = 0
+    assert writer.flush() == 2
+    assert stored_ids(database) == ids + rest
+    writer.stop()
+
+def test_synchronous_fallback_without_a_database_returns_no_id(database):
+    from database.write_behind import PredictionWriter
+    flaky = FlakyDatabase(database)
+    writer = PredictionWriter(flaky, max_pending=1, put_timeout=0.05, batch_size=10000, flush_interval=3600)
+    try:
+        writer.submit(banking_prediction())
+        flaky.down = True
+        writer._ids.append(10 ** 9)           # id already reserved: only the insert fails
+
+        assert writer.submit(banking_prediction()) is None
+        assert writer.stats['failed'] == 1 and writer.stats['sync_fallbacks'] == 1
+    finally:
+        flaky.down = False
+        writer.stop()
@@ -22,6 +22,7 @@ from imblearn.under_sampling import RandomUnderSampler
 import joblib
 import json
 from datetime import datetime
+from retraining.dataset_cache import load_dataset
 
 print("="*80)
 print("🎯 PERFECT HIGH-RECALL MODEL")
@@ -32,7 +33,7 @@ print("="*80)
 # LOAD DATASET
 # ============================================
 print(" Loading dataset...")
-df = pd.read_csv(r"data\synthetic_fraud.csv")
+df = load_dataset(r"data\synthetic_fraud.csv")
 
 print(f"   Total: {len(df):,} transactions")
 print(f"   Fraud: {df['Fraud_Label'].sum():,} ({df['Fraud_Label'].mean()*100:.1f}%)")
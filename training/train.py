@@ -15,6 +15,7 @@ from imblearn.over_sampling import SMOTE
 from imblearn.under_sampling import RandomUnderSampler
 from imblearn.pipeline import Pipeline as ImbPipeline
 from features.features_eng import engineer_features
+from retraining.dataset_cache import load_dataset
 
 print("="*70)
 print("PROPER FRAUD DETECTION MODEL TRAINING")
@@ -22,7 +23,7 @@ print("="*70)
 
 # Load data
 print("\n Loading data...")
-df = pd.read_csv("data/creditcard.csv")
+df = load_dataset("data/creditcard.csv")
 print(f"Dataset shape: {df.shape}")
 print(f"Fraud cases: {df['Class'].sum()} ({df['Class'].mean()*100:.4f}%)")
 
@@ -22,6 +22,11 @@ from imblearn.under_sampling import RandomUnderSampler
 import joblib
 import json
 from datetime import datetime
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from retraining.dataset_cache import load_dataset
 
 print("="*80)
 print("🎯 PERFECT HIGH-RECALL MODEL")
@@ -32,7 +37,7 @@ print("="*80)
 # LOAD DATASET
 # ============================================
 print("\n1 Loading dataset...")
-df = pd.read_csv(r"data\synthetic_fraud.csv")
+df = load_dataset(r"data\synthetic_fraud.csv")
 
 print(f"   Total: {len(df):,} transactions")
 print(f"   Fraud: {df['Fraud_Label'].sum():,} ({df['Fraud_Label'].mean()*100:.1f}%)")
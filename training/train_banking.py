@@ -14,6 +14,10 @@ import joblib
 import json
 import os
 from datetime import datetime
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from retraining.dataset_cache import load_dataset
 
 print("="*80)
 print("🎯 IMPROVED BANKING FRAUD MODEL TRAINING")
@@ -25,7 +29,7 @@ print("="*80)
 print("\n📊 Loading training data...")
 
 try:
-    df = pd.read_csv('data/synthetic_fraud.csv')  # Changed filename
+    df = load_dataset('data/synthetic_fraud.csv')  # Changed filename
     print(f"✅ Loaded {len(df)} transactions")
     
     # Use correct column name
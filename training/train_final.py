@@ -14,6 +14,7 @@ from sklearn.metrics import (
 from imblearn.over_sampling import SMOTE
 from imblearn.under_sampling import RandomUnderSampler
 from features.features_eng import engineer_features
+from retraining.dataset_cache import load_dataset
 
 print("="*70)
 print("🎯 FINAL PRODUCTION MODEL TRAINING")
@@ -23,7 +24,7 @@ print("="*70)
 # 1. LOAD AND PREPARE DATA
 # ============================================
 print("\n📂 Step 1: Loading data...")
-df = pd.read_csv("data/creditcard.csv")
+df = load_dataset("data/creditcard.csv")
 print(f"Dataset shape: {df.shape}")
 print(f"Fraud cases: {df['Class'].sum()} ({df['Class'].mean()*100:.4f}%)")
 